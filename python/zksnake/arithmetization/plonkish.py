@@ -5,89 +5,121 @@ from zksnake._algebra import circuit
 
 from ..ecc import EllipticCurve
 from ..utils import next_power_of_two
+from .serialization import MAGIC_PLONKISH, ArtifactReader, ArtifactWriter
+
+# custom gate name -> selector it adds on top of the vanilla (L, R, O, M, C) gate
+CUSTOM_GATES = {
+    # qP * a^5, an S-box in a single row
+    "pow5": "P",
+    # qD * d over a fourth wire, a linear combination of three variables in a single row
+    "add4": "D",
+}
+
+# fixed columns of the lookup argument, present when the constraint system declares tables:
+# K holds the (1-based) id of the table looked up by wire a of a row (0 if none),
+# V and I hold the value and the table id of every entry of the concatenated tables
+LOOKUP_COLUMNS = ["K", "V", "I"]
 
 
 class Plonkish:
 
-    def __init__(self, cs: circuit.ConstraintSystem, curve: str = "BN254"):
-        size = cs.num_constraints()
+    def __init__(
+        self,
+        cs: circuit.ConstraintSystem,
+        curve: str = "BN254",
+        custom_gates: list = None,
+    ):
+        # one public input row per public variable, then the constraints and the lookups
+        size = len(cs.public_vars) + cs.num_constraints() + cs.num_lookups()
+        table_size = sum(len(values) for _, values in cs.lookup_tables)
         self.constraint_system = cs
         self.unpadded_length = size
-        self.length = next_power_of_two(size)
+        self.length = next_power_of_two(max(size, table_size))
+        self.custom_gates = list(custom_gates or [])
+        for gate in self.custom_gates:
+            if gate not in CUSTOM_GATES:
+                raise ValueError(f"Unknown custom gate: {gate}")
+        self.selectors = ["L", "R", "O", "M", "C"] + [
+            CUSTOM_GATES[gate] for gate in self.custom_gates
+        ]
+        if cs.lookup_tables:
+            self.selectors += LOOKUP_COLUMNS
+        self.num_wires = 4 if "add4" in self.custom_gates else 3
+        self.curve = curve
         self.qL = None
         self.qR = None
         self.qO = None
         self.qM = None
         self.qC = None
-        self.witness_map = []
+        self.custom_selectors = {}
+        self.witness_layout = []
+        self.witness_vars = []
+        self.public_rows = []
         self.permutation = []
+        self.public_indices = []
         self.p = EllipticCurve(curve).order
 
     def compile(self):
         """
         Compile Constraint System into Plonk Polynomials (coefficient form)
         """
-        compiled = self.constraint_system.compile_to_plonkish()
-
-        qL = []
-        qR = []
-        qM = []
-        qO = []
-        qC = []
-        witness_map = []
-        for c in compiled[0]:
-            qL += [c[0]]
-            qR += [c[1]]
-            qO += [c[2]]
-            qM += [c[3]]
-            qC += [c[4]]
-            witness_map.extend(c[5])
-
-        self.qL = qL + [0] * (self.length - len(qL))
-        self.qR = qR + [0] * (self.length - len(qR))
-        self.qO = qO + [0] * (self.length - len(qO))
-        self.qM = qM + [0] * (self.length - len(qM))
-        self.qC = qC + [0] * (self.length - len(qC))
-        self.witness_map = witness_map
-
-        self.permutation = compiled[1]
+        columns, layout, variables, public_rows, permutation = (
+            self.constraint_system.compile_to_plonkish(self.custom_gates)
+        )
+
+        for name, column in columns.items():
+            columns[name] = column + [0] * (self.length - len(column))
+
+        self.qL = columns.pop("L")
+        self.qR = columns.pop("R")
+        self.qO = columns.pop("O")
+        self.qM = columns.pop("M")
+        self.qC = columns.pop("C")
+        self.custom_selectors = {
+            name: columns[name] for name in self.selectors if name in columns
+        }
+        self.witness_layout = layout
+        self.witness_vars = variables
+        self.public_rows = public_rows
+        self.public_indices = [row for row, _ in public_rows]
+
+        self.permutation = permutation
+
+    def selector(self, name: str) -> list:
+        """
+        Return the column of selector `name`
+        """
+        vanilla = {
+            "L": self.qL,
+            "R": self.qR,
+            "O": self.qO,
+            "M": self.qM,
+            "C": self.qC,
+        }
+        if name in vanilla:
+            return vanilla[name]
+
+        return self.custom_selectors[name]
 
     def solve(self, inputs: dict) -> dict:
         """
         Solve the constraint system with given inputs,
         return the solution dict
         """
+        assert self.constraint_system is not None, "ConstraintSystem is not attached"
         return self.constraint_system.solve(inputs)
 
     def generate_witness(self, solve_result: dict):
         """
         Generate Plonk full witness from solved Constraint System
         """
-        pub_w = {}
-        priv_w = {}
-        for k, v in solve_result.items():
-            if k in self.constraint_system.public_vars:
-                pub_w[k] = v
-
-            priv_w[k] = v
-
-        private_witness = []
-        pi = {}
-        pi_index = 0
-        for i in range(0, len(self.witness_map), 3):
-            k1 = self.witness_map[i]
-            k2 = self.witness_map[i + 1]
-            k3 = self.witness_map[i + 2]
-
-            private_witness += [priv_w[k1]] if k1 else [0]
-            private_witness += [priv_w[k2]] if k2 else [0]
-            if k3 in pub_w:
-                pi[pi_index] = -pub_w[k3] % self.p
-                pi_index += 1
-                private_witness += [0]
-            else:
-                pi_index += 1
-                private_witness += [priv_w[k3]] if k3 else [0]
+        # id 0 is the empty wire
+        values = [0] * (len(self.witness_vars) + 1)
+        for i, var in enumerate(self.witness_vars, 1):
+            values[i] = solve_result[var]
+
+        private_witness = [values[i] for i in self.witness_layout]
+        pi = {row: -values[i] % self.p for row, i in self.public_rows}
 
         return pi, private_witness
 
@@ -95,7 +127,11 @@ class Plonkish:
         """
         Check constraint satisfiability with the given `witness`
         """
-        a, b, c = private_witness[::3], private_witness[1::3], private_witness[2::3]
+        width = self.num_wires
+        wires = [private_witness[i::width] for i in range(width)]
+        a, b, c = wires[:3]
+        qD = self.custom_selectors.get("D")
+        qP = self.custom_selectors.get("P")
 
         # gate constraints
         for i in range(self.unpadded_length):
@@ -107,30 +143,91 @@ class Plonkish:
                 + self.qO[i] * c[i]
                 + (self.qC[i] + pi)
             )
+            if qD:
+                g += qD[i] * wires[3][i]
+            if qP:
+                g += qP[i] * pow(a[i], 5, self.p)
 
             if g % self.p != 0:
                 return False
 
+        # lookup constraints
+        qK = self.custom_selectors.get("K")
+        if qK:
+            table = set(zip(self.custom_selectors["V"], self.custom_selectors["I"]))
+            for i in range(self.unpadded_length):
+                if qK[i] and (a[i] % self.p, qK[i]) not in table:
+                    return False
+
         # copy constraints
-        a += [0] * (self.length - len(a))
-        b += [0] * (self.length - len(b))
-        c += [0] * (self.length - len(c))
-        flatten_witness = a + b + c
+        flatten_witness = []
+        for wire in wires:
+            flatten_witness += wire + [0] * (self.length - len(wire))
         for src, dst in enumerate(self.permutation):
             if flatten_witness[src] != flatten_witness[dst]:
                 return False
 
         return True
 
-    def to_bytes(self):
+    def to_bytes(self) -> bytes:
         """
-        Serialize R1CS object into bytes
+        Serialize compiled Plonkish constraints into a binary artifact holding
+        the selector columns, the permutation, the witness layout and the public rows
         """
-        raise NotImplementedError
+        assert self.qL is not None, "Plonkish is not compiled"
+
+        writer = ArtifactWriter(MAGIC_PLONKISH)
+        writer.string(self.curve)
+        writer.strings(self.custom_gates)
+        writer.strings(self.selectors)
+        writer.u64(self.unpadded_length)
+        writer.u64(self.length)
+
+        for name in self.selectors:
+            writer.scalar_array([q % self.p for q in self.selector(name)])
+
+        writer.u64_array(self.permutation)
+        writer.strings(self.witness_vars)
+        writer.u64_array(self.witness_layout)
+        writer.u64_array([i for public_row in self.public_rows for i in public_row])
+
+        return writer.to_bytes()
 
     @classmethod
-    def from_bytes(cls, data):
+    def from_bytes(cls, data, constraint_system: circuit.ConstraintSystem = None):
         """
-        Construct R1CS object from bytes
+        Construct compiled Plonkish constraints from a binary artifact,
+        `data` can be any buffer such as `bytes` or `mmap.mmap`.
+
+        The optional `constraint_system` is only needed to `solve` the inputs
         """
-        raise NotImplementedError
+        reader = ArtifactReader(data, MAGIC_PLONKISH)
+
+        plonkish = cls.__new__(cls)
+        plonkish.constraint_system = constraint_system
+        plonkish.curve = reader.string()
+        plonkish.p = EllipticCurve(plonkish.curve).order
+        plonkish.custom_gates = reader.strings()
+        plonkish.num_wires = 4 if "add4" in plonkish.custom_gates else 3
+        plonkish.selectors = reader.strings()
+        plonkish.unpadded_length = reader.u64()
+        plonkish.length = reader.u64()
+
+        columns = {name: reader.scalar_array() for name in plonkish.selectors}
+        plonkish.qL = columns.pop("L")
+        plonkish.qR = columns.pop("R")
+        plonkish.qO = columns.pop("O")
+        plonkish.qM = columns.pop("M")
+        plonkish.qC = columns.pop("C")
+        plonkish.custom_selectors = columns
+
+        plonkish.permutation = reader.u64_array()
+        plonkish.witness_vars = reader.strings()
+        plonkish.witness_layout = reader.u64_array()
+        public_rows = reader.u64_array()
+        reader.end()
+
+        plonkish.public_rows = list(zip(public_rows[::2], public_rows[1::2]))
+        plonkish.public_indices = public_rows[::2]
+
+        return plonkish
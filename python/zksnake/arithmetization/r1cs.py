@@ -6,6 +6,7 @@ from zksnake._algebra import circuit
 from ..parser import R1CSReader
 from ..array import SparseArray
 from ..ecc import EllipticCurve
+from .serialization import MAGIC_R1CS, ArtifactReader, ArtifactWriter
 
 
 class R1CS:
@@ -16,7 +17,9 @@ class R1CS:
         self.C = None
         self.constraint_system = cs
         self.n_public = len(cs.public_vars) + 1
+        self.curve = curve
         self.p = EllipticCurve(curve).order
+        self.witness_vector = []
 
     def compile(self):
         """
@@ -39,21 +42,25 @@ class R1CS:
         self.A = A
         self.B = B
         self.C = C
+        self.witness_vector = self.constraint_system.get_witness_vector()
 
     def solve(self, inputs: dict) -> dict:
         """
         Solve the constraint system with given inputs,
         return the solution dict
         """
+        assert self.constraint_system is not None, "ConstraintSystem is not attached"
         return self.constraint_system.solve(inputs)
 
     def generate_witness(self, solve_result: dict):
         """
         Generate R1CS full witness from solved Constraint System
         """
+        assert self.A is not None, "R1CS is not compiled"
+
         w = []
 
-        for v in self.constraint_system.get_witness_vector():
+        for v in self.witness_vector:
             if v == "0":
                 w.append(1)
             elif isinstance(v, str):
@@ -78,18 +85,59 @@ class R1CS:
 
         return AzBz == Cz
 
-    def to_bytes(self):
+    def to_bytes(self) -> bytes:
         """
-        Serialize R1CS object into bytes
+        Serialize compiled R1CS into a binary artifact holding the sparse matrices,
+        the witness ordering and the number of public witness
         """
-        raise NotImplementedError
+        assert self.A is not None, "R1CS is not compiled"
+
+        writer = ArtifactWriter(MAGIC_R1CS)
+        writer.string(self.curve)
+        writer.u64(self.n_public)
+        writer.strings(self.witness_vector)
+        writer.u64(self.A.n_row)
+        writer.u64(self.A.n_col)
+
+        for matrix in (self.A, self.B, self.C):
+            writer.u64_array([row for row, _, _ in matrix.triplets])
+            writer.u64_array([col for _, col, _ in matrix.triplets])
+            writer.scalar_array([value % self.p for _, _, value in matrix.triplets])
+
+        return writer.to_bytes()
 
     @classmethod
-    def from_bytes(cls, data):
+    def from_bytes(cls, data, constraint_system: circuit.ConstraintSystem = None):
         """
-        Construct R1CS object from bytes
+        Construct compiled R1CS from a binary artifact,
+        `data` can be any buffer such as `bytes` or `mmap.mmap`.
+
+        The optional `constraint_system` is only needed to `solve` the inputs
         """
-        raise NotImplementedError
+        reader = ArtifactReader(data, MAGIC_R1CS)
+
+        r1cs = cls.__new__(cls)
+        r1cs.constraint_system = constraint_system
+        r1cs.curve = reader.string()
+        r1cs.p = EllipticCurve(r1cs.curve).order
+        r1cs.n_public = reader.u64()
+        r1cs.witness_vector = reader.strings()
+        row_length = reader.u64()
+        col_length = reader.u64()
+
+        def read_matrix():
+            matrix = SparseArray([[]], row_length, col_length, r1cs.p)
+            matrix.append(
+                zip(reader.u64_array(), reader.u64_array(), reader.scalar_array())
+            )
+            return matrix
+
+        r1cs.A = read_matrix()
+        r1cs.B = read_matrix()
+        r1cs.C = read_matrix()
+        reader.end()
+
+        return r1cs
 
     @classmethod
     def from_file(cls, r1csfile: str, symfile: str = None, curve: str = "BN254"):
@@ -0,0 +1,123 @@
+"""
+Binary artifact of a compiled circuit.
+
+An artifact is `magic (4 bytes) || blake2b-256(body) (32 bytes) || body`,
+where the body is a sequence of 8-byte little-endian lengths, length-prefixed
+utf-8 strings, fixed-width 8-byte little-endian integer arrays and fixed-width
+32-byte little-endian scalar arrays. Any buffer (`bytes`, `memoryview`,
+`mmap.mmap`) holding an artifact can be loaded without copying it first.
+"""
+
+import hashlib
+import sys
+
+MAGIC_R1CS = b"zkR1"
+MAGIC_PLONKISH = b"zkPL"
+
+HEADER_SIZE = 4 + 32
+SCALAR_SIZE = 32
+
+
+def content_hash(body) -> bytes:
+    """Return the blake2b-256 digest of an artifact `body`"""
+    return hashlib.blake2b(body, digest_size=32).digest()
+
+
+def read_digest(data) -> bytes:
+    """Return the content hash stored in the header of an artifact, without checking it"""
+    return bytes(memoryview(data)[4:HEADER_SIZE])
+
+
+class ArtifactWriter:
+
+    def __init__(self, magic: bytes):
+        self.magic = magic
+        self.body = bytearray()
+
+    def u64(self, value: int):
+        """Write an 8-byte little-endian integer"""
+        self.body += value.to_bytes(8, "little")
+
+    def u64_array(self, values):
+        """Write a length-prefixed array of 8-byte little-endian integers"""
+        self.u64(len(values))
+        for value in values:
+            self.body += value.to_bytes(8, "little")
+
+    def scalar_array(self, values):
+        """Write a length-prefixed array of 32-byte little-endian scalars"""
+        self.u64(len(values))
+        for value in values:
+            self.body += value.to_bytes(SCALAR_SIZE, "little")
+
+    def string(self, value: str):
+        """Write a length-prefixed utf-8 string"""
+        encoded = value.encode()
+        self.u64(len(encoded))
+        self.body += encoded
+
+    def strings(self, values):
+        """Write a length-prefixed list of strings"""
+        self.u64(len(values))
+        for value in values:
+            self.string(value)
+
+    def to_bytes(self) -> bytes:
+        """Return the artifact, header included"""
+        return self.magic + content_hash(self.body) + bytes(self.body)
+
+
+class ArtifactReader:
+
+    def __init__(self, data, magic: bytes):
+        view = memoryview(data)
+        assert bytes(view[:4]) == magic, "Invalid artifact type"
+
+        self.digest = bytes(view[4:HEADER_SIZE])
+        self.body = view[HEADER_SIZE:]
+        assert content_hash(self.body) == self.digest, "Artifact content hash mismatch"
+
+        self.offset = 0
+
+    def _take(self, size: int):
+        assert self.offset + size <= len(self.body), "Truncated artifact"
+        chunk = self.body[self.offset : self.offset + size]
+        self.offset += size
+        return chunk
+
+    def u64(self) -> int:
+        """Read an 8-byte little-endian integer"""
+        return int.from_bytes(self._take(8), "little")
+
+    def u64_array(self) -> list:
+        """Read a length-prefixed array of 8-byte little-endian integers"""
+        length = self.u64()
+        chunk = self._take(length * 8)
+        if sys.byteorder == "little":
+            return chunk.cast("Q").tolist()
+
+        return [
+            int.from_bytes(chunk[i : i + 8], "little") for i in range(0, len(chunk), 8)
+        ]
+
+    def scalar_array(self) -> list:
+        """Read a length-prefixed array of 32-byte little-endian scalars"""
+        length = self.u64()
+        chunk = self._take(length * SCALAR_SIZE)
+        return [
+            int.from_bytes(chunk[i : i + SCALAR_SIZE], "little")
+            for i in range(0, len(chunk), SCALAR_SIZE)
+        ]
+
+    def string(self) -> str:
+        """Read a length-prefixed utf-8 string"""
+        length = self.u64()
+        return str(self._take(length), "utf-8")
+
+    def strings(self) -> list:
+        """Read a length-prefixed list of strings"""
+        return [self.string() for _ in range(self.u64())]
+
+    def end(self):
+        """Check that the whole artifact has been consumed"""
+        assert self.offset == len(self.body), "Trailing bytes in artifact"
@@ -1,3 +1,3 @@
 from .base import MultiOpeningQuery
 from .kzg import KZG
-from .ipa import IPA
+from .ipa import IPA, IPAAccumulator
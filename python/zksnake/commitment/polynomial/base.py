@@ -4,6 +4,16 @@ from ...transcript import FiatShamirTranscript
 
 
 class MultiOpeningQuery:
+    """
+    Set of polynomials (prover side) or commitments (verifier side)
+    opened at one or more points.
+
+    Every polynomial is registered once and referred to by its index afterwards:
+    polynomials are looked up by `id()` and commitments by hash, so lookups are
+    O(1) and never compare coefficient vectors. Evaluations are memoized per
+    `(point, index)`, so querying the same polynomial at the same point twice
+    evaluates it once. A second claim with a different evaluation is rejected.
+    """
 
     def __init__(self):
         self.polynomials = []
@@ -11,56 +21,88 @@ class MultiOpeningQuery:
         self.opening_points = {}
         self.evaluations = {}
         self.blindings = []
+        self._poly_index = {}
+        self._commitment_index = {}
 
-    def prover_query(self, polynomial, point):
-        if polynomial not in self.polynomials:
+    def _register(self, polynomial, commitment, blinding):
+        index = self._commitment_index.get(commitment)
+        if index is None:
+            index = len(self.commitments)
             self.polynomials.append(polynomial)
+            self.commitments.append(commitment)
+            self.blindings.append(blinding or 1)
+            self._commitment_index[commitment] = index
+
+        if polynomial is not None:
+            # keep a reference so that the id cannot be reused while indexed
+            self._poly_index[id(polynomial)] = (index, polynomial)
+
+        return index
 
-        evaluation = polynomial(point)
-        poly_index = self.polynomials.index(polynomial)
-        if point not in self.opening_points:
-            self.opening_points[point] = [poly_index]
-            self.evaluations[point] = {poly_index: evaluation}
-        else:
-            self.opening_points[point] += [poly_index]
-            self.evaluations[point][poly_index] = evaluation
+    def _query(self, index, point, evaluation=None):
+        evaluations = self.evaluations.setdefault(point, {})
+        if index in evaluations:
+            if evaluation is not None and evaluations[index] != evaluation:
+                raise ValueError(
+                    "Conflicting evaluations claimed for the same commitment and point"
+                )
+            return
+
+        if evaluation is None:
+            evaluation = self.polynomials[index](point)
+
+        evaluations[index] = evaluation
+        self.opening_points.setdefault(point, []).append(index)
+
+    def _index_of_polynomial(self, polynomial):
+        entry = self._poly_index.get(id(polynomial))
+        assert entry is not None, "Polynomial has not been added to the query"
+        return entry[0]
+
+    def prover_query(self, polynomial, point):
+        self._query(self._index_of_polynomial(polynomial), point)
+
+    def batch_prover_query(self, polynomials, point):
+        """Query all `polynomials` at the same `point`"""
+        for polynomial in polynomials:
+            self.prover_query(polynomial, point)
 
     def verifier_query(self, commitment, point, evaluation):
-        if commitment not in self.commitments:
-            self.commitments.append(commitment)
+        index = self._commitment_index.get(commitment)
+        if index is None:
+            index = self._register(None, commitment, None)
+
+        self._query(index, point, evaluation)
 
-        poly_index = self.commitments.index(commitment)
-        if point not in self.opening_points:
-            self.opening_points[point] = [poly_index]
-            self.evaluations[point] = {poly_index: evaluation}
-        else:
-            self.opening_points[point] += [poly_index]
-            self.evaluations[point][poly_index] = evaluation
+    def batch_verifier_query(self, commitments, point, evaluations):
+        """Query all `commitments` at the same `point` with their claimed `evaluations`"""
+        assert len(commitments) == len(evaluations), "Length mismatch"
+        for commitment, evaluation in zip(commitments, evaluations):
+            self.verifier_query(commitment, point, evaluation)
 
     def to_polynomial(self, commitment):
-        index = self.commitments.index(commitment)
-        return self.polynomials[index]
+        return self.polynomials[self._commitment_index[commitment]]
 
     def to_commitment(self, polynomial):
-        index = self.polynomials.index(polynomial)
-        return self.commitments[index]
+        return self.commitments[self._index_of_polynomial(polynomial)]
 
     def get_blinding(self, commitment):
-        index = self.commitments.index(commitment)
-        return self.blindings[index]
+        return self.blindings[self._commitment_index[commitment]]
 
     def get_evaluation(self, commitment, point):
-        index = self.commitments.index(commitment)
-        return self.evaluations[point][index]
+        return self.evaluations[point][self._commitment_index[commitment]]
 
     def add_polynomial(self, polynomial, commitment, blinding=None):
-        if polynomial not in self.polynomials:
-            self.polynomials += [polynomial]
-            self.commitments += [commitment]
-            if blinding:
-                self.blindings += [blinding]
-            else:
-                self.blindings += [1]
+        self._register(polynomial, commitment, blinding)
+
+    def add_polynomials(self, polynomials, commitments, blindings=None):
+        """Add many polynomials with their commitments (and blindings) at once"""
+        assert len(polynomials) == len(commitments), "Length mismatch"
+        blindings = blindings or [None] * len(polynomials)
+        for polynomial, commitment, blinding in zip(
+            polynomials, commitments, blindings
+        ):
+            self._register(polynomial, commitment, blinding)
 
     def get_polynomials(self):
         item = self.polynomials
@@ -74,6 +116,37 @@ class MultiOpeningQuery:
             commitments = [item[i] for i in idx]
             yield point, commitments
 
+    def get_openings(self):
+        """
+        Yield `(point, index, evaluation)` for every query, in query order
+        """
+        for point, idx in self.opening_points.items():
+            evaluations = self.evaluations[point]
+            for i in idx:
+                yield point, i, evaluations[i]
+
+    def get_point_sets(self):
+        """
+        Group polynomial indices by the set of points they are opened at.
+        Both points and indices keep the order they were first queried in,
+        so a prover query and the verifier query built from it group identically.
+
+        Example:
+        a(x), b(x), c(y), d(y) => {a, b} {c, d}
+        a(x), b(x), c(x), c(y) => {a, b} {c}
+        """
+
+        points_of = {}
+        for point, idx in self.opening_points.items():
+            for i in idx:
+                points_of.setdefault(i, []).append(point)
+
+        groups = {}
+        for i, points in points_of.items():
+            groups.setdefault(frozenset(points), (points, []))[1].append(i)
+
+        return list(groups.values())
+
 
 class PolynomialCommitmentScheme(ABC):
 
@@ -1,13 +1,43 @@
 import math
-from collections import defaultdict
 
-from ...polynomial import Polynomial, lagrange_interpolation
+from ...polynomial import (
+    Polynomial,
+    combine_challenge_vectors,
+    evaluate_polynomials,
+    lagrange_interpolation,
+)
 from ...ecc import EllipticCurve
+from ...generators import generators
 from ...transcript import hash_to_curve, FiatShamirTranscript
-from ...utils import inner_product, next_power_of_two, get_random_int
+from ...utils import batch_modinv, next_power_of_two, get_random_int
 from .base import MultiOpeningQuery, PolynomialCommitmentScheme
 
 
+class IPAAccumulator:
+    """
+    Deferred IPA-PCS openings against the same generators, settled with `IPA.settle`.
+
+    Each accumulated opening contributes its weighted challenge vector
+    (kept as its O(log n) round challenges) and its O(log n) weighted
+    group terms, so the n-sized MSM against the generators is paid once
+    for all of them.
+    """
+
+    def __init__(self):
+        self.challenges = []
+        self.points = []
+        self.scalars = []
+
+    def __len__(self):
+        return len(self.challenges)
+
+    def merge(self, other: "IPAAccumulator"):
+        """Move every opening deferred in `other` into this accumulator"""
+        self.challenges += other.challenges
+        self.points += other.points
+        self.scalars += other.scalars
+
+
 class IPA(PolynomialCommitmentScheme):
     """
     Protocol based on BCMS20 (https://eprint.iacr.org/2020/499.pdf, Appendix A.),
@@ -23,20 +53,11 @@ class IPA(PolynomialCommitmentScheme):
         self.G = []
         self.H = None
 
-    def __split_half(self, data: list):
-        if len(data) > 2:
-            mid_index = len(data) // 2
-            return data[:mid_index], data[mid_index:]
-        elif len(data) == 2:
-            return [data[0]], [data[1]]
-        else:
-            return [data[0]], []
-
     def setup(self, seed=None):
         seed = seed or self.name.encode()
         self.n = next_power_of_two(self.degree)
-        self.G = hash_to_curve(seed, b"G", self.E.name, self.n)
-        self.H = hash_to_curve(seed, b"H", self.E.name, 1)
+        self.G = generators(seed, b"G", self.E.name, self.n)
+        self.H = generators(seed, b"H", self.E.name, 1)[0]
 
         self.is_setup = True
 
@@ -101,75 +122,54 @@ class IPA(PolynomialCommitmentScheme):
         commitment_0 = commitment_prime + evaluation * h_prime
         transcript.append(commitment_0)
 
-        L_list = []
-        R_list = []
-        u_list = []
-
-        n = self.n
-        G = self.G
-
-        while n != 1:
-            n //= 2
-
-            c_low, c_hi = self.__split_half(c)
-            b_low, b_hi = self.__split_half(b)
-            G_low, G_hi = self.__split_half(G)
-
-            L = (
-                self.E.multiexp(G_low, c_hi)
-                + inner_product(c_hi, b_low, self.order) * h_prime
-            )
-
-            R = (
-                self.E.multiexp(G_hi, c_low)
-                + inner_product(c_low, b_hi, self.order) * h_prime
-            )
-
-            L_list.append(L)
-            R_list.append(R)
-
+        def challenge(L, R):
             transcript.append(L)
             transcript.append(R)
+            return transcript.get_challenge_scalar()
 
-            u = transcript.get_challenge_scalar()
-            u_inv = pow(u, -1, self.E.order)
-            u_list.append(u)
-
-            for i in range(n):
-                c_low[i] = (c_low[i] + c_hi[i] * u_inv) % self.E.order
-                b_low[i] = (b_low[i] + b_hi[i] * u) % self.E.order
-
-                G_low[i] = G_low[i] + u * G_hi[i]
-
-            c = c_low
-            b = b_low
-
-            G = G_low
-
-        c = c[0]
+        L_list, R_list, c = self.E.ipa_fold(self.G, c, b, h_prime, challenge)
 
         return [L_list, R_list, commitment_bar, c, t_prime], evaluation
 
-    def verify(self, commitment, proof, point, evaluation, transcript=None):
+    def _evaluate_challenge_poly(self, u_list: list, x: int):
+        """
+        Evaluate the challenge polynomial `g(x)` in O(log n) using its product form
+        """
+        result = 1
+        x_power = x % self.order
+        for u in reversed(u_list):
+            result = result * (1 + u * x_power) % self.order
+            x_power = x_power * x_power % self.order
+        return result
+
+    def _reduce(self, commitment, proof, point, evaluation, transcript=None):
+        """
+        Replay the transcript of an opening and reduce it to the check
+        `c * <s, G> + <scalars, points> == 0`.
+
+        Return `(u_list, c, points, scalars)`, where `s` is the challenge vector
+        of `u_list`, or `None` if the proof is malformed
+        """
 
-        assert self.is_setup, "Trusted setup has not been run"
         if len(proof) != 5:
-            return False
+            return None
 
-        b = [pow(point, i, self.order) for i in range(self.n)]
         L_list = proof[0]
         R_list = proof[1]
         commitment_bar = proof[2]
         c = proof[3]
         t_prime = proof[4]
 
+        m = int(math.log2(self.n))
         if (
             commitment.is_zero()
             or commitment_bar.is_zero()
             or t_prime % self.order == 0
             or c % self.order == 0
+            or len(L_list) != m
+            or len(R_list) != m
         ):
-            return False
+            return None
 
         transcript = transcript or FiatShamirTranscript(self.name.encode(), self.order)
         transcript.append(self.G)
@@ -181,7 +181,10 @@ class IPA(PolynomialCommitmentScheme):
 
         alpha = transcript.get_challenge_scalar()
 
-        commitment_prime = commitment + alpha * commitment_bar - t_prime * self.H
+        commitment_prime = self.E.multiexp(
+            [commitment, commitment_bar, self.H],
+            [1, alpha, -t_prime % self.order],
+        )
         transcript.append(commitment_prime)
 
         h_prime = hash_to_curve(transcript.get_challenge(), b"U", self.E.name, 1)
@@ -189,32 +192,98 @@ class IPA(PolynomialCommitmentScheme):
         transcript.append(C)
 
         u_list = []
-        m = int(math.log2(self.n))
         for i in range(m):
 
             if L_list[i].is_zero() or R_list[i].is_zero():
-                return False
+                return None
 
             transcript.append(L_list[i])
             transcript.append(R_list[i])
 
-            u = transcript.get_challenge_scalar()
-            u_inv = pow(u, -1, self.E.order)
-            u_list.append(u)
+            u_list.append(transcript.get_challenge_scalar())
 
-            C = u_inv * L_list[i] + C + u * R_list[i]
+        u_inv_list = batch_modinv(u_list, self.order)
 
-        # TODO: this can be optimized by avoiding poly multiplication
-        g = Polynomial([1], self.order)
-        for i in range(m):
-            coeff = [1] + [0] * 2**i
-            coeff[-1] = u_list[m - i - 1]
-            g *= Polynomial(coeff, self.order)
+        # b(point) = <(1, point, point^2, ...), s> = g(point)
+        b = self._evaluate_challenge_poly(u_list, point)
 
-        G = self.E.multiexp(self.G, g.coeffs())
-        b = inner_product(b, g.coeffs(), self.order)
+        # c * <s, G> + c * b * h' == C + sum(u_j^-1 * L_j + u_j * R_j)
+        points = [h_prime, C] + L_list + R_list
+        scalars = (
+            [c * b % self.order, self.order - 1]
+            + [-u_inv % self.order for u_inv in u_inv_list]
+            + [-u % self.order for u in u_list]
+        )
 
-        return C == self.E.multiexp([G, h_prime], [c, c * b % self.order])
+        return u_list, c, points, scalars
+
+    def verify(self, commitment, proof, point, evaluation, transcript=None):
+
+        assert self.is_setup, "Trusted setup has not been run"
+
+        reduced = self._reduce(commitment, proof, point, evaluation, transcript)
+        if reduced is None:
+            return False
+
+        # c * s, with s the coefficients of the challenge polynomial
+        # g(X) = prod(1 + u_j * X^(2^(m-1-j))), so that <s, G> is the folded generator
+        u_list, c, points, scalars = reduced
+        s = combine_challenge_vectors([c], [u_list], self.order)
+        result = self.E.multiexp(self.G + points, s + scalars)
+
+        return result.is_zero()
+
+    def accumulate(
+        self,
+        accumulator: "IPAAccumulator",
+        commitment,
+        proof,
+        point,
+        evaluation,
+        transcript=None,
+    ):
+        """
+        Check everything of an opening except the n-sized `<s, G>` term,
+        and defer that term into `accumulator` under a random weight.
+
+        Return `False` if the proof is malformed. The opening is only
+        verified once `settle` is called on the accumulator.
+        """
+
+        assert self.is_setup, "Trusted setup has not been run"
+
+        reduced = self._reduce(commitment, proof, point, evaluation, transcript)
+        if reduced is None:
+            return False
+
+        u_list, c, points, scalars = reduced
+        r = get_random_int(self.order - 1)
+
+        accumulator.challenges.append((r * c % self.order, u_list))
+        accumulator.points += points
+        accumulator.scalars += [r * x % self.order for x in scalars]
+
+        return True
+
+    def settle(self, accumulator: "IPAAccumulator"):
+        """
+        Verify every opening deferred into `accumulator` with a single MSM,
+        by folding their weighted challenge vectors natively into one vector against `G`
+        """
+
+        assert self.is_setup, "Trusted setup has not been run"
+
+        if not accumulator.challenges:
+            return True
+
+        weights, u_lists = zip(*accumulator.challenges)
+        s_acc = combine_challenge_vectors(weights, u_lists, self.order)
+
+        result = self.E.multiexp(
+            self.G + accumulator.points, s_acc + accumulator.scalars
+        )
+
+        return result.is_zero()
 
     def _group_evaluation(
         self,
@@ -230,68 +299,41 @@ class IPA(PolynomialCommitmentScheme):
         a(x), b(x), c(x), c(y) => {a, b} {c}
         """
 
-        group_map = defaultdict(set)
-        for point, commitments in points_query.get_commitments():
-            for commitment in commitments:
-                group_map[commitment].add(point)
-
-        result_map = defaultdict(set)
-        for value, keys in group_map.items():
-            result_map[frozenset(keys)].add(value)
-
         q_polys = []
         q_blindings = []
         r_polys = []
         points_list = []
-        for points, commitments in result_map.items():
+        for points, indices in points_query.get_point_sets():
+            powers = [pow(x, i, self.order) for i in range(len(indices))]
             if not is_verifier:
-                polys = [
-                    points_query.to_polynomial(commitment) for commitment in commitments
-                ]
                 q = Polynomial([0], self.order)
-                for i, poly in enumerate(polys):
-                    q += pow(x, i, self.order) * poly
-
-                blindings = [
-                    points_query.get_blinding(commitment) for commitment in commitments
-                ]
                 blind = 0
-                for i, blinding in enumerate(blindings):
-                    blind += pow(x, i, self.order) * blinding
-                blind %= self.order
+                for power, index in zip(powers, indices):
+                    q += power * points_query.polynomials[index]
+                    blind += power * points_query.blindings[index]
+                q_blindings.append(blind % self.order)
             else:
-                q = self.zero_commitment()
-                for i, comm in enumerate(commitments):
-                    q += pow(x, i, self.order) * comm
+                q = self.E.multiexp(
+                    [points_query.commitments[index] for index in indices], powers
+                )
 
-            xs = []
+            # q(point) from the memoized evaluations of its summands
             ys = []
-            for i, point in enumerate(points):
-                if not is_verifier:
-                    evaluation = q(point)
-                else:
-                    evaluation = (
-                        sum(
-                            [
-                                pow(x, j, self.order)
-                                * points_query.get_evaluation(comm, point)
-                                % self.order
-                                for j, comm in enumerate(commitments)
-                            ]
-                        )
-                        % self.order
+            for point in points:
+                evaluations = points_query.evaluations[point]
+                ys.append(
+                    sum(
+                        power * evaluations[index]
+                        for power, index in zip(powers, indices)
                     )
+                    % self.order
+                )
 
-                xs.append(point)
-                ys.append(evaluation)
-
-            r = lagrange_interpolation(xs, ys, self.order)
+            r = lagrange_interpolation(points, ys, self.order)
 
             q_polys.append(q)
             r_polys.append(r)
-            points_list.append(list(points))
-            if not is_verifier:
-                q_blindings.append(blind)
+            points_list.append(points)
 
         return q_polys, q_blindings, r_polys, points_list
 
@@ -308,13 +350,11 @@ class IPA(PolynomialCommitmentScheme):
 
         proof = []
         verifier_query = MultiOpeningQuery()
-        for point, polys in points_query.get_polynomials():
-            for poly in polys:
-                evaluation = poly(point)
-                comm = points_query.to_commitment(poly)
-                verifier_query.verifier_query(comm, point, evaluation)
+        for point, index, evaluation in points_query.get_openings():
+            comm = points_query.commitments[index]
+            verifier_query.verifier_query(comm, point, evaluation)
 
-                transcript.append(evaluation)
+            transcript.append(evaluation)
 
         x1 = transcript.get_challenge_scalar()
         x2 = transcript.get_challenge_scalar()
@@ -346,7 +386,7 @@ class IPA(PolynomialCommitmentScheme):
         transcript.append(f_commitment)
         x3 = transcript.get_challenge_scalar()
 
-        q_polys_x3 = [q(x3) for q in q_polys]
+        q_polys_x3 = evaluate_polynomials(q_polys, x3, self.order)
 
         proof.extend(q_polys_x3)
         transcript.append(q_polys_x3)
@@ -382,10 +422,8 @@ class IPA(PolynomialCommitmentScheme):
         transcript = transcript or FiatShamirTranscript(self.name.encode(), self.order)
         transcript.append(points_query.commitments)
 
-        for point, commitments in points_query.get_commitments():
-            for commitment in commitments:
-                evaluation = points_query.get_evaluation(commitment, point)
-                transcript.append(evaluation)
+        for _, _, evaluation in points_query.get_openings():
+            transcript.append(evaluation)
 
         x1 = transcript.get_challenge_scalar()
         x2 = transcript.get_challenge_scalar()
@@ -1,7 +1,6 @@
-from collections import defaultdict
 from ...transcript import FiatShamirTranscript
-from ...polynomial import Polynomial, lagrange_interpolation
-from ...utils import get_random_int
+from ...polynomial import Polynomial, evaluate_polynomials, lagrange_interpolation
+from ...utils import batch_modinv, get_random_int
 from ...ecc import EllipticCurve
 from .base import MultiOpeningQuery, PolynomialCommitmentScheme
 
@@ -40,11 +39,7 @@ class KZG(PolynomialCommitmentScheme):
 
         assert self.is_setup, "Trusted setup has not been run"
 
-        evaluation = polynomial(point)
-        divisor_poly = Polynomial([-point % self.order, 1], self.order)
-        quotient_poly, remainder = (polynomial - evaluation) / divisor_poly
-        if not remainder.is_zero():
-            raise ValueError("Given polynomial is not divided to zero")
+        quotient_poly, evaluation = polynomial.divide_by_linear(point % self.order)
 
         proof = self.E.multiexp(self.G1_tau, quotient_poly.coeffs())
 
@@ -59,71 +54,90 @@ class KZG(PolynomialCommitmentScheme):
 
         return lhs == rhs
 
-    def _group_evaluation(
-        self,
-        points_query: MultiOpeningQuery,
-        x: int,
-        is_verifier=False,
-    ):
+    def batch_open(self, polynomials, point, challenge):
+        """
+        Open many polynomials at the same `point` with a single quotient.
+
+        The polynomials are combined as `sum(challenge^i * polynomials[i])`
+        and the combination is divided by `(X - point)` with one native
+        synthetic division, so the proof costs a single MSM regardless of how many
+        polynomials are opened.
+        """
+
+        assert self.is_setup, "Trusted setup has not been run"
+        assert len(polynomials) > 0, "No polynomial to open"
+
+        evaluations = evaluate_polynomials(polynomials, point, self.order)
+
+        combined = Polynomial([0], self.order)
+        for i, poly in enumerate(polynomials):
+            combined += pow(challenge, i, self.order) * poly
+
+        quotient, remainder = combined.divide_by_linear(point % self.order)
+
+        expected = 0
+        for i, evaluation in enumerate(evaluations):
+            expected += pow(challenge, i, self.order) * evaluation
+        if remainder != expected % self.order:
+            raise ValueError("Given polynomial is not divided to zero")
+
+        proof = self.E.multiexp(self.G1_tau, quotient.coeffs())
+
+        return proof, evaluations
+
+    def batch_verify(self, commitments, proof, point, evaluations, challenge):
         """
-        Group polynomial (indexed by its commitment) into their evaluation points.
+        Verify a proof produced by `batch_open` with a single pairing check:
+
+        e(proof, g2 * tau) * e(-(C - g1 * y + proof * point), g2) == 1
 
-        Example:
-        a(x), b(x), c(y), d(y) => {a, b} {c, d}
-        a(x), b(x), c(x), c(y) => {a, b} {c}
+        where `C` and `y` are the `challenge`-combined commitments and evaluations.
         """
 
-        group_map = defaultdict(set)
-        for point, commitments in points_query.get_commitments():
-            for commitment in commitments:
-                group_map[commitment].add(point)
+        assert self.is_setup, "Trusted setup has not been run"
+        assert len(commitments) == len(evaluations), "Length mismatch"
+
+        powers = [pow(challenge, i, self.order) for i in range(len(commitments))]
+        evaluation = sum(c * y for c, y in zip(powers, evaluations)) % self.order
+
+        rhs = self.E.multiexp(
+            list(commitments) + [self.E.G1(), proof],
+            powers + [-evaluation % self.order, point % self.order],
+        )
+
+        return self.E.pairing_check([proof, -rhs], [self.G2_tau, self.E.G2()])
 
-        result_map = defaultdict(set)
-        for value, keys in group_map.items():
-            result_map[frozenset(keys)].add(value)
+    def _group_evaluation(self, points_query: MultiOpeningQuery, x: int):
+        """
+        Combine the polynomials of each group with powers of `x`
+        and interpolate the combination over the group's evaluation points
+        """
 
         q_polys = []
         r_polys = []
         points_list = []
-        for points, commitments in result_map.items():
-            if not is_verifier:
-                polys = [
-                    points_query.to_polynomial(commitment) for commitment in commitments
-                ]
-                q = Polynomial([0], self.order)
-                for i, poly in enumerate(polys):
-                    q += pow(x, i, self.order) * poly
-            else:
-                q = self.zero_commitment()
-                for i, comm in enumerate(commitments):
-                    q += pow(x, i, self.order) * comm
-
-            xs = []
+        for points, indices in points_query.get_point_sets():
+            q = Polynomial([0], self.order)
+            for i, index in enumerate(indices):
+                q += pow(x, i, self.order) * points_query.polynomials[index]
+
+            # q(point) from the memoized evaluations of its summands
             ys = []
-            for i, point in enumerate(points):
-                if not is_verifier:
-                    evaluation = q(point)
-                else:
-                    evaluation = (
-                        sum(
-                            [
-                                pow(x, j, self.order)
-                                * points_query.get_evaluation(comm, point)
-                                % self.order
-                                for j, comm in enumerate(commitments)
-                            ]
-                        )
-                        % self.order
+            for point in points:
+                evaluations = points_query.evaluations[point]
+                ys.append(
+                    sum(
+                        pow(x, i, self.order) * evaluations[index]
+                        for i, index in enumerate(indices)
                     )
+                    % self.order
+                )
 
-                xs.append(point)
-                ys.append(evaluation)
-
-            r = lagrange_interpolation(xs, ys, self.order)
+            r = lagrange_interpolation(points, ys, self.order)
 
             q_polys.append(q)
             r_polys.append(r)
-            points_list.append(list(points))
+            points_list.append(points)
 
         return q_polys, r_polys, points_list
 
@@ -140,13 +154,11 @@ class KZG(PolynomialCommitmentScheme):
 
         proof = []
         verifier_query = MultiOpeningQuery()
-        for point, polys in points_query.get_polynomials():
-            for poly in polys:
-                evaluation = poly(point)
-                comm = points_query.to_commitment(poly)
-                verifier_query.verifier_query(comm, point, evaluation)
+        for point, index, evaluation in points_query.get_openings():
+            comm = points_query.commitments[index]
+            verifier_query.verifier_query(comm, point, evaluation)
 
-                transcript.append(evaluation)
+            transcript.append(evaluation)
 
         x1 = transcript.get_challenge_scalar()
         x2 = transcript.get_challenge_scalar()
@@ -156,11 +168,9 @@ class KZG(PolynomialCommitmentScheme):
 
         f_polys = []
         for i, points in enumerate(points_list):
-            divisor = Polynomial([1], self.order)
-            for point in points:
-                divisor *= Polynomial([-point % self.order, 1], self.order)
-
-            quotient, remainder = (q_polys[i] - r_polys[i]) / divisor
+            quotient, remainder = (q_polys[i] - r_polys[i]).divide_by_vanishing_set(
+                points
+            )
             assert remainder.is_zero()
 
             f_polys.append(quotient)
@@ -175,7 +185,7 @@ class KZG(PolynomialCommitmentScheme):
         transcript.append(f_commitment)
         x3 = transcript.get_challenge_scalar()
 
-        q_polys_x3 = [q(x3) for q in q_polys]
+        q_polys_x3 = evaluate_polynomials(q_polys, x3, self.order)
 
         proof.extend(q_polys_x3)
         transcript.append(q_polys_x3)
@@ -197,63 +207,131 @@ class KZG(PolynomialCommitmentScheme):
         transcript: FiatShamirTranscript = None,
     ):
 
-        assert self.is_setup, "Trusted setup has not been run"
-        assert len(proof) > 2, "Invalid proof"
-
-        transcript = transcript or FiatShamirTranscript(self.name.encode(), self.order)
-        transcript.append(points_query.commitments)
-
-        for point, commitments in points_query.get_commitments():
-            for commitment in commitments:
-                evaluation = points_query.get_evaluation(commitment, point)
-                transcript.append(evaluation)
+        return self.batch_multi_verify([(points_query, proof)], [transcript])
 
-        x1 = transcript.get_challenge_scalar()
-        x2 = transcript.get_challenge_scalar()
-
-        f_commitment = proof.pop(0)
-        opening_proof = proof.pop()
-        q_polys_x3 = proof
+    def batch_multi_verify(self, queries: list, transcripts: list = None):
+        """
+        Verify many `(MultiOpeningQuery, proof)` pairs produced by `multi_open` at once.
 
-        transcript.append(f_commitment)
-        x3 = transcript.get_challenge_scalar()
-        transcript.append(q_polys_x3)
-        x4 = transcript.get_challenge_scalar()
+        Every pair reduces to a KZG check
+        `e(W, g2 * tau) == e(F - g1 * y + W * x3, g2)`. The checks are folded
+        with random weights into one MSM per pairing side and a single
+        two-pair multi-pairing, and every field inversion of every pair
+        is done in one batch inversion.
+        """
 
-        q_commitments, r_polys, points_list = self._group_evaluation(
-            points_query, x1, True
-        )
+        assert self.is_setup, "Trusted setup has not been run"
 
-        # construct f_poly(x3)
-        f_poly_x3 = 0
-        for i, points in enumerate(points_list):
-            denominator = 1
-            for point in points:
-                denominator = denominator * (x3 - point) % self.order
+        transcripts = transcripts or [None] * len(queries)
+        assert len(transcripts) == len(queries), "Length mismatch"
 
-            numerator = (q_polys_x3[i] - r_polys[i](x3)) % self.order
+        # replay the transcripts and collect every denominator to invert
+        pending = []
+        denominators = []
+        for (points_query, proof), transcript in zip(queries, transcripts):
+            assert len(proof) > 2, "Invalid proof"
 
-            f_poly_x3 += (
-                pow(x2, i, self.order)
-                * numerator
-                * pow(denominator, -1, self.order)
-                % self.order
+            transcript = transcript or FiatShamirTranscript(
+                self.name.encode(), self.order
             )
+            transcript.append(points_query.commitments)
 
-        f_poly_x3 %= self.order
-
-        # construct final_commitment
-        final_commitment = f_commitment
-        for i, commitment in enumerate(q_commitments):
-            final_commitment += pow(x4, i + 1, self.order) * commitment
-
-        # construct final_poly(x3)
-        q_x4 = 0
-        for i, q in enumerate(q_polys_x3):
-            q_x4 += pow(x4, i + 1, self.order) * q
-
-        # final_poly(x3) = f_poly(x3) + x4^1 * q1(x3) + x4^2 * q2(x3) + ...
-        final_poly_x3 = (f_poly_x3 + q_x4) % self.order
+            for _, _, evaluation in points_query.get_openings():
+                transcript.append(evaluation)
 
-        # e(proof, g2 * tau - g2 * x3) == e(final_commitment - g1 * final_poly_eval, g2)
-        return self.verify(final_commitment, opening_proof, x3, final_poly_x3)
+            x1 = transcript.get_challenge_scalar()
+            x2 = transcript.get_challenge_scalar()
+
+            f_commitment = proof[0]
+            opening_proof = proof[-1]
+            q_polys_x3 = proof[1:-1]
+
+            transcript.append(f_commitment)
+            x3 = transcript.get_challenge_scalar()
+            transcript.append(q_polys_x3)
+            x4 = transcript.get_challenge_scalar()
+
+            groups = points_query.get_point_sets()
+            assert len(groups) == len(q_polys_x3), "Invalid proof"
+
+            for points, _ in groups:
+                # vanishing polynomial of the group at x3
+                vanishing = 1
+                for point in points:
+                    vanishing = vanishing * (x3 - point) % self.order
+                denominators.append(vanishing)
+
+                # barycentric weights of the group's evaluation points
+                for k, point_k in enumerate(points):
+                    weight = 1
+                    for l, point_l in enumerate(points):
+                        if k != l:
+                            weight = weight * (point_k - point_l) % self.order
+                    denominators.append(weight)
+
+            pending.append((points_query, groups, proof, (x1, x2, x3, x4)))
+
+        inverses = iter(batch_modinv(denominators, self.order))
+
+        lhs_points, lhs_scalars = [], []
+        rhs_points, rhs_scalars = [], []
+        g1_scalar = 0
+        for j, item in enumerate(pending):
+            points_query, groups, proof, (x1, x2, x3, x4) = item
+            f_commitment, opening_proof, q_polys_x3 = proof[0], proof[-1], proof[1:-1]
+
+            r = 1 if j == 0 else get_random_int(self.order - 1)
+
+            # f(x3) = sum(x2^i * (q_i(x3) - r_i(x3)) / prod(x3 - points_i))
+            f_poly_x3 = 0
+            for i, (points, indices) in enumerate(groups):
+                inv_vanishing = next(inverses)
+
+                # r_i(x3) by Lagrange interpolation at x3
+                r_x3 = 0
+                for k, point_k in enumerate(points):
+                    evaluations = points_query.evaluations[point_k]
+                    evaluation = 0
+                    for m, index in enumerate(indices):
+                        evaluation += pow(x1, m, self.order) * evaluations[index]
+
+                    basis = next(inverses)
+                    for l, point_l in enumerate(points):
+                        if k != l:
+                            basis = basis * (x3 - point_l) % self.order
+
+                    r_x3 += evaluation % self.order * basis
+
+                f_poly_x3 += (
+                    pow(x2, i, self.order)
+                    * (q_polys_x3[i] - r_x3)
+                    % self.order
+                    * inv_vanishing
+                )
+
+                # final commitment gets x4^(i+1) * sum(x1^m * commitment_m)
+                x4_i = pow(x4, i + 1, self.order)
+                for m, index in enumerate(indices):
+                    rhs_points.append(points_query.commitments[index])
+                    rhs_scalars.append(r * x4_i * pow(x1, m, self.order) % self.order)
+
+            # final_poly(x3) = f_poly(x3) + x4^1 * q1(x3) + x4^2 * q2(x3) + ...
+            final_poly_x3 = f_poly_x3
+            for i, q in enumerate(q_polys_x3):
+                final_poly_x3 += pow(x4, i + 1, self.order) * q
+
+            rhs_points += [f_commitment, opening_proof]
+            rhs_scalars += [r, r * x3 % self.order]
+            g1_scalar += r * final_poly_x3
+
+            lhs_points.append(opening_proof)
+            lhs_scalars.append(r)
+
+        rhs_points.append(self.E.G1())
+        rhs_scalars.append(-g1_scalar % self.order)
+
+        lhs = self.E.multiexp(lhs_points, lhs_scalars)
+        rhs = self.E.multiexp(rhs_points, rhs_scalars)
+
+        # e(sum(r * W), g2 * tau) * e(-sum(r * (F - g1 * y + W * x3)), g2) == 1
+        return self.E.pairing_check([lhs, -rhs], [self.G2_tau, self.E.G2()])
@@ -85,6 +85,13 @@ class EllipticCurve:
         assert len(a) == len(b), "Length of a and b must be equal"
         return self.curve.multi_pairing(a, b)
 
+    def pairing_check(self, a: list, b: list):
+        """
+        Check that the product of e(a[i], b[i]) is the identity of GT,
+        sharing a single final exponentiation across all pairs
+        """
+        return self.multi_pairing(a, b).is_identity()
+
     def batch_mul(self, g, s):
         """
         Perform EC multiplication in parallel batch
@@ -125,6 +132,36 @@ class EllipticCurve:
         else:
             raise TypeError(f"Invalid curve type: {type(g[0])}")
 
+    def ipa_fold(self, g: list, a: list, b: list, u, challenge):
+        """
+        Run the folding rounds of an inner product argument natively.
+
+        Each round halves `g`, `a` and `b`, computes the cross terms
+        `L = <g_lo, a_hi> + <a_hi, b_lo> * u` and `R = <g_hi, a_lo> + <a_lo, b_hi> * u`,
+        gets the round challenge `x = challenge(L, R)` and folds
+        `a_lo + x^-1 * a_hi`, `b_lo + x * b_hi` and `g_lo + x * g_hi`.
+
+        Return the lists of `L` and `R` and the final folded `a`.
+        """
+        assert len(g) > 0 and isinstance(g[0], self.curve.PointG1)
+        return self.curve.ipa_fold_g1(g, a, b, u, challenge)
+
+    def bulletproofs_fold(self, G: list, H: list, a: list, b: list, Q, challenge):
+        """
+        Run the folding rounds of a Bulletproofs inner product argument natively.
+
+        Each round halves `G`, `H`, `a` and `b`, computes the cross terms
+        `L = <G_hi, a_lo> + <H_lo, b_hi> + <a_lo, b_hi> * Q` and
+        `R = <G_lo, a_hi> + <H_hi, b_lo> + <a_hi, b_lo> * Q`,
+        gets the round challenge `u = challenge(L, R)` and folds
+        `a = u * a_lo + u^-1 * a_hi`, `b = u^-1 * b_lo + u * b_hi`,
+        `G = u^-1 * G_lo + u * G_hi` and `H = u * H_lo + u^-1 * H_hi`.
+
+        Return the lists of `L` and `R` and the final folded `a` and `b`.
+        """
+        assert len(G) > 0 and isinstance(G[0], self.curve.PointG1)
+        return self.curve.bulletproofs_fold_g1(G, H, a, b, Q, challenge)
+
     def from_hex(self, hexstring: str):
         """
         Construct Elliptic curve point from serialized hexstring
@@ -0,0 +1,164 @@
+"""
+Process-wide cache of nothing-up-my-sleeve generator sets.
+
+Point `i` of the set `(curve, seed, label)` is hashed to curve from
+`seed || i` (with `i` as an 8-byte little-endian integer) under the domain
+separation tag `label`. Every point is derived independently of the others,
+so a set of `n` points is a prefix of every larger set with the same key
+and missing points are hashed in parallel natively.
+
+If a cache directory is configured, either with `GeneratorCache(directory)` or
+through the `ZKSNAKE_GENERATOR_CACHE` environment variable for the default
+cache, generated sets are also persisted there and reloaded by later processes.
+Persisted files carry the derivation version and an unkeyed digest of their points.
+On load, the digest is checked and a sample of points is derived again.
+A file that fails either check is ignored and overwritten.
+
+These checks only catch accidental mismatches (corruption, truncation, a set
+written by another derivation), not a forged file: anyone able to write
+to the cache directory can recompute the digest and replace points outside
+the sample, e.g. with a generator of known discrete logarithm, which breaks
+the binding of the commitments built on it. The cache directory must be
+trusted as much as the code itself.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+
+from .ecc import EllipticCurve, CurvePointSize
+from .utils import get_random_int
+
+# bump whenever the derivation of the points changes,
+# so that sets persisted by an older derivation are never reused
+DERIVATION_VERSION = 1
+
+# points re-derived when loading a persisted set, besides its last one
+SAMPLE_SIZE = 2
+
+_VERSION_SIZE = 4
+_DIGEST_SIZE = 32
+
+
+class GeneratorCache:
+
+    def __init__(self, directory: str = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._sets = {}
+
+    @staticmethod
+    def _key_bytes(key):
+        curve, seed, label = key
+        return b"|".join(
+            [
+                str(DERIVATION_VERSION).encode(),
+                curve.encode(),
+                seed.hex().encode(),
+                label.hex().encode(),
+            ]
+        )
+
+    def _path(self, key):
+        digest = hashlib.blake2b(self._key_bytes(key), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{key[0].lower()}-{digest}.bin")
+
+    def _digest(self, key, body: bytes):
+        return hashlib.blake2b(
+            self._key_bytes(key) + body, digest_size=_DIGEST_SIZE
+        ).digest()
+
+    def _load(self, key, E: EllipticCurve):
+        """
+        Load the persisted set of `key`, or return `[]` if it is missing,
+        from another derivation version, or fails its integrity checks
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return []
+
+        header = _VERSION_SIZE + _DIGEST_SIZE
+        version = int.from_bytes(data[:_VERSION_SIZE], "little")
+        body = data[header:]
+        size = CurvePointSize[key[0]].value
+        if (
+            len(data) < header
+            or version != DERIVATION_VERSION
+            or len(body) % size != 0
+            or data[_VERSION_SIZE:header] != self._digest(key, body)
+        ):
+            return []
+
+        try:
+            points = [
+                E.curve.PointG1.from_bytes(body[i : i + size])
+                for i in range(0, len(body), size)
+            ]
+        except ValueError:
+            return []
+
+        # derive a random sample and the last point again
+        # to catch an accidental mismatch with the derivation
+        if points:
+            sample = {len(points) - 1}
+            sample |= {get_random_int(len(points)) - 1 for _ in range(SAMPLE_SIZE)}
+            for i in sample:
+                derived = E.curve.PointG1.hash_to_curve_indexed(key[2], key[1], i, 1)
+                if derived[0] != points[i]:
+                    return []
+
+        return points
+
+    def _store(self, key, points):
+        body = b"".join(bytes(point.to_bytes()) for point in points)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(DERIVATION_VERSION.to_bytes(_VERSION_SIZE, "little"))
+            f.write(self._digest(key, body))
+            f.write(body)
+        os.replace(tmp, self._path(key))
+
+    def get(self, seed: bytes, label: bytes, curve: str = "BN254", size: int = 1):
+        """
+        Return the first `size` points of the generator set `(curve, seed, label)`,
+        generating (and persisting) only the points not cached yet
+        """
+        E = EllipticCurve(curve)
+        key = (E.name, bytes(seed), bytes(label))
+
+        with self._lock:
+            points = self._sets.get(key, [])
+            if len(points) < size:
+                if not points and self.directory:
+                    points = self._load(key, E)
+
+                if len(points) < size:
+                    points = points + E.curve.PointG1.hash_to_curve_indexed(
+                        key[2], key[1], len(points), size - len(points)
+                    )
+                    if self.directory:
+                        self._store(key, points)
+
+                self._sets[key] = points
+
+        return points[:size]
+
+    def clear(self):
+        """Drop every in-memory set, keeping the persisted ones"""
+        with self._lock:
+            self._sets.clear()
+
+
+GENERATOR_CACHE = GeneratorCache(os.environ.get("ZKSNAKE_GENERATOR_CACHE"))
+
+
+def generators(seed: bytes, label: bytes, curve: str = "BN254", size: int = 1):
+    """
+    Return `size` independent generators of the set `(curve, seed, label)`
+    from the process-wide cache
+    """
+    return GENERATOR_CACHE.get(seed, label, curve, size)
@@ -1,27 +1,40 @@
 from ..arithmetization.plonkish import Plonkish
 from ..ecc import EllipticCurve
 from ..transcript import FiatShamirTranscript
-from ..utils import batch_modinv, get_random_int
+from ..utils import batch_modinv, get_random_int, next_power_of_two
 from ..polynomial import (
     Polynomial,
     add_over_evaluation_domain,
     barycentric_eval,
+    barycentric_eval_batch,
     evaluate_vanishing_polynomial,
     fft,
-    get_evaluation_point,
     ifft,
     mul_over_evaluation_domain,
     mul_over_fft,
     get_all_evaluation_points,
 )
-from .serialization import ProvingKey, VerifyingKey, Proof
+from .serialization import (
+    LookupProof,
+    ProvingKey,
+    VerifyingKey,
+    Proof,
+    quotient_pieces,
+)
+
+# k_i such that the identity permutation of the i-th wire is k_i * omega^j,
+# each k_i lies in a distinct coset of the evaluation domain
+COSET_SHIFTS = [1, 2, 3, 4]
 
 
 class Plonk:
     """
     PlonK proof system (https://eprint.iacr.org/2019/953.pdf).
 
-    The implementation follows the original version of the paper (vanilla PlonK).
+    The implementation follows the original version of the paper (vanilla PlonK),
+    extended with the custom gates and the fourth wire enabled in the `Plonkish` constraints,
+    and with a logUp (https://eprint.iacr.org/2022/1530.pdf) lookup argument
+    when the constraint system declares lookup tables.
     """
 
     def __init__(self, constraints: Plonkish, curve: str = "BN254"):
@@ -42,98 +55,65 @@ class Plonk:
         Optionally, `g1_tau` and `g2_tau` can be provided to reuse the trusted setup
         from other sources
         """
+        n = self.constraints.length
+        num_wires = self.constraints.num_wires
+        selectors = self.constraints.selectors
+        num_quotient = quotient_pieces(num_wires, selectors)
+        extended = n * next_power_of_two(num_quotient + 1)
+
+        # the last piece of T(X) and the blinded wires hold a few extra coefficients
+        srs_size = n + num_wires + 3
 
         if not g1_tau:
             tau = get_random_int(self.order - 1)
-            power_of_tau = [
-                pow(tau, i, self.order) for i in range(self.constraints.length + 6)
-            ]
+            power_of_tau = [pow(tau, i, self.order) for i in range(srs_size)]
             self.G1_tau = self.E.batch_mul(self.E.G1(), power_of_tau)
             self.G2_tau = self.E.G2() * tau
         else:
             assert (
-                len(self.G1_tau) < self.constraints.length + 6
+                len(g1_tau) >= srs_size
             ), "Constraints are too big for the given g1_tau"
             self.G1_tau = g1_tau
             self.G2_tau = g2_tau
 
-        roots = get_all_evaluation_points(self.constraints.length, self.order)
-
-        n = self.constraints.length
-        k1 = 2
-        k2 = 3
+        roots = get_all_evaluation_points(n, self.order)
 
-        id1 = roots
-        id2 = [k1 * root % self.order for root in roots]
-        id3 = [k2 * root % self.order for root in roots]
-        ids = list(id1 + id2 + id3)
+        ids = [
+            [k * root % self.order for root in roots] for k in COSET_SHIFTS[:num_wires]
+        ]
+        flatten_ids = [i for wire_ids in ids for i in wire_ids]
         permutation = self.constraints.permutation
 
-        sigma1 = [ids[permutation[i]] for i in range(n)]
-        sigma2 = [ids[permutation[i + n]] for i in range(n)]
-        sigma3 = [ids[permutation[i + 2 * n]] for i in range(n)]
+        sigmas = [
+            [flatten_ids[permutation[i + j * n]] for i in range(n)]
+            for j in range(num_wires)
+        ]
 
         # selector polynomials
-        QL = Polynomial(ifft(self.constraints.qL, self.order), self.order)
-        QR = Polynomial(ifft(self.constraints.qR, self.order), self.order)
-        QO = Polynomial(ifft(self.constraints.qO, self.order), self.order)
-        QM = Polynomial(ifft(self.constraints.qM, self.order), self.order)
-        QC = Polynomial(ifft(self.constraints.qC, self.order), self.order)
+        selector_poly = {}
+        selector_evaluations = {}
+        tau_selector = {}
+        for name in selectors:
+            Q = Polynomial(
+                ifft(self.constraints.selector(name), self.order), self.order
+            )
+            selector_poly[name] = Q
+            selector_evaluations[name] = fft(Q.coeffs(), self.order, extended)
+            tau_selector[name] = self.E.multiexp(self.G1_tau, Q.coeffs())
 
         # permutation polynomials
-        S1 = Polynomial(ifft(sigma1, self.order), self.order)
-        S2 = Polynomial(ifft(sigma2, self.order), self.order)
-        S3 = Polynomial(ifft(sigma3, self.order), self.order)
-
-        selector_evaluations = {
-            "L": fft(QL.coeffs(), self.order, n * 4),
-            "R": fft(QR.coeffs(), self.order, n * 4),
-            "O": fft(QO.coeffs(), self.order, n * 4),
-            "M": fft(QM.coeffs(), self.order, n * 4),
-            "C": fft(QC.coeffs(), self.order, n * 4),
-        }
-
-        selector_poly = {
-            "L": QL,
-            "R": QR,
-            "O": QO,
-            "M": QM,
-            "C": QC,
-        }
-
         sigma_permutation_poly = [
-            S1,
-            S2,
-            S3,
+            Polynomial(ifft(sigma, self.order), self.order) for sigma in sigmas
+        ]
+        identity_permutation_poly = [
+            Polynomial(ifft(wire_ids, self.order), self.order) for wire_ids in ids
+        ]
+        tau_permutation = [
+            self.E.multiexp(self.G1_tau, S.coeffs()) for S in sigma_permutation_poly
         ]
-
-        id1_poly = Polynomial(ifft(id1, self.order), self.order)
-        id2_poly = Polynomial(ifft(id2, self.order), self.order)
-        id3_poly = Polynomial(ifft(id3, self.order), self.order)
-
-        identity_permutation_poly = [id1_poly, id2_poly, id3_poly]
-
-        tau_QL = self.E.multiexp(self.G1_tau, QL.coeffs())
-        tau_QR = self.E.multiexp(self.G1_tau, QR.coeffs())
-        tau_QO = self.E.multiexp(self.G1_tau, QO.coeffs())
-        tau_QM = self.E.multiexp(self.G1_tau, QM.coeffs())
-        tau_QC = self.E.multiexp(self.G1_tau, QC.coeffs())
-        tau_sigma1 = self.E.multiexp(self.G1_tau, S1.coeffs())
-        tau_sigma2 = self.E.multiexp(self.G1_tau, S2.coeffs())
-        tau_sigma3 = self.E.multiexp(self.G1_tau, S3.coeffs())
-
-        tau_selector = {
-            "L": tau_QL,
-            "R": tau_QR,
-            "O": tau_QO,
-            "M": tau_QM,
-            "C": tau_QC,
-        }
-
-        tau_permutation = [tau_sigma1, tau_sigma2, tau_sigma3]
 
         L1 = Polynomial(ifft([1] + [0] * (n - 1), self.order), self.order)
-        lagrange_evals = fft(L1.coeffs(), self.order, n * 4)
+        lagrange_evals = fft(L1.coeffs(), self.order, extended)
 
         pk = ProvingKey(
             n,
@@ -148,12 +128,44 @@ class Plonk:
             self.E.name,
         )
 
-        vk = VerifyingKey(n, self.G2_tau, tau_selector, tau_permutation, self.E.name)
+        vk = VerifyingKey(
+            n,
+            self.G2_tau,
+            tau_selector,
+            tau_permutation,
+            self.E.name,
+            self.constraints.public_indices,
+        )
 
         self.proving_key = pk
         self.verifying_key = vk
         self._roots = roots
 
+    def _product_over_evaluation_domain(self, domain, evals: list):
+        result = evals[0]
+        for e in evals[1:]:
+            result = mul_over_evaluation_domain(domain, result, e, self.order)
+
+        return result
+
+    def _lookup_multiplicities(self, a, qK, table_values, table_ids):
+        """
+        Count how many times every table entry is looked up,
+        weighted by the table id (the numerator of the lookup rows)
+        """
+        index = {}
+        for j, entry in enumerate(zip(table_values, table_ids)):
+            index.setdefault(entry, j)
+
+        multiplicities = [0] * len(table_values)
+        for i, table_id in enumerate(qK):
+            if table_id:
+                j = index.get((a[i] % self.order, table_id))
+                assert j is not None, "Lookup constraints are not satisfied"
+                multiplicities[j] += table_id
+
+        return multiplicities
+
     def prove(self, public_witness: dict, private_witness: list):
         """
         Prove statement from Plonkish constraints
@@ -161,13 +173,18 @@ class Plonk:
         """
         assert self.proving_key, "ProvingKey has not been generated"
         n = self.proving_key.n
+        num_wires = self.proving_key.num_wires
+        num_quotient = self.proving_key.num_quotient
+        extended = n * next_power_of_two(num_quotient + 1)
+        stride = extended // n
 
         if not self._roots:
             self._roots = get_all_evaluation_points(n, self.order)
 
-        a = private_witness[::3] + [0] * (n - len(private_witness[::3]))
-        b = private_witness[1::3] + [0] * (n - len(private_witness[1::3]))
-        c = private_witness[2::3] + [0] * (n - len(private_witness[2::3]))
+        wires = []
+        for i in range(num_wires):
+            wire = private_witness[i::num_wires]
+            wires.append(wire + [0] * (n - len(wire)))
 
         full_public_witness = [0] * (n)
         for k, v in public_witness.items():
@@ -180,27 +197,15 @@ class Plonk:
 
         selector_poly = self.proving_key.selector_poly
         selector_eval = self.proving_key.selector_eval
+        lookup = self.proving_key.has_lookup
 
-        id1, id2, id3 = self.proving_key.identity_poly
-        sigma1, sigma2, sigma3 = self.proving_key.permutation_poly
-
-        tau_QL = self.proving_key.tau_selector_poly["L"]
-        tau_QR = self.proving_key.tau_selector_poly["R"]
-        tau_QO = self.proving_key.tau_selector_poly["O"]
-        tau_QM = self.proving_key.tau_selector_poly["M"]
-        tau_QC = self.proving_key.tau_selector_poly["C"]
-        tau_sigma1 = self.proving_key.tau_permutation_poly[0]
-        tau_sigma2 = self.proving_key.tau_permutation_poly[1]
-        tau_sigma3 = self.proving_key.tau_permutation_poly[2]
-
-        transcript.append(tau_QL)
-        transcript.append(tau_QR)
-        transcript.append(tau_QO)
-        transcript.append(tau_QM)
-        transcript.append(tau_QC)
-        transcript.append(tau_sigma1)
-        transcript.append(tau_sigma2)
-        transcript.append(tau_sigma3)
+        identity_poly = self.proving_key.identity_poly
+        sigma_poly = self.proving_key.permutation_poly
+
+        for _, tau_selector in self.proving_key.tau_selector_poly.items():
+            transcript.append(tau_selector)
+        for tau_sigma in self.proving_key.tau_permutation_poly:
+            transcript.append(tau_sigma)
 
         for _, v in public_witness.items():
             transcript.append(v)
@@ -208,63 +213,88 @@ class Plonk:
         #########################################################################################
         # ROUND 1
         #
-        # Compute wire polynomials A(x), B(x), C(x) with randomness (b1, b2, b3, b4, b5, b6)
+        # Compute wire polynomials A(x), B(x), C(x) (and D(x)) with two blinding scalars each
         # Additionally, compute G = (A * QL) + (B * QR) + (A * B * QM) + (C * QO) + QC + PI
-        # to be used later in round 3
+        # (+ D * QD) (+ A^5 * QP) to be used later in round 3
         #########################################################################################
 
-        # compute wire polynomials A(x), B(x), C(x), and public input PI(x)
-        A = Polynomial(ifft(a, self.order), self.order)
-        B = Polynomial(ifft(b, self.order), self.order)
-        C = Polynomial(ifft(c, self.order), self.order)
+        # compute wire polynomials and public input PI(x)
         PI = Polynomial(ifft(full_public_witness, self.order), self.order)
 
+        # wire polynomials with blinding factors
         zero_pad = [0] * (n - 2)
-        blinding_a = Polynomial(
-            [get_random_int(self.order - 1) for _ in range(2)] + zero_pad,
-            self.order,
+        wire_poly = []
+        for wire in wires:
+            blinding = Polynomial(
+                [get_random_int(self.order - 1) for _ in range(2)] + zero_pad,
+                self.order,
+            )
+            wire_poly.append(
+                Polynomial(ifft(wire, self.order), self.order)
+                + blinding.multiply_by_vanishing_poly()
+            )
+
+        # evaluation form of wire polynomials
+        wire_eval = [fft(W.coeffs(), self.order, extended) for W in wire_poly]
+        pi_eval = fft(PI.coeffs(), self.order, extended)
+
+        a_eval, b_eval, c_eval = wire_eval[:3]
+        a_ql = mul_over_evaluation_domain(
+            extended, a_eval, selector_eval["L"], self.order
         )
-        blinding_b = Polynomial(
-            [get_random_int(self.order - 1) for _ in range(2)] + zero_pad,
-            self.order,
+        b_qr = mul_over_evaluation_domain(
+            extended, b_eval, selector_eval["R"], self.order
         )
-        blinding_c = Polynomial(
-            [get_random_int(self.order - 1) for _ in range(2)] + zero_pad,
-            self.order,
+        c_qo = mul_over_evaluation_domain(
+            extended, c_eval, selector_eval["O"], self.order
+        )
+        ab_qm = self._product_over_evaluation_domain(
+            extended, [a_eval, b_eval, selector_eval["M"]]
         )
+        gate_eval = [a_ql, b_qr, c_qo, ab_qm, selector_eval["C"], pi_eval]
 
-        # wire polynomials with blinding factors
-        A = A + blinding_a.multiply_by_vanishing_poly()
-        B = B + blinding_b.multiply_by_vanishing_poly()
-        C = C + blinding_c.multiply_by_vanishing_poly()
+        if "D" in selector_eval:
+            gate_eval.append(
+                mul_over_evaluation_domain(
+                    extended, wire_eval[3], selector_eval["D"], self.order
+                )
+            )
 
-        # evaluation form of wire polynomials
-        a_eval = fft(A.coeffs(), self.order, n * 4)
-        b_eval = fft(B.coeffs(), self.order, n * 4)
-        c_eval = fft(C.coeffs(), self.order, n * 4)
-        pi_eval = fft(PI.coeffs(), self.order, n * 4)
-
-        a_ql = mul_over_evaluation_domain(n * 4, a_eval, selector_eval["L"], self.order)
-        b_qr = mul_over_evaluation_domain(n * 4, b_eval, selector_eval["R"], self.order)
-        c_qo = mul_over_evaluation_domain(n * 4, c_eval, selector_eval["O"], self.order)
-        ab = mul_over_evaluation_domain(n * 4, a_eval, b_eval, self.order)
-        ab_qm = mul_over_evaluation_domain(n * 4, ab, selector_eval["M"], self.order)
-
-        # G = (A * QL) + (B * QR) + (A * B * QM) + (C * QO) + QC + PI
-        g_eval = add_over_evaluation_domain(
-            n * 4,
-            [a_ql, b_qr, c_qo, ab_qm, selector_eval["C"], pi_eval],
-            self.order,
-        )
+        if "P" in selector_eval:
+            gate_eval.append(
+                self._product_over_evaluation_domain(
+                    extended, [a_eval] * 5 + [selector_eval["P"]]
+                )
+            )
+
+        g_eval = add_over_evaluation_domain(extended, gate_eval, self.order)
         G = Polynomial(ifft(g_eval, self.order), self.order, n)
 
-        tau_a = self.E.multiexp(self.proving_key.tau_g1, A.coeffs())
-        tau_b = self.E.multiexp(self.proving_key.tau_g1, B.coeffs())
-        tau_c = self.E.multiexp(self.proving_key.tau_g1, C.coeffs())
+        tau_wires = [
+            self.E.multiexp(self.proving_key.tau_g1, W.coeffs()) for W in wire_poly
+        ]
+
+        for tau_wire in tau_wires:
+            transcript.append(tau_wire)
 
-        transcript.append(tau_a)
-        transcript.append(tau_b)
-        transcript.append(tau_c)
+        # multiplicities of the table entries M(X), blinded like the wires
+        if lookup:
+            qK, table_values, table_ids = [
+                selector_eval[name][::stride] for name in ("K", "V", "I")
+            ]
+            multiplicities = self._lookup_multiplicities(
+                wires[0], qK, table_values, table_ids
+            )
+            blinding = Polynomial(
+                [get_random_int(self.order - 1) for _ in range(2)] + zero_pad,
+                self.order,
+            )
+            M = (
+                Polynomial(ifft(multiplicities, self.order), self.order)
+                + blinding.multiply_by_vanishing_poly()
+            )
+            tau_m = self.E.multiexp(self.proving_key.tau_g1, M.coeffs())
+            transcript.append(tau_m)
 
         #########################################################################################
         # ROUND 2
@@ -281,33 +311,36 @@ class Plonk:
             self.order,
         )
 
-        a_id = fft((A + id1 * beta + gamma).coeffs(), self.order, n * 4)
-        b_id = fft((B + id2 * beta + gamma).coeffs(), self.order, n * 4)
-        c_id = fft((C + id3 * beta + gamma).coeffs(), self.order, n * 4)
-
-        ab_id = mul_over_evaluation_domain(n * 4, a_id, b_id, self.order)
-        eval_nom_poly = mul_over_evaluation_domain(n * 4, ab_id, c_id, self.order)
+        eval_nom_poly = self._product_over_evaluation_domain(
+            extended,
+            [
+                fft((W + ID * beta + gamma).coeffs(), self.order, extended)
+                for W, ID in zip(wire_poly, identity_poly)
+            ],
+        )
         nom_poly = Polynomial(ifft(eval_nom_poly, self.order), self.order)
 
-        a_sigma = fft((A + sigma1 * beta + gamma).coeffs(), self.order, n * 4)
-        b_sigma = fft((B + sigma2 * beta + gamma).coeffs(), self.order, n * 4)
-        c_sigma = fft((C + sigma3 * beta + gamma).coeffs(), self.order, n * 4)
-
-        ab_sigma = mul_over_evaluation_domain(n * 4, a_sigma, b_sigma, self.order)
-        eval_denom_poly = mul_over_evaluation_domain(
-            n * 4, ab_sigma, c_sigma, self.order
+        eval_denom_poly = self._product_over_evaluation_domain(
+            extended,
+            [
+                fft((W + S * beta + gamma).coeffs(), self.order, extended)
+                for W, S in zip(wire_poly, sigma_poly)
+            ],
         )
         denom_poly = Polynomial(ifft(eval_denom_poly, self.order), self.order)
 
         nom_inv_denom = batch_modinv(
-            [eval_denom_poly[i] for i in range(0, len(eval_denom_poly), 4)],
+            [eval_denom_poly[i] for i in range(0, len(eval_denom_poly), stride)],
             self.order,
         )
 
         accumulator = [1]
         for i in range(n):
             accumulator += [
-                accumulator[-1] * eval_nom_poly[i * 4] * nom_inv_denom[i] % self.order
+                accumulator[-1]
+                * eval_nom_poly[i * stride]
+                * nom_inv_denom[i]
+                % self.order
             ]
 
         assert accumulator.pop() == 1, "Copy constraints are not satisfied"
@@ -317,12 +350,53 @@ class Plonk:
         Z = blinding_permutation.multiply_by_vanishing_poly() + acc_poly
         tau_z = self.E.multiexp(self.proving_key.tau_g1, Z.coeffs())
 
+        # logUp running sum Phi(X) with challenges (eta, lam):
+        # Phi(wX) - Phi(X) = K(X) / (lam + f(X)) - M(X) / (lam + t(X)),
+        # where f = A + eta * K and t = V + eta * I
+        if lookup:
+            eta = transcript.get_challenge_scalar()
+            lam = transcript.get_challenge_scalar()
+
+            inverses = batch_modinv(
+                [(lam + wires[0][i] + eta * qK[i]) % self.order for i in range(n)]
+                + [
+                    (lam + table_values[i] + eta * table_ids[i]) % self.order
+                    for i in range(n)
+                ],
+                self.order,
+            )
+
+            running_sum = [0]
+            for i in range(n):
+                running_sum += [
+                    (
+                        running_sum[-1]
+                        + qK[i] * inverses[i]
+                        - multiplicities[i] * inverses[n + i]
+                    )
+                    % self.order
+                ]
+
+            assert running_sum.pop() == 0, "Lookup constraints are not satisfied"
+
+            blinding = Polynomial(
+                [get_random_int(self.order - 1) for _ in range(3)] + [0] * (n - 3),
+                self.order,
+            )
+            Phi = blinding.multiply_by_vanishing_poly() + Polynomial(
+                ifft(running_sum, self.order), self.order
+            )
+            tau_phi = self.E.multiexp(self.proving_key.tau_g1, Phi.coeffs())
+
         transcript.append(tau_z)
+        if lookup:
+            transcript.append(tau_phi)
 
         #########################################################################################
         # ROUND 3
         #
-        # Compute quotient polynomial T(X) with randomness (b10, b11) and challenge alpha
+        # Compute quotient polynomial T(X) split into `num_quotient` pieces
+        # with randomness (b10, b11, ...) and challenge alpha
         #########################################################################################
 
         alpha = transcript.get_challenge_scalar()
@@ -338,98 +412,171 @@ class Plonk:
         nom_poly_Z = mul_over_fft(n, nom_poly, Z, self.order)
         denom_poly_Z_omega = mul_over_fft(n, denom_poly, Z_omega, self.order)
 
-        z_1_eval = fft((Z - 1).coeffs(), self.order, n * 4)
+        z_1_eval = fft((Z - 1).coeffs(), self.order, extended)
         z_1_l1_eval = mul_over_evaluation_domain(
-            n * 4, z_1_eval, self.proving_key.lagrange_evals, self.order
+            extended, z_1_eval, self.proving_key.lagrange_evals, self.order
         )
         Z_1_L1 = Polynomial(ifft(z_1_l1_eval, self.order), self.order)
 
-        T, remainder = (
+        numerator = (
             G
             + (nom_poly_Z - denom_poly_Z_omega) * alpha
             + Z_1_L1 * pow(alpha, 2, self.order)
-        ).divide_by_vanishing_poly()
+        )
+
+        # (Phi(wX) - Phi(X)) * (lam + f) * (lam + t) - K * (lam + t) + M * (lam + f)
+        if lookup:
+            T_table = selector_poly["V"] + selector_poly["I"] * eta
+            Phi_omega = Polynomial(
+                [
+                    coeff * self._roots[i % n] % self.order
+                    for i, coeff in enumerate(Phi.coeffs())
+                ],
+                self.order,
+            )
+            lam_f_eval = fft(
+                (wire_poly[0] + selector_poly["K"] * eta + lam).coeffs(),
+                self.order,
+                extended,
+            )
+            lam_t_eval = fft((T_table + lam).coeffs(), self.order, extended)
+            k_lam_t_eval = mul_over_evaluation_domain(
+                extended, selector_eval["K"], lam_t_eval, self.order
+            )
+            lookup_eval = add_over_evaluation_domain(
+                extended,
+                [
+                    self._product_over_evaluation_domain(
+                        extended,
+                        [
+                            fft((Phi_omega - Phi).coeffs(), self.order, extended),
+                            lam_f_eval,
+                            lam_t_eval,
+                        ],
+                    ),
+                    mul_over_evaluation_domain(
+                        extended,
+                        fft(M.coeffs(), self.order, extended),
+                        lam_f_eval,
+                        self.order,
+                    ),
+                    [(self.order - e) % self.order for e in k_lam_t_eval],
+                ],
+                self.order,
+            )
+            numerator = numerator + Polynomial(
+                ifft(lookup_eval, self.order), self.order
+            ) * pow(alpha, 3, self.order)
+
+        T, remainder = numerator.divide_by_vanishing_poly()
 
         assert remainder.is_zero()
 
         t_coeff = T.coeffs()
-        T_lo = Polynomial(t_coeff[:n], self.order)
-        T_mid = Polynomial(t_coeff[n : 2 * n], self.order)
-        T_hi = Polynomial(t_coeff[2 * n :], self.order)
+        T_pieces = [
+            Polynomial(t_coeff[i * n : (i + 1) * n], self.order)
+            for i in range(num_quotient - 1)
+        ]
+        T_pieces.append(Polynomial(t_coeff[(num_quotient - 1) * n :], self.order))
 
         X_n = Polynomial([0] * (n) + [1], self.order)
 
-        blindings = [get_random_int(self.order - 1) for _ in range(2)]
+        for i in range(num_quotient - 1):
+            blinding = get_random_int(self.order - 1)
+            T_pieces[i] = T_pieces[i] + X_n * blinding
+            T_pieces[i + 1] = T_pieces[i + 1] - blinding
 
-        T_lo = T_lo + X_n * blindings[0]
-        T_mid = T_mid - blindings[0] + X_n * blindings[1]
-        T_hi = T_hi - blindings[1]
-
-        tau_T_lo = self.E.multiexp(self.proving_key.tau_g1, T_lo.coeffs())
-        tau_T_mid = self.E.multiexp(self.proving_key.tau_g1, T_mid.coeffs())
-        tau_T_hi = self.E.multiexp(self.proving_key.tau_g1, T_hi.coeffs())
+        tau_T = [
+            self.E.multiexp(self.proving_key.tau_g1, piece.coeffs())
+            for piece in T_pieces
+        ]
 
-        transcript.append(tau_T_lo)
-        transcript.append(tau_T_mid)
-        transcript.append(tau_T_hi)
+        for tau_t in tau_T:
+            transcript.append(tau_t)
 
         #########################################################################################
         # ROUND 4
         #
-        # Compute opening evaluation A(x), B(x), C(x), sigma1(x), sigma2(x), Z_omega(x)
+        # Compute opening evaluation of the wires, sigma_i(x) (except the last one), Z_omega(x)
         # and linearization polynomial R(x) at zeta
         #########################################################################################
 
         zeta = transcript.get_challenge_scalar()
 
-        zeta_A = A(zeta)
-        zeta_B = B(zeta)
-        zeta_C = C(zeta)
-        zeta_sigma1 = sigma1(zeta)
-        zeta_sigma2 = sigma2(zeta)
+        zeta_wires = [W(zeta) for W in wire_poly]
+        zeta_sigmas = [S(zeta) for S in sigma_poly[:-1]]
         zeta_Z_omega = Z_omega(zeta)
 
+        zeta_A, zeta_B, zeta_C = zeta_wires[:3]
+
         L1_zeta = barycentric_eval(n, {0: 1}, zeta, self.order)
 
-        k1 = 2
-        k2 = 3
-        R = (
-            (
-                selector_poly["L"] * zeta_A
-                + selector_poly["R"] * zeta_B
-                + selector_poly["O"] * zeta_C
-                + selector_poly["M"] * zeta_A * zeta_B
-                + selector_poly["C"]
-                + PI(zeta)
+        gate = (
+            selector_poly["L"] * zeta_A
+            + selector_poly["R"] * zeta_B
+            + selector_poly["O"] * zeta_C
+            + selector_poly["M"] * zeta_A * zeta_B
+            + selector_poly["C"]
+            + PI(zeta)
+        )
+        if "D" in selector_poly:
+            gate = gate + selector_poly["D"] * zeta_wires[3]
+        if "P" in selector_poly:
+            gate = gate + selector_poly["P"] * pow(zeta_A, 5, self.order)
+
+        id_product = 1
+        for zeta_wire, k in zip(zeta_wires, COSET_SHIFTS):
+            id_product = id_product * (zeta_wire + beta * k * zeta + gamma) % self.order
+
+        sigma_product = zeta_Z_omega
+        for zeta_wire, zeta_sigma in zip(zeta_wires, zeta_sigmas):
+            sigma_product = (
+                sigma_product * (zeta_wire + beta * zeta_sigma + gamma) % self.order
             )
+
+        quotient = T_pieces[0]
+        for i, piece in enumerate(T_pieces[1:], 1):
+            quotient = quotient + piece * pow(zeta, n * i, self.order)
+
+        R = (
+            gate
             + alpha
             * (
-                (zeta_A + beta * zeta + gamma)
-                * (zeta_B + beta * k1 * zeta + gamma)
-                * (zeta_C + beta * k2 * zeta + gamma)
-                * Z
-                - (zeta_A + beta * zeta_sigma1 + gamma)
-                * (zeta_B + beta * zeta_sigma2 + gamma)
-                * (sigma3 * beta + zeta_C + gamma)
-                * zeta_Z_omega
+                Z * id_product
+                - (sigma_poly[-1] * beta + zeta_wires[-1] + gamma) * sigma_product
             )
             + pow(alpha, 2, self.order) * ((Z - 1) * L1_zeta)
-            - (
-                (
-                    T_lo
-                    + pow(zeta, n, self.order) * T_mid
-                    + T_hi * pow(zeta, n * 2, self.order)
-                )
-                * Zh(zeta)
-            )
+            - quotient * Zh(zeta)
         )
 
-        transcript.append(zeta_A)
-        transcript.append(zeta_B)
-        transcript.append(zeta_C)
-        transcript.append(zeta_sigma1)
-        transcript.append(zeta_sigma2)
+        opening_poly = wire_poly + sigma_poly[:-1]
+        opening_eval = zeta_wires + zeta_sigmas
+
+        if lookup:
+            zeta_K = selector_poly["K"](zeta)
+            zeta_T = T_table(zeta)
+            zeta_Phi_omega = Phi_omega(zeta)
+
+            lam_f = (lam + zeta_A + eta * zeta_K) % self.order
+            lam_t = (lam + zeta_T) % self.order
+            R = R + (
+                (Phi - zeta_Phi_omega) * (-lam_f * lam_t % self.order)
+                + M * lam_f
+                - zeta_K * lam_t % self.order
+            ) * pow(alpha, 3, self.order)
+
+            opening_poly += [selector_poly["K"], T_table]
+            opening_eval += [zeta_K, zeta_T]
+
+        for zeta_wire in zeta_wires:
+            transcript.append(zeta_wire)
+        for zeta_sigma in zeta_sigmas:
+            transcript.append(zeta_sigma)
         transcript.append(zeta_Z_omega)
+        if lookup:
+            transcript.append(zeta_K)
+            transcript.append(zeta_T)
+            transcript.append(zeta_Phi_omega)
 
         #########################################################################################
         # ROUND 5
@@ -439,47 +586,49 @@ class Plonk:
 
         v = transcript.get_challenge_scalar()
 
-        W_zeta = (
-            R
-            + (A - zeta_A) * v
-            + (B - zeta_B) * pow(v, 2, self.order)
-            + (C - zeta_C) * pow(v, 3, self.order)
-            + (sigma1 - zeta_sigma1) * pow(v, 4, self.order)
-            + (sigma2 - zeta_sigma2) * pow(v, 5, self.order)
-        )
-        divisor_W_zeta = Polynomial([-zeta % self.order, 1], self.order)
+        W_zeta = R
+        for i, (P, zeta_P) in enumerate(zip(opening_poly, opening_eval), 1):
+            W_zeta = W_zeta + (P - zeta_P) * pow(v, i, self.order)
 
-        W_zeta, remainder = W_zeta / divisor_W_zeta
+        W_zeta, remainder = W_zeta.divide_by_linear(zeta)
 
-        assert remainder.is_zero()
+        assert remainder == 0
 
-        divisor_W_zeta_omega = Polynomial(
-            [-(zeta * self._roots[1]) % self.order, 1], self.order
+        W_zeta_omega = Z - zeta_Z_omega
+        if lookup:
+            W_zeta_omega = W_zeta_omega + (Phi - zeta_Phi_omega) * v
+        W_zeta_omega, remainder = W_zeta_omega.divide_by_linear(
+            zeta * self._roots[1] % self.order
         )
-        W_zeta_omega, remainder = (Z - zeta_Z_omega) / divisor_W_zeta_omega
 
-        assert remainder.is_zero()
+        assert remainder == 0
 
         tau_W_zeta = self.E.multiexp(self.proving_key.tau_g1, W_zeta.coeffs())
         tau_W_zeta_omega = self.E.multiexp(
             self.proving_key.tau_g1, W_zeta_omega.coeffs()
         )
 
+        if lookup:
+            return Proof(
+                tau_wires,
+                tau_z,
+                tau_T,
+                tau_W_zeta,
+                tau_W_zeta_omega,
+                zeta_wires,
+                zeta_sigmas,
+                zeta_Z_omega,
+                LookupProof(tau_m, tau_phi, zeta_K, zeta_T, zeta_Phi_omega),
+            )
+
         return Proof(
-            tau_a,
-            tau_b,
-            tau_c,
+            tau_wires,
             tau_z,
-            tau_T_lo,
-            tau_T_mid,
-            tau_T_hi,
+            tau_T,
             tau_W_zeta,
             tau_W_zeta_omega,
-            zeta_A,
-            zeta_B,
-            zeta_C,
-            zeta_sigma1,
-            zeta_sigma2,
+            zeta_wires,
+            zeta_sigmas,
             zeta_Z_omega,
         )
 
@@ -487,54 +636,51 @@ class Plonk:
 
         transcript = FiatShamirTranscript(field=self.order)
 
-        tau_QL = self.verifying_key.tau_selector_poly["L"]
-        tau_QR = self.verifying_key.tau_selector_poly["R"]
-        tau_QO = self.verifying_key.tau_selector_poly["O"]
-        tau_QM = self.verifying_key.tau_selector_poly["M"]
-        tau_QC = self.verifying_key.tau_selector_poly["C"]
-        tau_sigma1 = self.verifying_key.tau_permutation_poly[0]
-        tau_sigma2 = self.verifying_key.tau_permutation_poly[1]
-        tau_sigma3 = self.verifying_key.tau_permutation_poly[2]
-
-        transcript.append(tau_QL)
-        transcript.append(tau_QR)
-        transcript.append(tau_QO)
-        transcript.append(tau_QM)
-        transcript.append(tau_QC)
-        transcript.append(tau_sigma1)
-        transcript.append(tau_sigma2)
-        transcript.append(tau_sigma3)
+        for _, tau_selector in self.verifying_key.tau_selector_poly.items():
+            transcript.append(tau_selector)
+        for tau_sigma in self.verifying_key.tau_permutation_poly:
+            transcript.append(tau_sigma)
 
         for _, v in public_input.items():
             transcript.append(v)
 
-        transcript.append(proof.tau_a)
-        transcript.append(proof.tau_b)
-        transcript.append(proof.tau_c)
+        for tau_wire in proof.tau_wires:
+            transcript.append(tau_wire)
+        if proof.lookup:
+            transcript.append(proof.lookup.tau_m)
         beta = transcript.get_challenge_scalar()
         gamma = transcript.get_challenge_scalar()
 
+        eta, lam = None, None
+        if proof.lookup:
+            eta = transcript.get_challenge_scalar()
+            lam = transcript.get_challenge_scalar()
+
         transcript.append(proof.tau_z)
+        if proof.lookup:
+            transcript.append(proof.lookup.tau_phi)
         alpha = transcript.get_challenge_scalar()
 
-        transcript.append(proof.tau_t_lo)
-        transcript.append(proof.tau_t_mid)
-        transcript.append(proof.tau_t_hi)
+        for tau_t in proof.tau_t:
+            transcript.append(tau_t)
         zeta = transcript.get_challenge_scalar()
 
-        transcript.append(proof.zeta_a)
-        transcript.append(proof.zeta_b)
-        transcript.append(proof.zeta_c)
-        transcript.append(proof.zeta_sigma1)
-        transcript.append(proof.zeta_sigma2)
+        for zeta_wire in proof.zeta_wires:
+            transcript.append(zeta_wire)
+        for zeta_sigma in proof.zeta_sigmas:
+            transcript.append(zeta_sigma)
         transcript.append(proof.zeta_omega)
+        if proof.lookup:
+            transcript.append(proof.lookup.zeta_k)
+            transcript.append(proof.lookup.zeta_t)
+            transcript.append(proof.lookup.zeta_phi_omega)
         v = transcript.get_challenge_scalar()
 
         transcript.append(proof.tau_W_zeta)
         transcript.append(proof.tau_W_zeta_omega)
         u = transcript.get_challenge_scalar()
 
-        return beta, gamma, alpha, zeta, v, u
+        return beta, gamma, (eta, lam), alpha, zeta, v, u
 
     def verify(self, proof: Proof, public_input: dict):
         """
@@ -543,94 +689,108 @@ class Plonk:
         assert self.verifying_key, "VerifyingKey has not been generated"
 
         n = self.verifying_key.n
+        num_wires = self.verifying_key.num_wires
 
-        tau_QL = self.verifying_key.tau_selector_poly["L"]
-        tau_QR = self.verifying_key.tau_selector_poly["R"]
-        tau_QO = self.verifying_key.tau_selector_poly["O"]
-        tau_QM = self.verifying_key.tau_selector_poly["M"]
-        tau_QC = self.verifying_key.tau_selector_poly["C"]
-        tau_sigma1 = self.verifying_key.tau_permutation_poly[0]
-        tau_sigma2 = self.verifying_key.tau_permutation_poly[1]
-        tau_sigma3 = self.verifying_key.tau_permutation_poly[2]
+        assert (
+            len(proof.tau_wires) == num_wires
+            and len(proof.tau_t) == self.verifying_key.num_quotient
+            and bool(proof.lookup) == self.verifying_key.has_lookup
+        ), "Proof does not match the shape of the VerifyingKey"
 
-        beta, gamma, alpha, zeta, v, u = self.__recompute_challenges(
+        tau_selector = self.verifying_key.tau_selector_poly
+        tau_sigmas = self.verifying_key.tau_permutation_poly
+
+        beta, gamma, (eta, lam), alpha, zeta, v, u = self.__recompute_challenges(
             proof, public_input
         )
 
-        k1 = 2
-        k2 = 3
+        zeta_a, zeta_b, zeta_c = proof.zeta_wires[:3]
 
-        if self._roots:
-            omega = self._roots[1]
-        else:
-            omega = get_evaluation_point(n, 1, self.order)
+        omega = self.verifying_key.omega
 
+        # L1(zeta) and PI(zeta) share a single batch inversion
+        # over the cached omega^i of the public input rows
         Zh_zeta = evaluate_vanishing_polynomial(n, zeta, self.order)
-        L1_zeta = barycentric_eval(n, {0: 1}, zeta, self.order)
-        PI_zeta = barycentric_eval(n, public_input, zeta, self.order)
+        L1_zeta, PI_zeta = barycentric_eval_batch(
+            n,
+            [{0: 1}, public_input],
+            zeta,
+            self.order,
+            self.verifying_key.public_roots(public_input),
+        )
+
+        id_product = 1
+        for zeta_wire, k in zip(proof.zeta_wires, COSET_SHIFTS):
+            id_product = id_product * (zeta_wire + beta * k * zeta + gamma) % self.order
+
+        sigma_product = proof.zeta_omega
+        for zeta_wire, zeta_sigma in zip(proof.zeta_wires, proof.zeta_sigmas):
+            sigma_product = (
+                sigma_product * (zeta_wire + beta * zeta_sigma + gamma) % self.order
+            )
 
         r0 = (
             PI_zeta
             - L1_zeta * pow(alpha, 2, self.order)
-            - (proof.zeta_a + beta * proof.zeta_sigma1 + gamma)
-            * (proof.zeta_b + beta * proof.zeta_sigma2 + gamma)
-            * (proof.zeta_c + gamma)
-            * proof.zeta_omega
-            * alpha
+            - sigma_product * (proof.zeta_wires[-1] + gamma) * alpha
         ) % self.order
 
         tau_D = (
-            (proof.zeta_a * proof.zeta_b * tau_QM)
-            + (proof.zeta_a * tau_QL)
-            + (proof.zeta_b * tau_QR)
-            + (proof.zeta_c * tau_QO)
-            + tau_QC
-            + (
-                (proof.zeta_a + beta * zeta + gamma)
-                * (proof.zeta_b + beta * k1 * zeta + gamma)
-                * (proof.zeta_c + beta * k2 * zeta + gamma)
-                * alpha
-                + L1_zeta * pow(alpha, 2, self.order)
-                + u
-            )
+            (zeta_a * zeta_b * tau_selector["M"])
+            + (zeta_a * tau_selector["L"])
+            + (zeta_b * tau_selector["R"])
+            + (zeta_c * tau_selector["O"])
+            + tau_selector["C"]
+            + (id_product * alpha + L1_zeta * pow(alpha, 2, self.order) + u)
             * proof.tau_z
-            - (
-                (proof.zeta_a + beta * proof.zeta_sigma1 + gamma)
-                * (proof.zeta_b + beta * proof.zeta_sigma2 + gamma)
-                * alpha
-                * beta
-                * proof.zeta_omega
-            )
-            * tau_sigma3
-            - Zh_zeta
-            * (
-                proof.tau_t_lo
-                + pow(zeta, n, self.order) * proof.tau_t_mid
-                + pow(zeta, n * 2, self.order) * proof.tau_t_hi
-            )
+            - (sigma_product * alpha * beta % self.order) * tau_sigmas[-1]
         )
+        if "D" in tau_selector:
+            tau_D = tau_D + proof.zeta_wires[3] * tau_selector["D"]
+        if "P" in tau_selector:
+            tau_D = tau_D + pow(zeta_a, 5, self.order) * tau_selector["P"]
+
+        tau_T = proof.tau_t[0]
+        for i, tau_t in enumerate(proof.tau_t[1:], 1):
+            tau_T = tau_T + pow(zeta, n * i, self.order) * tau_t
+        tau_D = tau_D - Zh_zeta * tau_T
+
+        opening_tau = proof.tau_wires + tau_sigmas[:-1]
+        opening_zeta = proof.zeta_wires + proof.zeta_sigmas
+
+        if proof.lookup:
+            lookup = proof.lookup
+            lam_f = (lam + zeta_a + eta * lookup.zeta_k) % self.order
+            lam_t = (lam + lookup.zeta_t) % self.order
+            alpha_3 = pow(alpha, 3, self.order)
+
+            r0 = (
+                r0
+                + alpha_3
+                * (lookup.zeta_phi_omega * lam_f * lam_t - lookup.zeta_k * lam_t)
+            ) % self.order
+            tau_D = (
+                tau_D
+                - (alpha_3 * lam_f * lam_t % self.order) * lookup.tau_phi
+                + (alpha_3 * lam_f % self.order) * lookup.tau_m
+                + (u * v % self.order) * lookup.tau_phi
+            )
 
-        tau_F = (
-            tau_D
-            + proof.tau_a * v
-            + proof.tau_b * pow(v, 2, self.order)
-            + proof.tau_c * pow(v, 3, self.order)
-            + tau_sigma1 * pow(v, 4, self.order)
-            + tau_sigma2 * pow(v, 5, self.order)
-        )
+            opening_tau += [
+                tau_selector["K"],
+                tau_selector["V"] + eta * tau_selector["I"],
+            ]
+            opening_zeta += [lookup.zeta_k, lookup.zeta_t]
 
-        tau_E = (
-            (
-                -r0
-                + v * proof.zeta_a
-                + pow(v, 2, self.order) * proof.zeta_b
-                + pow(v, 3, self.order) * proof.zeta_c
-                + pow(v, 4, self.order) * proof.zeta_sigma1
-                + pow(v, 5, self.order) * proof.zeta_sigma2
-                + u * proof.zeta_omega
-            )
-            % self.order
-        ) * self.E.G1()
+        tau_F = tau_D
+        opening_eval = -r0 + u * proof.zeta_omega
+        if proof.lookup:
+            opening_eval += u * v * proof.lookup.zeta_phi_omega
+        for i, (tau_P, zeta_P) in enumerate(zip(opening_tau, opening_zeta), 1):
+            tau_F = tau_F + tau_P * pow(v, i, self.order)
+            opening_eval += pow(v, i, self.order) * zeta_P
+
+        tau_E = (opening_eval % self.order) * self.E.G1()
 
         lhs = self.E.pairing(
             proof.tau_W_zeta + u * proof.tau_W_zeta_omega, self.verifying_key.tau_g2
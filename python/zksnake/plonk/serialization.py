@@ -1,126 +1,146 @@
-from zksnake.polynomial import Polynomial
+from zksnake.polynomial import Polynomial, get_evaluation_point
 from ..utils import split_list
 from ..ecc import CurvePointSize, EllipticCurve
 
 
+def quotient_pieces(num_wires: int, selectors) -> int:
+    """
+    Return the number of degree-n pieces the quotient polynomial T(X) is split into,
+    given the number of wires and the enabled `selectors`
+    """
+    # Z(X) * prod(wire + beta * sigma + gamma) has degree (num_wires + 1) * n,
+    # while QP * A^5 of the pow5 gate has degree 6n
+    if "P" in selectors:
+        return max(num_wires, 5)
+
+    return num_wires
+
+
+def _names_to_bytes(names) -> bytes:
+    s = "".join(names).encode()
+    return int.to_bytes(len(s), 8, "little") + s
+
+
+def _names_from_bytes(s: bytes):
+    length = int.from_bytes(s[:8], "little")
+    return list(s[8 : 8 + length].decode()), s[8 + length :]
+
+
+class LookupProof:
+    """Commitments and evaluations of the logUp lookup argument"""
+
+    def __init__(self, tau_m, tau_phi, zeta_k, zeta_t, zeta_phi_omega):
+        self.tau_m = tau_m
+        self.tau_phi = tau_phi
+        self.zeta_k = zeta_k
+        self.zeta_t = zeta_t
+        self.zeta_phi_omega = zeta_phi_omega
+
+
 class Proof:
 
     def __init__(
         self,
-        tau_a,
-        tau_b,
-        tau_c,
+        tau_wires: list,
         tau_z,
-        tau_t_lo,
-        tau_t_mid,
-        tau_t_hi,
+        tau_t: list,
         tau_W_zeta,
         tau_W_zeta_omega,
-        zeta_a,
-        zeta_b,
-        zeta_c,
-        zeta_sigma1,
-        zeta_sigma2,
+        zeta_wires: list,
+        zeta_sigmas: list,
         zeta_omega,
+        lookup: LookupProof = None,
     ):
-        self.tau_a = tau_a
-        self.tau_b = tau_b
-        self.tau_c = tau_c
+        self.tau_wires = tau_wires
         self.tau_z = tau_z
-        self.tau_t_lo = tau_t_lo
-        self.tau_t_mid = tau_t_mid
-        self.tau_t_hi = tau_t_hi
+        self.tau_t = tau_t
         self.tau_W_zeta = tau_W_zeta
         self.tau_W_zeta_omega = tau_W_zeta_omega
-        self.zeta_a = zeta_a
-        self.zeta_b = zeta_b
-        self.zeta_c = zeta_c
-        self.zeta_sigma1 = zeta_sigma1
-        self.zeta_sigma2 = zeta_sigma2
+        self.zeta_wires = zeta_wires
+        self.zeta_sigmas = zeta_sigmas
         self.zeta_omega = zeta_omega
+        self.lookup = lookup
 
     @classmethod
-    def from_bytes(cls, s: bytes, crv="BN254"):
-        """Parse Proof from serialized bytes"""
+    def from_bytes(
+        cls, s: bytes, crv="BN254", num_wires=3, num_quotient=3, lookup=False
+    ):
+        """Parse Proof from serialized bytes
+
+        `num_wires`, `num_quotient` and `lookup` describe the shape of the proof,
+        see `VerifyingKey.num_wires`, `VerifyingKey.num_quotient`
+        and `VerifyingKey.has_lookup`
+        """
 
         E = EllipticCurve(crv)
 
         n = CurvePointSize[crv].value
-        total_points = n * 9
-        total_scalars = 32 * 6
+        total_points = n * (num_wires + num_quotient + 3 + lookup * 2)
+        total_scalars = 32 * (num_wires * 2 + lookup * 3)
         assert (
             len(s) == total_points + total_scalars
         ), f"Length of the Proof must equal {total_points + total_scalars} bytes"
 
-        ax = s[:n]
-        bx = s[n : n * 2]
-        cx = s[n * 2 : n * 3]
-        zx = s[n * 3 : n * 4]
-        tlox = s[n * 4 : n * 5]
-        tmix = s[n * 5 : n * 6]
-        thix = s[n * 6 : n * 7]
-        wzx = s[n * 7 : n * 8]
-        wzox = s[n * 8 : n * 9]
-
-        scalars = split_list(s[n * 9 :], 32)
-
-        tau_a = E.from_hex(ax.hex())
-        tau_b = E.from_hex(bx.hex())
-        tau_c = E.from_hex(cx.hex())
-        tau_z = E.from_hex(zx.hex())
-        tau_t_lo = E.from_hex(tlox.hex())
-        tau_t_mid = E.from_hex(tmix.hex())
-        tau_t_hi = E.from_hex(thix.hex())
-        tau_w_zeta = E.from_hex(wzx.hex())
-        tau_w_zeta_omega = E.from_hex(wzox.hex())
-
-        zeta_a = int.from_bytes(scalars[0], "little")
-        zeta_b = int.from_bytes(scalars[1], "little")
-        zeta_c = int.from_bytes(scalars[2], "little")
-        zeta_sigma1 = int.from_bytes(scalars[3], "little")
-        zeta_sigma2 = int.from_bytes(scalars[4], "little")
-        zeta_omega = int.from_bytes(scalars[5], "little")
+        points = [E.from_hex(point.hex()) for point in split_list(s[:total_points], n)]
+        scalars = [
+            int.from_bytes(scalar, "little")
+            for scalar in split_list(s[total_points:], 32)
+        ]
+
+        lookup_proof = None
+        if lookup:
+            tau_m = points.pop(num_wires)
+            tau_phi = points.pop(num_wires + 1)
+            zeta_k, zeta_t, zeta_phi_omega = scalars[num_wires * 2 :]
+            lookup_proof = LookupProof(tau_m, tau_phi, zeta_k, zeta_t, zeta_phi_omega)
+
+        tau_wires = points[:num_wires]
+        tau_z = points[num_wires]
+        tau_t = points[num_wires + 1 : num_wires + 1 + num_quotient]
+        tau_w_zeta, tau_w_zeta_omega = points[num_wires + 1 + num_quotient :]
+
+        zeta_wires = scalars[:num_wires]
+        zeta_sigmas = scalars[num_wires : num_wires * 2 - 1]
+        zeta_omega = scalars[num_wires * 2 - 1]
 
         return Proof(
-            tau_a,
-            tau_b,
-            tau_c,
+            tau_wires,
             tau_z,
-            tau_t_lo,
-            tau_t_mid,
-            tau_t_hi,
+            tau_t,
             tau_w_zeta,
             tau_w_zeta_omega,
-            zeta_a,
-            zeta_b,
-            zeta_c,
-            zeta_sigma1,
-            zeta_sigma2,
+            zeta_wires,
+            zeta_sigmas,
             zeta_omega,
+            lookup_proof,
         )
 
     def to_bytes(self) -> bytes:
         """Return bytes representation of the Proof"""
-        points = bytes(
-            self.tau_a.to_bytes()
-            + self.tau_b.to_bytes()
-            + self.tau_c.to_bytes()
-            + self.tau_z.to_bytes()
-            + self.tau_t_lo.to_bytes()
-            + self.tau_t_mid.to_bytes()
-            + self.tau_t_hi.to_bytes()
-            + self.tau_W_zeta.to_bytes()
-            + self.tau_W_zeta_omega.to_bytes()
-        )
-
-        scalar = (
-            self.zeta_a.to_bytes(32, "little")
-            + self.zeta_b.to_bytes(32, "little")
-            + self.zeta_c.to_bytes(32, "little")
-            + self.zeta_sigma1.to_bytes(32, "little")
-            + self.zeta_sigma2.to_bytes(32, "little")
-            + self.zeta_omega.to_bytes(32, "little")
-        )
+        tau_lookup = [[], []]
+        zeta_lookup = []
+        if self.lookup:
+            tau_lookup = [[self.lookup.tau_m], [self.lookup.tau_phi]]
+            zeta_lookup = [
+                self.lookup.zeta_k,
+                self.lookup.zeta_t,
+                self.lookup.zeta_phi_omega,
+            ]
+
+        points = b""
+        for point in (
+            self.tau_wires
+            + tau_lookup[0]
+            + [self.tau_z]
+            + tau_lookup[1]
+            + self.tau_t
+            + [self.tau_W_zeta, self.tau_W_zeta_omega]
+        ):
+            points += bytes(point.to_bytes())
+
+        scalar = b""
+        for e in self.zeta_wires + self.zeta_sigmas + [self.zeta_omega] + zeta_lookup:
+            scalar += e.to_bytes(32, "little")
 
         return points + scalar
 
@@ -153,6 +173,21 @@ class ProvingKey:
 
         self.lagrange_evals = lagrange_evals
 
+    @property
+    def num_wires(self) -> int:
+        """Number of wires in a row"""
+        return len(self.permutation_poly)
+
+    @property
+    def num_quotient(self) -> int:
+        """Number of pieces of the quotient polynomial T(X)"""
+        return quotient_pieces(self.num_wires, self.selector_poly)
+
+    @property
+    def has_lookup(self) -> bool:
+        """Whether the constraints contain lookup tables"""
+        return "K" in self.selector_poly
+
     @classmethod
     def from_bytes(cls, s: bytes, crv="BN254"):
         """Construct ProvingKey from bytes"""
@@ -167,23 +202,18 @@ class ProvingKey:
 
         s = s[8 + length * n :]
 
+        names, s = _names_from_bytes(s)
+        num_wires = int.from_bytes(s[:8], "little")
+        s = s[8:]
+
         tau_selector_poly = {}
-        selector_polys = []
         tau_permutation_poly = []
-        for _ in range(5):
+        for name in names:
             point = s[:n]
             s = s[n:]
-            selector_polys.append(E.from_hex(point.hex()))
-
-        tau_selector_poly = {
-            "L": selector_polys[0],
-            "R": selector_polys[1],
-            "O": selector_polys[2],
-            "M": selector_polys[3],
-            "C": selector_polys[4],
-        }
+            tau_selector_poly[name] = E.from_hex(point.hex())
 
-        for _ in range(3):
+        for _ in range(num_wires):
             point = s[:n]
             s = s[n:]
             tau_permutation_poly.append(E.from_hex(point.hex()))
@@ -200,39 +230,27 @@ class ProvingKey:
 
             s = s[8 + length * n :]
 
-        assert len(contents) == 17, "Malformed ProvingKey structure"
+        assert (
+            len(contents) == len(names) * 2 + num_wires * 2 + 1
+        ), "Malformed ProvingKey structure"
 
         domain = len(contents[0])
 
-        selector_poly = {
-            "L": Polynomial(contents[0], E.order),
-            "R": Polynomial(contents[1], E.order),
-            "O": Polynomial(contents[2], E.order),
-            "M": Polynomial(contents[3], E.order),
-            "C": Polynomial(contents[4], E.order),
-        }
+        selector_poly = {}
+        for name in names:
+            selector_poly[name] = Polynomial(contents.pop(0), E.order)
 
         permutation_poly = [
-            Polynomial(contents[5], E.order),
-            Polynomial(contents[6], E.order),
-            Polynomial(contents[7], E.order),
+            Polynomial(contents.pop(0), E.order) for _ in range(num_wires)
         ]
 
-        identity_poly = [
-            Polynomial(contents[8], E.order),
-            Polynomial(contents[9], E.order),
-            Polynomial(contents[10], E.order),
-        ]
+        identity_poly = [Polynomial(contents.pop(0), E.order) for _ in range(num_wires)]
 
-        selector_evals = {
-            "L": contents[11],
-            "R": contents[12],
-            "O": contents[13],
-            "M": contents[14],
-            "C": contents[15],
-        }
+        selector_evals = {}
+        for name in names:
+            selector_evals[name] = contents.pop(0)
 
-        lagrange_evals = contents[16]
+        lagrange_evals = contents.pop(0)
 
         return ProvingKey(
             domain,
@@ -256,6 +274,9 @@ class ProvingKey:
         for t in self.tau_g1:
             s += bytes(t.to_bytes())
 
+        s += _names_to_bytes(self.tau_selector_poly.keys())
+        s += int.to_bytes(self.num_wires, 8, "little")
+
         for _, point in self.tau_selector_poly.items():
             s += bytes(point.to_bytes())
 
@@ -292,7 +313,13 @@ class ProvingKey:
 class VerifyingKey:
 
     def __init__(
-        self, n, tau_G2, tau_selector_poly, tau_permutation_poly, curve: str = "BN254"
+        self,
+        n,
+        tau_G2,
+        tau_selector_poly,
+        tau_permutation_poly,
+        curve: str = "BN254",
+        public_indices=None,
     ):
         self.E = EllipticCurve(curve)
         self.order = self.E.order
@@ -300,6 +327,42 @@ class VerifyingKey:
         self.tau_g2 = tau_G2
         self.tau_selector_poly = tau_selector_poly
         self.tau_permutation_poly = tau_permutation_poly
+        self.public_indices = list(public_indices or [])
+
+        # omega^i for the first row (L1) and every public input row
+        self.omega = get_evaluation_point(n, 1, self.order)
+        self.roots = {
+            i: pow(self.omega, i, self.order) for i in [0] + self.public_indices
+        }
+
+    def public_roots(self, indices) -> dict:
+        """
+        Return `{i: omega^i}` for the first row and the given row `indices`.
+        Only the roots of the public input rows of the key are cached,
+        any other one is computed for this call alone.
+        """
+        missing = {
+            i: pow(self.omega, i, self.order) for i in indices if i not in self.roots
+        }
+        if not missing:
+            return self.roots
+
+        return {**self.roots, **missing}
+
+    @property
+    def num_wires(self) -> int:
+        """Number of wires in a row"""
+        return len(self.tau_permutation_poly)
+
+    @property
+    def num_quotient(self) -> int:
+        """Number of pieces of the quotient polynomial T(X)"""
+        return quotient_pieces(self.num_wires, self.tau_selector_poly)
+
+    @property
+    def has_lookup(self) -> bool:
+        """Whether the constraints contain lookup tables"""
+        return "K" in self.tau_selector_poly
 
     @classmethod
     def from_bytes(cls, s: bytes, crv="BN254"):
@@ -313,29 +376,35 @@ class VerifyingKey:
         tau_g2 = E.from_hex(s[: n * 2].hex())
         s = s[n * 2 :]
 
+        names, s = _names_from_bytes(s)
+        num_wires = int.from_bytes(s[:8], "little")
+        s = s[8:]
+
         tau_selector_poly = {}
-        selector_polys = []
         tau_permutation_poly = []
-        for _ in range(5):
+        for name in names:
             point = s[:n]
             s = s[n:]
-            selector_polys.append(E.from_hex(point.hex()))
-
-        tau_selector_poly = {
-            "L": selector_polys[0],
-            "R": selector_polys[1],
-            "O": selector_polys[2],
-            "M": selector_polys[3],
-            "C": selector_polys[4],
-        }
+            tau_selector_poly[name] = E.from_hex(point.hex())
 
-        for _ in range(3):
+        for _ in range(num_wires):
             point = s[:n]
             s = s[n:]
             tau_permutation_poly.append(E.from_hex(point.hex()))
 
+        public_indices = []
+        if len(s) > 0:
+            length = int.from_bytes(s[:8], "little")
+            for index in split_list(s[8 : 8 + length * 8], 8):
+                public_indices.append(int.from_bytes(index, "little"))
+
         return VerifyingKey(
-            domain, tau_g2, tau_selector_poly, tau_permutation_poly, crv
+            domain,
+            tau_g2,
+            tau_selector_poly,
+            tau_permutation_poly,
+            crv,
+            public_indices,
         )
 
     def to_bytes(self) -> bytes:
@@ -344,10 +413,17 @@ class VerifyingKey:
         s += int.to_bytes(self.n, 8, "little")
         s += bytes(self.tau_g2.to_bytes())
 
+        s += _names_to_bytes(self.tau_selector_poly.keys())
+        s += int.to_bytes(self.num_wires, 8, "little")
+
         for _, point in self.tau_selector_poly.items():
             s += bytes(point.to_bytes())
 
         for point in self.tau_permutation_poly:
             s += bytes(point.to_bytes())
 
+        s += int.to_bytes(len(self.public_indices), 8, "little")
+        for index in self.public_indices:
+            s += int.to_bytes(index, 8, "little")
+
         return s
@@ -5,7 +5,7 @@ from zksnake._algebra import (
     polynomial_bn254,
     polynomial_bls12_381,
 )
-from .utils import next_power_of_two
+from .utils import batch_modinv, next_power_of_two
 from .constant import BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD
 
 POLY_OBJECT = {
@@ -69,6 +69,56 @@ def MultilinearPolynomial(num_vars: int, sparse_evaluations: Tuple[int, int], p:
     return poly.MultilinearPolynomial(num_vars, sparse_evaluations)
 
 
+def DenseMultilinearPolynomial(num_vars: int, evaluations: Sequence[int], p: int):
+    """
+    Constructs Dense Multilinear Polynomial from all of its `evaluations`
+    over boolean hypercube, padded with zeroes up to `2^num_vars`
+    """
+    poly = POLY_OBJECT[p]
+    return poly.DenseMultilinearPolynomial(num_vars, evaluations)
+
+
+def eq_table(r: Sequence[int], p: int):
+    """
+    Build eq(x, r) over boolean hypercube as a Dense Multilinear Polynomial,
+    computed natively in O(2^n)
+    """
+    poly = POLY_OBJECT[p]
+    return poly.eq_table([x % p for x in r])
+
+
+def evaluate_multilinear_polynomials(mles: list, point: Sequence[int], p: int) -> list:
+    """
+    Evaluate every sparse or dense multilinear polynomial of `mles` at the same `point`,
+    as dot products against a single eq(x, point) table.
+    """
+    if not mles:
+        return []
+
+    poly = POLY_OBJECT[p]
+    return poly.evaluate_multilinear_polynomials(mles, [x % p for x in point])
+
+
+def VirtualPolynomial(num_vars: int, p: int):
+    """
+    Construct an empty native sum of products of multilinear polynomials
+    over `num_vars` variables, to be filled with `add_product(mles, coeff)`
+    """
+    poly = POLY_OBJECT[p]
+    return poly.VirtualPolynomial(num_vars)
+
+
+def evaluate_polynomials(polynomials: list, point: int, p) -> list:
+    """
+    Evaluate every univariate polynomial of `polynomials` at the same `point`, in parallel.
+    """
+    if not polynomials:
+        return []
+
+    poly = POLY_OBJECT[p]
+    return poly.evaluate_polynomials(polynomials, point % p)
+
+
 def get_evaluation_point(domain, i, p) -> int:
     """
     get `i`th element over evaluation domain of size `domain`
@@ -185,6 +235,44 @@ def mul_over_evaluation_domain(domain, a, b, p):
     return poly.mul_over_evaluation_domain(domain, a, b)
 
 
+def powers(base, n: int, p) -> list:
+    """
+    Return `[1, base, base^2, ..., base^(n-1)]` over field `p`,
+    computed natively by repeated multiplication.
+    """
+    poly = POLY_OBJECT[p]
+    return poly.powers(base % p, n)
+
+
+def hadamard_product(a: list, b: list, p) -> list:
+    """
+    Multiply two vectors element-wise.
+    """
+    assert len(a) == len(b), "Vectors must have the same length"
+    poly = POLY_OBJECT[p]
+    return poly.mul_over_evaluation_domain(len(a), a, b)
+
+
+def scaled_add(a: list, b: list, x, p) -> list:
+    """
+    Compute `a + x * b` element-wise.
+    """
+    poly = POLY_OBJECT[p]
+    return poly.scaled_add(a, b, x % p)
+
+
+def combine_challenge_vectors(weights: list, challenges: list, p) -> list:
+    """
+    Compute `sum(w_k * s_k)` natively, where `s_k` is the coefficient vector of
+    the challenge polynomial `prod(1 + u_j * X^(2^(m-1-j)))` of the round
+    challenges `challenges[k]`.
+    """
+    poly = POLY_OBJECT[p]
+    return poly.combine_challenge_vectors(
+        [w % p for w in weights], [[u % p for u in u_list] for u_list in challenges]
+    )
+
+
 def evaluate_vanishing_polynomial(domain, x, p):
     """
     Evaluate vanishing polynomial defined by this domain at the point `x`.
@@ -201,37 +289,74 @@ def evaluate_lagrange_coefficients(domain, x, p):
     return poly.evaluate_lagrange_coefficients(domain, x)
 
 
-def barycentric_eval(domain, sparse_eval: dict, x, p):
+def barycentric_eval(domain, sparse_eval: dict, x, p, roots: dict = None):
     """
     Evaluate a polynomial at a given point x using sparse evaluation form.
+
+    Optionally, `roots` mapping index `i` to `omega^i` can be supplied
+    to skip recomputing the domain elements.
     """
-    omega = get_evaluation_point(domain, 1, p)
+    return barycentric_eval_batch(domain, [sparse_eval], x, p, roots)[0]
 
-    sum_i = 0
-    for i in sparse_eval:
-        w_i = pow(omega, i, p)
-        sum_i += (sparse_eval[i] * w_i) * pow(x - w_i, -1, p)
 
-    return (pow(x, domain, p) - 1) * pow(domain, -1, p) * sum_i % p
+def barycentric_eval_batch(domain, sparse_evals: list, x, p, roots: dict = None):
+    """
+    Evaluate several polynomials in sparse evaluation form at the same point `x`.
+    All the denominators `x - omega^i` are inverted at once with a single batch inversion.
+
+    Optionally, `roots` mapping index `i` to `omega^i` can be supplied
+    to skip recomputing the domain elements.
+    """
+    indices = sorted(set().union(*sparse_evals))
+    if not indices:
+        return [0] * len(sparse_evals)
+
+    roots = roots or {}
+    missing = [i for i in indices if i not in roots]
+    if missing:
+        omega = get_evaluation_point(domain, 1, p)
+        roots = {**roots, **{i: pow(omega, i, p) for i in missing}}
+
+    inverses = dict(
+        zip(indices, batch_modinv([(x - roots[i]) % p for i in indices], p))
+    )
+    factor = (pow(x, domain, p) - 1) * pow(domain, -1, p) % p
+
+    results = []
+    for sparse_eval in sparse_evals:
+        sum_i = 0
+        for i, v in sparse_eval.items():
+            sum_i += v * roots[i] * inverses[i]
+        results.append(factor * sum_i % p)
+
+    return results
+
+
+def SubproductTree(points: Sequence[int], p):
+    """
+    Construct the subproduct tree of `points` over finite field `p`, i.e. the
+    products `(X - x_i)` combined pairwise up to the vanishing polynomial of all points.
+
+    The tree can interpolate values over `points` with `interpolate(values)`
+    and evaluate a polynomial at all of `points` with `evaluate(polynomial)`,
+    both sharing the same tree. Small point sets skip the tree and use
+    direct Lagrange interpolation and Horner evaluation instead.
+    """
+    poly = POLY_OBJECT[p]
+    return poly.SubproductTree([x % p for x in points])
+
+
+def multipoint_evaluation(polynomial, points: Sequence[int], p) -> list:
+    """
+    Evaluate univariate `polynomial` at every point of `points`.
+    """
+    return SubproductTree(points, p).evaluate(polynomial)
 
 
 def lagrange_interpolation(x, y, p):
     """
-    Naive implementation of Lagrange interpolation from given points `(x_i, y_i)`.
-    For very large points, use iFFT instead.
-    """
-    M = len(x)
-    poly = Polynomial([0], p)
-    for j in range(M):
-        pt = Polynomial([y[j]], p)
-        for k in range(M):
-            if k == j:
-                continue
-            fac = x[j] - x[k]
-            divided_poly = [-x[k], 1]
-            res = []
-            for c in divided_poly:
-                res.append(c * pow(fac, -1, p) % p)
-            pt *= Polynomial(res, p)
-        poly += pt
-    return poly
+    Interpolate the polynomial of degree `< len(x)` passing through the points `(x_i, y_i)`,
+    using a subproduct tree and a single batch inversion.
+    For values over an FFT domain, use iFFT instead.
+    """
+    return SubproductTree(x, p).interpolate([v % p for v in y])
@@ -1,2 +1,3 @@
-from .range_proof import RangeProof, RangeProofObject
-from .ipa import InnerProductArgument, InnerProductProof
\ No newline at end of file
+from .range_proof import RangeProof, RangeProofObject, AggregatedRangeProofObject
+from .ipa import InnerProductArgument, InnerProductProof
+from .r1cs_proof import R1CSProof, R1CSProofObject
\ No newline at end of file
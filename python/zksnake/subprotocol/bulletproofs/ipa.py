@@ -1,6 +1,9 @@
-from ...utils import inner_product, next_power_of_two, split_list
+import hashlib
+
+from ...utils import batch_modinv, inner_product, next_power_of_two, split_list
 from ...transcript import FiatShamirTranscript, hash_to_curve
 from ...ecc import CurvePointSize, EllipticCurve
+from ...generators import generators
 
 
 class InnerProductProof:
@@ -57,20 +60,16 @@ class InnerProductArgument:
     ):
         self.n = next_power_of_two(size)
         self.E = EllipticCurve(curve)
-        self.G = hash_to_curve(seed, b"G", curve, self.n)
-        self.H = hash_to_curve(seed, b"H", curve, self.n)
+        self.G = generators(seed, b"G", curve, self.n)
+        self.H = generators(seed, b"H", curve, self.n)
         self.Q = Q
 
-    def __split_half(self, data: list):
-        if len(data) > 2:
-            mid_index = len(data) // 2
-            return data[:mid_index], data[mid_index:]
-        elif len(data) == 2:
-            return [data[0]], [data[1]]
-        else:
-            return [data[0]], []
-
-    def prove(self, a: list, b: list, transcript=None):
+    def prove(self, a: list, b: list, transcript=None, bind_generators=True):
+        """
+        Prove `<a, b>` against `G` and `H`. With `bind_generators=False` the
+        generators are not appended to `transcript`, and the caller is expected
+        to have bound them already, e.g. with `generators_digest`
+        """
 
         transcript = transcript or FiatShamirTranscript(
             self.n.to_bytes(32, "big"), field=self.E.order
@@ -80,10 +79,11 @@ class InnerProductArgument:
         a = a + [0 for _ in range(self.n - len(a))]
         b = b + [0 for _ in range(self.n - len(b))]
 
-        for g in self.G:
-            transcript.append(g)
-        for h in self.H:
-            transcript.append(h)
+        if bind_generators:
+            for g in self.G:
+                transcript.append(g)
+            for h in self.H:
+                transcript.append(h)
 
         ab = inner_product(a, b, self.E.order)
 
@@ -94,58 +94,14 @@ class InnerProductArgument:
             transcript.append(commitment)
             Q = hash_to_curve(transcript.get_challenge(), b"Q", self.E.name)
 
-        L_list = []
-        R_list = []
-        u_list = []
-
-        n = self.n
-        G = self.G
-        H = self.H
-
-        while n != 1:
-            n //= 2
-
-            a_low, a_hi = self.__split_half(a)
-            b_low, b_hi = self.__split_half(b)
-            G_low, G_hi = self.__split_half(G)
-            H_low, H_hi = self.__split_half(H)
-
-            L = (
-                self.E.multiexp(G_hi, a_low)
-                + self.E.multiexp(H_low, b_hi)
-                + inner_product(a_low, b_hi, self.E.order) * Q
-            )
-            R = (
-                self.E.multiexp(G_low, a_hi)
-                + self.E.multiexp(H_hi, b_low)
-                + inner_product(a_hi, b_low, self.E.order) * Q
-            )
-
-            L_list.append(L)
-            R_list.append(R)
-
+        def challenge(L, R):
             transcript.append(L)
             transcript.append(R)
+            return transcript.get_challenge_scalar()
 
-            u = transcript.get_challenge_scalar()
-            u_inv = pow(u, -1, self.E.order)
-            u_list.append(u)
-
-            for i in range(n):
-                a_low[i] = (a_low[i] * u + a_hi[i] * u_inv) % self.E.order
-                b_low[i] = (b_low[i] * u_inv + b_hi[i] * u) % self.E.order
-
-                G_low[i] = self.E.multiexp([G_low[i], G_hi[i]], [u_inv, u])
-                H_low[i] = self.E.multiexp([H_low[i], H_hi[i]], [u, u_inv])
-
-            a = a_low
-            b = b_low
-
-            G = G_low
-            H = H_low
-
-        a = a[0]
-        b = b[0]
+        L_list, R_list, a, b = self.E.bulletproofs_fold(
+            self.G, self.H, a, b, Q, challenge
+        )
 
         return InnerProductProof(a, b, L_list, R_list), commitment, ab
 
@@ -155,7 +111,13 @@ class InnerProductArgument:
         commitment,
         inner_product_result,
         transcript=None,
+        bind_generators=True,
     ):
+        """
+        Verify `proof` of `<a, b> = inner_product_result` for `commitment` to `a`
+        and `b` against `G` and `H`. `bind_generators` and `Q` must be the same
+        as when proving
+        """
 
         assert len(proof.L) < 32, "Argument size is too big"
 
@@ -163,51 +125,75 @@ class InnerProductArgument:
             self.n.to_bytes(32, "big"), field=self.E.order
         )
 
-        for g in self.G:
-            transcript.append(g)
-        for h in self.H:
-            transcript.append(h)
+        if bind_generators:
+            for g in self.G:
+                transcript.append(g)
+            for h in self.H:
+                transcript.append(h)
+
+        if self.Q:
+            Q = self.Q
+        else:
+            transcript.append(commitment)
+            Q = hash_to_curve(transcript.get_challenge(), b"Q", self.E.name)
+
+        u_list = []
+        for L, R in zip(proof.L, proof.R):
+            transcript.append(L)
+            transcript.append(R)
+            u_list.append(transcript.get_challenge_scalar())
 
-        transcript.append(commitment)
-        Q = hash_to_curve(transcript.get_challenge(), b"Q", self.E.name)
+        if 1 << len(u_list) != self.n:
+            return False
 
-        k = len(proof.L)
-        challenges = []
-        challenges_inv = []
+        p = self.E.order
+        u_sq, u_inv_sq, s = challenge_scalars(u_list, p)
 
-        all_inv = 1
-        for i in range(k):
-            transcript.append(proof.L[i])
-            transcript.append(proof.R[i])
+        # s[n-1-i] holds the inverse of every challenge used by s[i], so s^-1 is s reversed
+        scalar_mul_g = [(-proof.a * s_i) % p for s_i in s]
+        scalar_mul_h = [(-proof.b * s_i) % p for s_i in reversed(s)]
 
-            u = transcript.get_challenge_scalar()
+        final_check = self.E.multiexp(
+            [commitment, Q] + self.G + self.H + proof.L + proof.R,
+            [1, (inner_product_result - proof.a * proof.b) % p]
+            + scalar_mul_g
+            + scalar_mul_h
+            + u_sq
+            + u_inv_sq,
+        )
 
-            challenges.append(pow(u, 2, self.E.order))
-            challenges_inv.append(pow(u, -2, self.E.order))
-            all_inv *= pow(u, -1, self.E.order)
+        return final_check.is_zero()
 
-        s = [all_inv]
-        for i in range(1, self.n):
-            lg_i = 32 - 1 - (32 - i.bit_length())
-            l = 1 << lg_i
 
-            u_lg_i_sq = challenges[(k - 1) - lg_i]
-            s.append(s[i - l] * u_lg_i_sq)
+def generators_digest(G: list, H: list) -> bytes:
+    """
+    Digest of the generator vectors `G` and `H`, so that a transcript can
+    bind them with a single append instead of one per point
+    """
+    hasher = hashlib.blake2b()
+    for point in G + H:
+        hasher.update(bytes(point.to_bytes()))
 
-        a_s = [proof.a * x % self.E.order for x in s]
-        b_s_inv = [proof.b * pow(x, -1, self.E.order) % self.E.order for x in s]
+    return hasher.digest()
 
-        sum_LR = self.E.curve.PointG1.identity()
-        for j in range(k):
-            sum_LR += proof.L[j] * challenges[j] + proof.R[j] * challenges_inv[j]
 
-        lhs = commitment + inner_product_result * Q
+def challenge_scalars(u_list: list, p: int):
+    """
+    Return `u^2` and `u^-2` for every round challenge of `u_list` and the vector `s`
+    such that the fully folded `G` is `<s, G>`, using a single batch inversion
+    """
+    u_inv = batch_modinv(u_list, p)
+    u_sq = [u * u % p for u in u_list]
+    u_inv_sq = [u * u % p for u in u_inv]
 
-        rhs = (
-            self.E.multiexp(self.G, a_s)
-            + self.E.multiexp(self.H, b_s_inv)
-            + proof.a * proof.b * Q
-            - sum_LR
-        )
+    all_inv = 1
+    for u in u_inv:
+        all_inv = all_inv * u % p
+
+    k = len(u_list)
+    s = [all_inv]
+    for i in range(1, 1 << k):
+        lg_i = i.bit_length() - 1
+        s.append(s[i - (1 << lg_i)] * u_sq[(k - 1) - lg_i] % p)
 
-        return lhs == rhs
+    return u_sq, u_inv_sq, s
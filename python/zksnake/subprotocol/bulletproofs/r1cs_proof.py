@@ -0,0 +1,442 @@
+from ...utils import get_random_int, inner_product, next_power_of_two, split_list
+from ...polynomial import hadamard_product, powers, scaled_add
+from ...ecc import CurvePointSize, EllipticCurve
+from ...transcript import FiatShamirTranscript
+from ...generators import generators
+from ...arithmetization.r1cs import R1CS
+from ...arithmetization.serialization import read_digest
+from . import ipa
+
+
+class R1CSProofObject:
+
+    def __init__(
+        self,
+        A_I,
+        A_O,
+        S,
+        T1,
+        T3,
+        T4,
+        T5,
+        T6,
+        t,
+        t_blinding,
+        e_blinding,
+        ipa_proof: ipa.InnerProductProof,
+    ):
+        self.A_I = A_I
+        self.A_O = A_O
+        self.S = S
+        self.T1 = T1
+        self.T3 = T3
+        self.T4 = T4
+        self.T5 = T5
+        self.T6 = T6
+        self.t = t
+        self.t_blinding = t_blinding
+        self.e_blinding = e_blinding
+        self.ipa_proof = ipa_proof
+
+    def to_bytes(self) -> bytes:
+        s = b""
+        for point in (
+            self.A_I,
+            self.A_O,
+            self.S,
+            self.T1,
+            self.T3,
+            self.T4,
+            self.T5,
+            self.T6,
+        ):
+            s += bytes(point.to_bytes())
+        s += bytes(self.t.to_bytes(32, "little"))
+        s += bytes(self.t_blinding.to_bytes(32, "little"))
+        s += bytes(self.e_blinding.to_bytes(32, "little"))
+        s += self.ipa_proof.to_bytes()
+
+        return s
+
+    @classmethod
+    def from_bytes(cls, s: bytes, crv="BN254"):
+
+        E = EllipticCurve(crv)
+        n = CurvePointSize[crv].value
+
+        assert (len(s) - 160) % n == 0, "Invalid proof length"
+
+        point_s = split_list(s[: 8 * n], n)
+        field_s = split_list(s[8 * n : 8 * n + 32 * 3], 32)
+        ipa_s = s[8 * n + 32 * 3 :]
+
+        assert len(point_s) == 8 and len(field_s) == 3, "Malformed proof structure"
+
+        points = [E.from_hex(point.hex()) for point in point_s]
+        t = int.from_bytes(field_s[0], "little")
+        t_blinding = int.from_bytes(field_s[1], "little")
+        e_blinding = int.from_bytes(field_s[2], "little")
+        ipa_proof = ipa.InnerProductProof.from_bytes(ipa_s, crv)
+
+        return R1CSProofObject(*points, t, t_blinding, e_blinding, ipa_proof)
+
+
+class R1CSProof:
+    """
+    Bulletproofs arithmetic-circuit proof (https://eprint.iacr.org/2017/1066.pdf, section 5)
+    of a compiled R1CS, without trusted setup.
+
+    Every R1CS row `i` is a multiplication gate with `a_L[i] = <A_i, w>`,
+    `a_R[i] = <B_i, w>` and `a_O[i] = <C_i, w>`. The private witness is packed
+    two per gate into additional gates, and the rows of `A`, `B` and `C` become
+    the linear constraints tying the gate wires to the witness.
+
+    Args:
+        r1cs: compiled R1CS to prove
+        curve: `BN254` or `BLS12_381`
+    """
+
+    def __init__(self, r1cs: R1CS, curve: str = "BN254", seed=b"R1CSProof"):
+        assert r1cs.A is not None, "R1CS is not compiled"
+
+        self.r1cs = r1cs
+        self.E = EllipticCurve(curve)
+
+        self.n_constraints = r1cs.A.n_row
+        self.n_public = r1cs.n_public
+        n_private = r1cs.A.n_col - self.n_public
+
+        self.n = next_power_of_two(self.n_constraints + (n_private + 1) // 2)
+        self.G = generators(seed, b"G", curve, self.n)
+        self.H = generators(seed, b"H", curve, self.n)
+        self.B = generators(seed, b"B", curve, 1)[0]
+        self.B_blinding = generators(seed, b"Blinding", curve, 1)[0]
+
+        self.__generators_digest = ipa.generators_digest(self.G, self.H)
+
+        self.label = read_digest(r1cs.to_bytes())
+
+    def __wire(self, col: int):
+        """
+        Return the gate side (0 for left, 1 for right) and the gate index
+        holding the private witness of column `col`
+        """
+        k = col - self.n_public
+        return k % 2, self.n_constraints + k // 2
+
+    def __weights(self, z, public_witness: list):
+        """
+        Flatten the linear constraints weighted by powers of `z` into
+        the vectors `w_L`, `w_R`, `w_O` and the constant `w_c`
+        """
+        p = self.E.order
+        z_pow = powers(z, 3 * self.n_constraints + 1, p)[1:]
+
+        w_L = [0] * self.n
+        w_R = [0] * self.n
+        w_O = [0] * self.n
+
+        w_L[: self.n_constraints] = z_pow[0::3]
+        w_R[: self.n_constraints] = z_pow[1::3]
+        w_O[: self.n_constraints] = z_pow[2::3]
+
+        w_c = 0
+        w_LR = (w_L, w_R)
+        for k, matrix in enumerate((self.r1cs.A, self.r1cs.B, self.r1cs.C)):
+            for row, col, value in matrix.triplets:
+                z_q = z_pow[3 * row + k]
+                if col < self.n_public:
+                    w_c += z_q * value * public_witness[col]
+                else:
+                    side, gate = self.__wire(col)
+                    w_LR[side][gate] -= z_q * value
+
+        w_L = [v % p for v in w_L]
+        w_R = [v % p for v in w_R]
+
+        return w_L, w_R, w_O, w_c % p
+
+    def __bind_generators(self, transcript, y: int):
+        """
+        Bind `G` and `H' = y^-i * H` of the inner-product argument through
+        the digest of `G` and `H` and `y`, without scaling `H` per proof
+        """
+        transcript.append(self.__generators_digest)
+        transcript.append(y)
+
+    def __transcript(self):
+        return FiatShamirTranscript(self.label, field=self.E.order)
+
+    def prove(self, public_witness: list, private_witness: list, transcript=None):
+        """
+        Prove statement from R1CS by providing public and private witness
+        """
+        assert len(public_witness) == self.n_public, "Invalid public witness length"
+        assert (
+            len(private_witness) == self.r1cs.A.n_col - self.n_public
+        ), "Invalid private witness length"
+
+        transcript = transcript or self.__transcript()
+
+        p = self.E.order
+        G = self.G
+        H = self.H
+
+        w = public_witness + private_witness
+        padding = [0] * (self.n - self.n_constraints)
+
+        a_L = self.r1cs.A.dot(w) + padding
+        a_R = self.r1cs.B.dot(w) + padding
+        a_O = self.r1cs.C.dot(w) + padding
+
+        for k, value in enumerate(private_witness):
+            side, gate = self.__wire(self.n_public + k)
+            (a_L, a_R)[side][gate] = value % p
+        for gate in range(self.n_constraints, self.n):
+            a_O[gate] = a_L[gate] * a_R[gate] % p
+
+        s_L = [get_random_int(p) for _ in range(self.n)]
+        s_R = [get_random_int(p) for _ in range(self.n)]
+
+        alpha = get_random_int(p)
+        beta = get_random_int(p)
+        rho = get_random_int(p)
+
+        A_I = self.E.multiexp(G + H + [self.B_blinding], a_L + a_R + [alpha])
+        A_O = self.E.multiexp(G + [self.B_blinding], a_O + [beta])
+        S = self.E.multiexp(G + H + [self.B_blinding], s_L + s_R + [rho])
+
+        transcript.append(public_witness)
+        transcript.append(A_I)
+        transcript.append(A_O)
+        transcript.append(S)
+
+        y = transcript.get_challenge_scalar()
+        z = transcript.get_challenge_scalar()
+
+        y_pow = powers(y, self.n, p)
+        y_inv_pow = powers(pow(y, -1, p), self.n, p)
+
+        w_L, w_R, w_O, _ = self.__weights(z, public_witness)
+
+        # l(X) = l_1 X + l_2 X^2 + l_3 X^3 and r(X) = r_0 + r_1 X + r_3 X^3
+        l_1 = scaled_add(a_L, hadamard_product(y_inv_pow, w_R, p), 1, p)
+        l_2 = a_O
+        l_3 = s_L
+        r_0 = scaled_add(w_O, y_pow, p - 1, p)
+        r_1 = scaled_add(w_L, hadamard_product(y_pow, a_R, p), 1, p)
+        r_3 = hadamard_product(y_pow, s_R, p)
+
+        t_coeffs = {
+            1: inner_product(l_1, r_0, p),
+            3: inner_product(l_2, r_1, p) + inner_product(l_3, r_0, p),
+            4: inner_product(l_1, r_3, p) + inner_product(l_3, r_1, p),
+            5: inner_product(l_2, r_3, p),
+            6: inner_product(l_3, r_3, p),
+        }
+        t_blindings = {i: get_random_int(p) for i in t_coeffs}
+
+        T = {
+            i: (t_coeffs[i] % p) * self.B + t_blindings[i] * self.B_blinding
+            for i in t_coeffs
+        }
+
+        for i in sorted(T):
+            transcript.append(T[i])
+
+        x = transcript.get_challenge_scalar()
+
+        l_list = scaled_add(
+            [0] * self.n, scaled_add(l_1, scaled_add(l_2, l_3, x, p), x, p), x, p
+        )
+        r_list = scaled_add(scaled_add(r_0, r_1, x, p), r_3, pow(x, 3, p), p)
+
+        t = inner_product(l_list, r_list, p)
+        t_blinding = sum(pow(x, i, p) * t_blindings[i] for i in t_blindings) % p
+        e_blinding = (alpha * x + beta * x * x + rho * pow(x, 3, p)) % p
+
+        transcript.append(t)
+        transcript.append(t_blinding)
+        transcript.append(e_blinding)
+
+        w = transcript.get_challenge_scalar()
+
+        ipa_prover = ipa.InnerProductArgument(self.n, self.E.name)
+
+        ipa_prover.G = G
+        ipa_prover.H = self.E.batch_mul(H, y_inv_pow)
+        ipa_prover.Q = w * self.B
+
+        self.__bind_generators(transcript, y)
+        ipa_proof, _, _ = ipa_prover.prove(
+            l_list, r_list, transcript, bind_generators=False
+        )
+
+        return R1CSProofObject(
+            A_I,
+            A_O,
+            S,
+            T[1],
+            T[3],
+            T[4],
+            T[5],
+            T[6],
+            t,
+            t_blinding,
+            e_blinding,
+            ipa_proof,
+        )
+
+    def __reduce(self, proof: R1CSProofObject, public_witness: list, transcript):
+        """
+        Replay the transcript of `proof` and return the terms of its final
+        check, split into proof-specific `(points, scalars)` and the scalars
+        of the shared generators `(B, B_blinding, G, H)`,
+        or None if the proof is malformed
+        """
+        if len(public_witness) != self.n_public:
+            return None
+
+        if 1 << len(proof.ipa_proof.L) != self.n:
+            return None
+
+        p = self.E.order
+        T = [proof.T1, proof.T3, proof.T4, proof.T5, proof.T6]
+
+        transcript.reset()
+        transcript.append(public_witness)
+        transcript.append(proof.A_I)
+        transcript.append(proof.A_O)
+        transcript.append(proof.S)
+
+        y = transcript.get_challenge_scalar()
+        z = transcript.get_challenge_scalar()
+
+        for T_i in T:
+            transcript.append(T_i)
+
+        x = transcript.get_challenge_scalar()
+
+        transcript.append(proof.t)
+        transcript.append(proof.t_blinding)
+        transcript.append(proof.e_blinding)
+
+        w = transcript.get_challenge_scalar()
+
+        y_inv_pow = powers(pow(y, -1, p), self.n, p)
+
+        self.__bind_generators(transcript, y)
+
+        c = get_random_int(p)
+
+        u_list = []
+        for L, R in zip(proof.ipa_proof.L, proof.ipa_proof.R):
+            transcript.append(L)
+            transcript.append(R)
+            u_list.append(transcript.get_challenge_scalar())
+
+        challenges, challenges_inv, s = ipa.challenge_scalars(u_list, p)
+
+        a = proof.ipa_proof.a
+        b = proof.ipa_proof.b
+
+        w_L, w_R, w_O, w_c = self.__weights(z, public_witness)
+
+        y_inv_w_R = hadamard_product(y_inv_pow, w_R, p)
+        delta = inner_product(y_inv_w_R, w_L, p)
+
+        # x * y^-i * w_R[i] - a * s_i
+        scalar_mul_g = scaled_add(
+            scaled_add([0] * self.n, y_inv_w_R, x, p), s, p - a, p
+        )
+
+        # y^-i * (x * w_L[i] + w_O[i] - b * s_i^-1) - 1
+        rhs = scaled_add(scaled_add(w_O, w_L, x, p), s[::-1], p - b, p)
+        scalar_mul_h = scaled_add(
+            [p - 1] * self.n, hadamard_product(y_inv_pow, rhs, p), 1, p
+        )
+
+        x_pow = powers(x, 7, p)
+
+        points = (
+            [proof.A_I, proof.A_O, proof.S] + T + proof.ipa_proof.L + proof.ipa_proof.R
+        )
+
+        scalars = (
+            [x_pow[1], x_pow[2], x_pow[3]]
+            + [-c * x_pow[i] % p for i in (1, 3, 4, 5, 6)]
+            + challenges
+            + challenges_inv
+        )
+
+        shared_scalars = (
+            (w * (proof.t - a * b) + c * (proof.t - x_pow[2] * (delta + w_c))) % p,
+            (c * proof.t_blinding - proof.e_blinding) % p,
+            scalar_mul_g,
+            scalar_mul_h,
+        )
+
+        return points, scalars, shared_scalars
+
+    def verify(self, proof: R1CSProofObject, public_witness: list, transcript=None):
+        """
+        Verify proof by providing public witness
+        """
+        transcript = transcript or self.__transcript()
+
+        terms = self.__reduce(proof, public_witness, transcript)
+        if terms is None:
+            return False
+
+        points, scalars, (b, b_blinding, scalar_mul_g, scalar_mul_h) = terms
+
+        final_check = self.E.multiexp(
+            points + [self.B, self.B_blinding] + self.G + self.H,
+            scalars + [b, b_blinding] + scalar_mul_g + scalar_mul_h,
+        )
+
+        return final_check.is_zero()
+
+    def verify_batch(self, proofs: list, public_witnesses: list):
+        """
+        Verify many proofs of this R1CS at once with a single multi-exponentiation,
+        combining their final checks with random weights
+        """
+        assert len(proofs) == len(
+            public_witnesses
+        ), "Expected one public witness per proof"
+
+        p = self.E.order
+
+        points = []
+        scalars = []
+        b = 0
+        b_blinding = 0
+        scalar_mul_g = [0] * self.n
+        scalar_mul_h = [0] * self.n
+
+        for i, (proof, public_witness) in enumerate(zip(proofs, public_witnesses)):
+            terms = self.__reduce(proof, public_witness, self.__transcript())
+            if terms is None:
+                return False
+
+            proof_points, proof_scalars, shared_scalars = terms
+            proof_b, proof_b_blinding, proof_g, proof_h = shared_scalars
+
+            # the weight of the first proof can be 1
+            r = get_random_int(p) if i else 1
+
+            points += proof_points
+            scalars += [r * scalar % p for scalar in proof_scalars]
+
+            b += r * proof_b
+            b_blinding += r * proof_b_blinding
+            scalar_mul_g = scaled_add(scalar_mul_g, proof_g, r, p)
+            scalar_mul_h = scaled_add(scalar_mul_h, proof_h, r, p)
+
+        final_check = self.E.multiexp(
+            points + [self.B, self.B_blinding] + self.G + self.H,
+            scalars + [b % p, b_blinding % p] + scalar_mul_g + scalar_mul_h,
+        )
+
+        return final_check.is_zero()
@@ -1,7 +1,8 @@
 from ...utils import get_random_int, inner_product, split_list
-from ...polynomial import Polynomial
+from ...polynomial import Polynomial, hadamard_product, powers, scaled_add
 from ...ecc import CurvePointSize, EllipticCurve
-from ...transcript import FiatShamirTranscript, hash_to_curve
+from ...transcript import FiatShamirTranscript
+from ...generators import generators
 from . import ipa
 
 
@@ -29,9 +30,8 @@ class RangeProofObject:
         self.e_blinding = e_blinding
         self.ipa_proof = ipa_proof
 
-    def to_bytes(self) -> bytes:
+    def _tail_bytes(self) -> bytes:
         s = b""
-        s += bytes(self.V.to_bytes())
         s += bytes(self.A.to_bytes())
         s += bytes(self.S.to_bytes())
         s += bytes(self.T1.to_bytes())
@@ -43,31 +43,73 @@ class RangeProofObject:
 
         return s
 
-    @classmethod
-    def from_bytes(cls, s: bytes, crv="BN254"):
+    @staticmethod
+    def _parse_tail(s: bytes, crv="BN254"):
 
         E = EllipticCurve(crv)
         n = CurvePointSize[crv].value
 
         assert (len(s) - 160) % n == 0, "Invalid proof length"
 
-        point_s = split_list(s[: 5 * n], n)
-        field_s = split_list(s[5 * n : 5 * n + 32 * 3], 32)
-        ipa_s = s[5 * n + 32 * 3 :]
+        point_s = split_list(s[: 4 * n], n)
+        field_s = split_list(s[4 * n : 4 * n + 32 * 3], 32)
+        ipa_s = s[4 * n + 32 * 3 :]
 
-        assert len(point_s) == 5 and len(field_s) == 3, "Malformed proof structure"
+        assert len(point_s) == 4 and len(field_s) == 3, "Malformed proof structure"
 
-        V = E.from_hex(point_s[0].hex())
-        A = E.from_hex(point_s[1].hex())
-        S = E.from_hex(point_s[2].hex())
-        T1 = E.from_hex(point_s[3].hex())
-        T2 = E.from_hex(point_s[4].hex())
+        A = E.from_hex(point_s[0].hex())
+        S = E.from_hex(point_s[1].hex())
+        T1 = E.from_hex(point_s[2].hex())
+        T2 = E.from_hex(point_s[3].hex())
         t = int.from_bytes(field_s[0], "little")
         t_blinding = int.from_bytes(field_s[1], "little")
         e_blinding = int.from_bytes(field_s[2], "little")
         ipa_proof = ipa.InnerProductProof.from_bytes(ipa_s, crv)
 
-        return RangeProofObject(V, A, S, T1, T2, t, t_blinding, e_blinding, ipa_proof)
+        return A, S, T1, T2, t, t_blinding, e_blinding, ipa_proof
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.V.to_bytes()) + self._tail_bytes()
+
+    @classmethod
+    def from_bytes(cls, s: bytes, crv="BN254"):
+
+        E = EllipticCurve(crv)
+        n = CurvePointSize[crv].value
+
+        assert len(s) >= n, "Invalid proof length"
+
+        V = E.from_hex(s[:n].hex())
+
+        return RangeProofObject(V, *cls._parse_tail(s[n:], crv))
+
+
+class AggregatedRangeProofObject(RangeProofObject):
+    """
+    Range proof of several values sharing a single inner-product argument,
+    where `V` is the list of value commitments
+    """
+
+    def to_bytes(self) -> bytes:
+        s = len(self.V).to_bytes(4, "little")
+        for V in self.V:
+            s += bytes(V.to_bytes())
+
+        return s + self._tail_bytes()
+
+    @classmethod
+    def from_bytes(cls, s: bytes, crv="BN254"):
+
+        E = EllipticCurve(crv)
+        n = CurvePointSize[crv].value
+
+        assert len(s) >= 4, "Invalid proof length"
+        m = int.from_bytes(s[:4], "little")
+        assert len(s) >= 4 + m * n, "Invalid proof length"
+
+        V = [E.from_hex(point.hex()) for point in split_list(s[4 : 4 + m * n], n)]
+
+        return AggregatedRangeProofObject(V, *cls._parse_tail(s[4 + m * n :], crv))
 
 
 class RangeProof:
@@ -81,10 +123,40 @@ class RangeProof:
         assert bitsize < 2**32
         self.n = bitsize
         self.E = EllipticCurve(curve)
-        self.G = hash_to_curve(seed, b"G", curve, self.n)
-        self.H = hash_to_curve(seed, b"H", curve, self.n)
-        self.B = hash_to_curve(seed, b"B", curve, 1)
-        self.B_blinding = hash_to_curve(seed, b"Blinding", curve, 1)
+        self.seed = seed
+        self.G = generators(seed, b"G", curve, self.n)
+        self.H = generators(seed, b"H", curve, self.n)
+        self.B = generators(seed, b"B", curve, 1)[0]
+        self.B_blinding = generators(seed, b"Blinding", curve, 1)[0]
+        self.__digests = {}
+
+    def __generators(self, m: int):
+        if m == 1:
+            return self.G, self.H
+
+        # every generator set is a prefix of the larger ones,
+        # so the first n points are still self.G and self.H
+        G = generators(self.seed, b"G", self.E.name, m * self.n)
+        H = generators(self.seed, b"H", self.E.name, m * self.n)
+        return G, H
+
+    def __bind_generators(self, transcript, m: int, y: int):
+        """
+        Bind `G` and `H' = y^-i * H` of the inner-product argument through
+        the digest of `G` and `H`, computed once per number of values, and `y`
+        """
+        if m not in self.__digests:
+            self.__digests[m] = ipa.generators_digest(*self.__generators(m))
+
+        transcript.append(self.__digests[m])
+        transcript.append(y)
+
+    def __transcript(self, m: int):
+        label = self.n.to_bytes(32, "big")
+        if m > 1:
+            label += m.to_bytes(32, "big")
+
+        return FiatShamirTranscript(label, field=self.E.order)
 
     def __split_lr(self, data: list):
         l = []
@@ -95,83 +167,92 @@ class RangeProof:
 
         return l, r
 
-    def __delta(self, y, z):
-        sum_pow_2_y = (
-            sum([pow(y, i, self.E.order) for i in range(self.n)]) % self.E.order
-        )
-        z_pow_3 = pow(z, 3, self.E.order)
-        sum_2 = sum([pow(2, i, self.E.order) for i in range(self.n)]) % self.E.order
-        return (
-            ((z - pow(z, 2, self.E.order)) * sum_pow_2_y) - (z_pow_3 * sum_2)
-        ) % self.E.order
+    def __weighted_powers_of_two(self, z_pow: list):
+        """
+        Concatenation of `z^(2+j) * [1, 2, ..., 2^(n-1)]` for every value `j`
+        """
+        p = self.E.order
+        two_pow = powers(2, self.n, p)
+        zeros = [0] * self.n
 
-    def prove(self, v: int, transcript=None):
+        result = []
+        for z_j in z_pow:
+            result += scaled_add(zeros, two_pow, z_j, p)
 
-        transcript = transcript or FiatShamirTranscript(
-            self.n.to_bytes(32, "big"), field=self.E.order
-        )
+        return result
+
+    def __delta(self, y, z, m):
+        p = self.E.order
+        sum_pow_2_y = sum(powers(y, self.n * m, p)) % p
+        sum_z_pow = sum(powers(z, m + 3, p)[3:]) % p
+        sum_2 = (pow(2, self.n, p) - 1) % p
+        return (((z - pow(z, 2, p)) * sum_pow_2_y) - (sum_z_pow * sum_2)) % p
+
+    def __prove(self, values: list, transcript):
 
-        # bit vectors of v
-        a = [(v >> i) & 1 for i in range(self.n)]
+        m = len(values)
+        assert m > 0 and m & (m - 1) == 0, "Number of values must be a power of two"
+
+        p = self.E.order
+        nm = self.n * m
+        G, H = self.__generators(m)
+
+        # concatenated bit vectors of every value
+        a = [(v >> i) & 1 for v in values for i in range(self.n)]
         a_L, a_R = self.__split_lr(a)
 
-        s_L = [get_random_int(self.E.order) for _ in range(self.n)]
-        s_R = [get_random_int(self.E.order) for _ in range(self.n)]
+        s_L = [get_random_int(p) for _ in range(nm)]
+        s_R = [get_random_int(p) for _ in range(nm)]
 
-        a_blinding = get_random_int(self.E.order)
-        v_blinding = get_random_int(self.E.order)
-        s_blinding = get_random_int(self.E.order)
+        a_blinding = get_random_int(p)
+        v_blindings = [get_random_int(p) for _ in range(m)]
+        s_blinding = get_random_int(p)
 
-        V = v * self.B + v_blinding * self.B_blinding
+        V = [
+            v * self.B + v_blinding * self.B_blinding
+            for v, v_blinding in zip(values, v_blindings)
+        ]
         A = (
-            self.E.multiexp(self.G, a_L)
-            + self.E.multiexp(self.H, a_R)
+            self.E.multiexp(G, a_L)
+            + self.E.multiexp(H, a_R)
             + a_blinding * self.B_blinding
         )
         S = (
-            self.E.multiexp(self.G, s_L)
-            + self.E.multiexp(self.H, s_R)
+            self.E.multiexp(G, s_L)
+            + self.E.multiexp(H, s_R)
             + s_blinding * self.B_blinding
         )
 
-        transcript.append(V)
+        for V_j in V:
+            transcript.append(V_j)
         transcript.append(A)
         transcript.append(S)
 
         y = transcript.get_challenge_scalar()
         z = transcript.get_challenge_scalar()
 
-        l_0 = []
-        l_1 = []
-        r_0 = []
-        r_1 = []
-        exp_2 = 1
-        exp_y = 1
-        for i in range(self.n):
-            l_0.append((a_L[i] - z) % self.E.order)
-            l_1.append(s_L[i])
+        # value j is weighted by z^(2+j)
+        z_pow = powers(z, m + 2, p)[2:]
+        y_pow = powers(y, nm, p)
 
-            r_0.append((exp_y * (a_R[i] + z) + z * z * exp_2) % self.E.order)
-            r_1.append(exp_y * s_R[i] % self.E.order)
+        l_0 = [(bit - z) % p for bit in a_L]
+        l_1 = s_L
 
-            exp_y *= y
-            exp_2 += exp_2
-
-        l_vecpoly = []
-        r_vecpoly = []
-
-        p = self.E.order
-        for i in range(self.n):
-            l_vecpoly += [Polynomial([l_0[i], l_1[i]], p)]
-            r_vecpoly += [Polynomial([r_0[i], r_1[i]], p)]
+        r_0 = scaled_add(
+            self.__weighted_powers_of_two(z_pow),
+            hadamard_product(y_pow, [(bit + z) % p for bit in a_R], p),
+            1,
+            p,
+        )
+        r_1 = hadamard_product(y_pow, s_R, p)
 
-        t0 = inner_product(l_0, r_0, self.E.order)
-        t2 = inner_product(l_1, r_1, self.E.order)
+        t0 = inner_product(l_0, r_0, p)
+        t2 = inner_product(l_1, r_1, p)
 
-        l0_plus_l1 = [(a + b) % p for a, b in zip(l_0, l_1)]
-        r0_plus_r1 = [(a + b) % p for a, b in zip(r_0, r_1)]
+        l0_plus_l1 = scaled_add(l_0, l_1, 1, p)
+        r0_plus_r1 = scaled_add(r_0, r_1, 1, p)
 
-        t1 = (inner_product(l0_plus_l1, r0_plus_r1, self.E.order) - t0 - t2) % p
+        t1 = (inner_product(l0_plus_l1, r0_plus_r1, p) - t0 - t2) % p
 
         t_poly = Polynomial([t0, t1, t2], p)
 
@@ -185,11 +266,12 @@ class RangeProof:
 
         x = transcript.get_challenge_scalar()
 
-        l_list = [poly(x) for poly in l_vecpoly]
-        r_list = [poly(x) for poly in r_vecpoly]
+        l_list = scaled_add(l_0, l_1, x, p)
+        r_list = scaled_add(r_0, r_1, x, p)
         t = t_poly(x)
 
-        t_blinding_poly = Polynomial([z * z * v_blinding, t1_blinding, t2_blinding], p)
+        z_v_blinding = inner_product(z_pow, v_blindings, p)
+        t_blinding_poly = Polynomial([z_v_blinding, t1_blinding, t2_blinding], p)
         t_blinding = t_blinding_poly(x)
         e_blinding = (a_blinding + x * s_blinding) % p
 
@@ -201,24 +283,55 @@ class RangeProof:
 
         Q = w * self.B
 
-        ipa_prover = ipa.InnerProductArgument(self.n, self.E.name)
+        ipa_prover = ipa.InnerProductArgument(nm, self.E.name)
 
-        ipa_prover.G = self.G
-        ipa_prover.H = [pow(y, -i, p) * self.H[i] for i in range(self.n)]
+        ipa_prover.G = G
+        ipa_prover.H = self.E.batch_mul(H, powers(pow(y, -1, p), nm, p))
         ipa_prover.Q = Q
 
-        ipa_proof, _, _ = ipa_prover.prove(l_list, r_list, transcript)
+        self.__bind_generators(transcript, m, y)
+        ipa_proof, _, _ = ipa_prover.prove(
+            l_list, r_list, transcript, bind_generators=False
+        )
 
-        return RangeProofObject(V, A, S, T1, T2, t, t_blinding, e_blinding, ipa_proof)
+        return V, A, S, T1, T2, t, t_blinding, e_blinding, ipa_proof
 
-    def verify(self, proof: RangeProofObject, transcript=None):
+    def prove(self, v: int, transcript=None):
 
-        transcript = transcript or FiatShamirTranscript(
-            self.n.to_bytes(32, "big"), field=self.E.order
-        )
+        transcript = transcript or self.__transcript(1)
+
+        V, *rest = self.__prove([v], transcript)
+
+        return RangeProofObject(V[0], *rest)
+
+    def prove_aggregated(self, values: list, transcript=None):
+        """
+        Prove that every value of `values` lies in [0, 2^bitsize) with one
+        inner-product argument of size `len(values) * bitsize`.
+        The number of values must be a power of two.
+        """
+        transcript = transcript or self.__transcript(len(values))
+
+        return AggregatedRangeProofObject(*self.__prove(values, transcript))
+
+    def __reduce(self, V: list, proof: RangeProofObject, transcript):
+        """
+        Replay the transcript of `proof` and return the terms of its final
+        check, split into proof-specific `(points, scalars)` and the scalars
+        of the shared generators `(B, B_blinding, G, H)`,
+        or None if the proof is malformed
+        """
+        m = len(V)
+        p = self.E.order
+        nm = self.n * m
+
+        k = len(proof.ipa_proof.L)
+        if m == 0 or m & (m - 1) != 0 or 1 << k != nm:
+            return None
 
         transcript.reset()
-        transcript.append(proof.V)
+        for V_j in V:
+            transcript.append(V_j)
         transcript.append(proof.A)
         transcript.append(proof.S)
 
@@ -236,61 +349,39 @@ class RangeProof:
 
         w = transcript.get_challenge_scalar()
 
-        for g in self.G:
-            transcript.append(g)
-        for i, h in enumerate(self.H):
-            hprime = pow(y, -i, self.E.order) * h
-            transcript.append(hprime)
-
-        c = get_random_int(self.E.order)
-
-        k = len(proof.ipa_proof.L)
-        challenges = []
-        challenges_inv = []
-
-        all_inv = 1
-        for i in range(k):
-            transcript.append(proof.ipa_proof.L[i])
-            transcript.append(proof.ipa_proof.R[i])
+        y_inv_pow = powers(pow(y, -1, p), nm, p)
 
-            u = transcript.get_challenge_scalar()
+        self.__bind_generators(transcript, m, y)
 
-            challenges.append(pow(u, 2, self.E.order))
-            challenges_inv.append(pow(u, -2, self.E.order))
-            all_inv *= pow(u, -1, self.E.order)
+        c = get_random_int(p)
 
-        s = [all_inv]
-        for i in range(1, self.n):
-            lg_i = 32 - 1 - (32 - i.bit_length())
-            l = 1 << lg_i
+        u_list = []
+        for L, R in zip(proof.ipa_proof.L, proof.ipa_proof.R):
+            transcript.append(L)
+            transcript.append(R)
+            u_list.append(transcript.get_challenge_scalar())
 
-            u_lg_i_sq = challenges[(k - 1) - lg_i]
-            s.append(s[i - l] * u_lg_i_sq)
+        challenges, challenges_inv, s = ipa.challenge_scalars(u_list, p)
 
         a = proof.ipa_proof.a
         b = proof.ipa_proof.b
 
-        scalar_mul_g = [(-z - a * s[i]) % self.E.order for i in range(self.n)]
-        scalar_mul_h = []
+        z_pow = powers(z, m + 2, p)[2:]
 
-        for i in range(self.n):
-            s_inv = pow(s[i], -1, self.E.order)
-            rhs = z * z * pow(2, i, self.E.order) - b * s_inv
+        scalar_mul_g = [(-z - a * s_i) % p for s_i in s]
 
-            scalar_mul_h += [(z + pow(y, -i, self.E.order) * rhs) % self.E.order]
+        # y^-i * (z^(2+j) * 2^i - b * s_i^-1)
+        rhs = scaled_add(self.__weighted_powers_of_two(z_pow), s[::-1], p - b, p)
+        scalar_mul_h = [(z + h) % p for h in hadamard_product(y_inv_pow, rhs, p)]
 
         points = (
             [
                 proof.A,
                 proof.S,
-                proof.V,
                 proof.T1,
                 proof.T2,
-                self.B,
-                self.B_blinding,
             ]
-            + self.G
-            + self.H
+            + V
             + proof.ipa_proof.L
             + proof.ipa_proof.R
         )
@@ -299,19 +390,104 @@ class RangeProof:
             [
                 1,
                 x,
-                c * z * z % self.E.order,
-                c * x % self.E.order,
-                c * x * x % self.E.order,
-                (w * (proof.t - a * b) + c * (self.__delta(y, z) - proof.t))
-                % self.E.order,
-                (-proof.e_blinding - c * proof.t_blinding) % self.E.order,
+                c * x % p,
+                c * x * x % p,
             ]
-            + scalar_mul_g
-            + scalar_mul_h
+            + [c * z_j % p for z_j in z_pow]
             + challenges
             + challenges_inv
         )
 
-        final_check = self.E.multiexp(points, scalars)
+        shared_scalars = (
+            (w * (proof.t - a * b) + c * (self.__delta(y, z, m) - proof.t)) % p,
+            (-proof.e_blinding - c * proof.t_blinding) % p,
+            scalar_mul_g,
+            scalar_mul_h,
+        )
+
+        return points, scalars, shared_scalars
+
+    def __verify(self, V: list, proof: RangeProofObject, transcript):
+
+        terms = self.__reduce(V, proof, transcript)
+        if terms is None:
+            return False
+
+        points, scalars, (b, b_blinding, scalar_mul_g, scalar_mul_h) = terms
+        G, H = self.__generators(len(V))
+
+        final_check = self.E.multiexp(
+            points + [self.B, self.B_blinding] + G + H,
+            scalars + [b, b_blinding] + scalar_mul_g + scalar_mul_h,
+        )
+
+        return final_check.is_zero()
+
+    def verify(self, proof: RangeProofObject, transcript=None):
+
+        transcript = transcript or self.__transcript(1)
+
+        return self.__verify([proof.V], proof, transcript)
+
+    def verify_aggregated(self, proof: AggregatedRangeProofObject, transcript=None):
+
+        transcript = transcript or self.__transcript(len(proof.V))
+
+        return self.__verify(list(proof.V), proof, transcript)
+
+    def verify_batch(self, proofs: list, transcripts: list = None):
+        """
+        Verify many single or aggregated range proofs at once. The final
+        checks are combined with random weights into one multi-exponentiation
+        in which the scalars of the shared generators are summed.
+        """
+        transcripts = transcripts or [None] * len(proofs)
+        assert len(transcripts) == len(proofs), "Expected one transcript per proof"
+
+        p = self.E.order
+
+        points = []
+        scalars = []
+        b = 0
+        b_blinding = 0
+        scalar_mul_g = []
+        scalar_mul_h = []
+
+        for i, (proof, transcript) in enumerate(zip(proofs, transcripts)):
+            if isinstance(proof, AggregatedRangeProofObject):
+                V = list(proof.V)
+            else:
+                V = [proof.V]
+
+            transcript = transcript or self.__transcript(len(V))
+
+            terms = self.__reduce(V, proof, transcript)
+            if terms is None:
+                return False
+
+            proof_points, proof_scalars, shared_scalars = terms
+            proof_b, proof_b_blinding, proof_g, proof_h = shared_scalars
+
+            # the weight of the first proof can be 1
+            r = get_random_int(p) if i else 1
+
+            points += proof_points
+            scalars += [r * scalar % p for scalar in proof_scalars]
+
+            b += r * proof_b
+            b_blinding += r * proof_b_blinding
+
+            scalar_mul_g += [0] * (len(proof_g) - len(scalar_mul_g))
+            scalar_mul_h += [0] * (len(proof_h) - len(scalar_mul_h))
+            for j, (g, h) in enumerate(zip(proof_g, proof_h)):
+                scalar_mul_g[j] = (scalar_mul_g[j] + r * g) % p
+                scalar_mul_h[j] = (scalar_mul_h[j] + r * h) % p
+
+        G, H = self.__generators(len(scalar_mul_g) // self.n)
+
+        final_check = self.E.multiexp(
+            points + [self.B, self.B_blinding] + G + H,
+            scalars + [b % p, b_blinding % p] + scalar_mul_g + scalar_mul_h,
+        )
 
         return final_check.is_zero()
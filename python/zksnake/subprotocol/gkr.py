@@ -1,97 +1,16 @@
-from .sumcheck import Sumcheck, SumcheckPolynomial
+from .sumcheck import Sumcheck
 from ..arithmetization import LayeredCircuit
 from ..constant import BN254_SCALAR_FIELD
 from ..polynomial import (
-    MultilinearPolynomial,
+    DenseMultilinearPolynomial,
     Polynomial,
-    get_all_evaluation_points,
-    ifft,
+    VirtualPolynomial,
+    eq_table,
+    evaluate_polynomials,
 )
 from ..transcript import FiatShamirTranscript
 
 
-class GkrPolynomial(SumcheckPolynomial):
-    """
-    Multilinear Polynomial that is used at each sumcheck round in GKR protocol.
-
-    The polynomial is as follows:
-
-    $f(a,b,c) = add(a, b, c) * (W(b) + W(c)) + mul(a, b, c) * (W(b) * W(c))$
-    """
-
-    def __init__(self, n, p, add_i, mul_i, w_b, w_c):
-        super().__init__(n, p)
-        self.add_i = add_i
-        self.mul_i = mul_i
-        self.w_b = w_b
-        self.w_c = w_c
-
-    def to_evaluations(self):
-        evals = []
-
-        add_i = self.add_i.to_evaluations()
-        mul_i = self.mul_i.to_evaluations()
-        w_b = self.w_b.to_evaluations()
-        w_c = self.w_c.to_evaluations()
-
-        idx = 0
-        for b, value_b in enumerate(w_b):
-            for c, value_c in enumerate(w_c):
-                idx = (c << self.w_b.num_vars) | b
-                if add_i[idx] or mul_i[idx]:
-                    result = (
-                        add_i[idx] * (value_b + value_c)
-                        + mul_i[idx] * (value_b * value_c)
-                    ) % self.p
-                    evals.append(result)
-
-        return evals
-
-    def partial_evaluate(self, points):
-        b = points[: min(self.w_b.num_vars, len(points))]
-        c = points[self.w_b.num_vars :]
-        add_i = self.add_i.partial_evaluate(points)
-        mul_i = self.mul_i.partial_evaluate(points)
-        w_b = self.w_b.partial_evaluate(b)
-        w_c = self.w_c.partial_evaluate(c)
-
-        return GkrPolynomial(self.n, self.p, add_i, mul_i, w_b, w_c)
-
-    def evaluate(self, points):
-
-        assert len(points) == self.n
-        evaluated = self.partial_evaluate(points)
-
-        add_i = evaluated.add_i.to_evaluations()[0]
-        mul_i = evaluated.mul_i.to_evaluations()[0]
-        w_b = evaluated.w_b.to_evaluations()[0]
-        w_c = evaluated.w_c.to_evaluations()[0]
-
-        return (add_i * (w_b + w_c) + mul_i * (w_b * w_c)) % self.p
-
-    def to_univariate(self):
-
-        evals = []
-        roots = get_all_evaluation_points(3, self.p)
-        for i in roots:
-            s = sum(self.partial_evaluate([i]).to_evaluations()) % self.p
-            evals.append(s)
-
-        coeffs = ifft(evals, self.p)
-
-        return Polynomial(coeffs, self.p)
-
-    def first_round(self):
-        g1 = self.to_univariate()
-        return g1
-
-    def round_function(self, r):
-        fixed = self.partial_evaluate(r)
-        uni_poly = fixed.to_univariate()
-
-        return uni_poly
-
-
 class GKR:
     """
     GKR protocol
@@ -102,6 +21,10 @@ class GKR:
 
     The implementation follows original algorithm from Justin Thaler's
     "Proofs, Arguments, and Zero-Knowledge", section 4.6.
+    The sumcheck of each layer is proven in two phases, first over `b` then over `c`,
+    from tables accumulated gate by gate as in Libra
+    (Xie et al. 2019. *Libra: Succinct Zero-Knowledge Proofs with Optimal Prover Computation*),
+    so the prover time of each layer is linear in its number of gates.
     """
 
     def __init__(self, circuit: LayeredCircuit, field=BN254_SCALAR_FIELD):
@@ -109,81 +32,95 @@ class GKR:
         self.order = field
         self.depth = len(circuit.layers)
         self.wire_labels = self.circuit.get_wire_label()[::-1]
+        self.num_vars = [
+            max(1, (len(labels) - 1).bit_length()) for labels in self.wire_labels
+        ]
+        self.wiring = [self._wiring(i) for i in range(self.depth)]
 
-    def _add_i(self, i):
-        target_layer = self.circuit.layers[::-1][i]
-        next_layer_wire = self.wire_labels[i + 1]
-
-        non_zero_evals = []
-        for index, gate in enumerate(target_layer):
-            gate_type, in1, in2, _ = gate
-
-            if gate_type == "ADD":
-                a = index
-                b = next_layer_wire.index(in1)
-                c = next_layer_wire.index(in2)
-
-                non_zero_evals.append((a, b, c))
-
-        return non_zero_evals
-
-    def _mul_i(self, i):
+    def _wiring(self, i):
+        """
+        Return the wiring `(a, b, c)` of ADD gates and of MUL gates of layer `i`,
+        where `a` is the index of the gate output among the wires of layer `i`
+        and `b`, `c` are the indices of its inputs among the wires of layer `i + 1`
+        """
         target_layer = self.circuit.layers[::-1][i]
-        next_layer_wire = self.wire_labels[i + 1]
-
-        non_zero_evals = []
-        for index, gate in enumerate(target_layer):
-            gate_type, in1, in2, _ = gate
-
-            if gate_type == "MUL":
-                a = index
-                b = next_layer_wire.index(in1)
-                c = next_layer_wire.index(in2)
+        output_index = {label: j for j, label in enumerate(self.wire_labels[i])}
+        input_index = {label: j for j, label in enumerate(self.wire_labels[i + 1])}
 
-                non_zero_evals.append((a, b, c))
+        wiring = {"ADD": [], "MUL": []}
+        for gate_type, in1, in2, out in target_layer:
+            # outputs not used by the next layer are not wires of layer `i`
+            if out in output_index:
+                wiring[gate_type].append(
+                    (output_index[out], input_index[in1], input_index[in2])
+                )
 
-        return non_zero_evals
+        return wiring["ADD"], wiring["MUL"]
 
-    def _selector_polynomial(self, i, r):
-        num_vars_i = len(self.wire_labels[i])
-        num_vars_next_i = len(self.wire_labels[i + 1])
-        selector_num_vars = num_vars_i + num_vars_next_i * 2
+    def _wire_values(self, evaluation_layer, i):
+        """Dense multilinear extension `W` of the wire values of layer `i`"""
+        values = [evaluation_layer[label] for label in self.wire_labels[i]]
+        return DenseMultilinearPolynomial(self.num_vars[i], values, self.order)
 
-        add_i_evals = []
-        mul_i_evals = []
-
-        # index order of add_i(a, b, c) and mul_i(a, b, c) is reversed
-        # so it can be partially evaluated directly without permutating the variables order
-        for a, b, c in self._add_i(i):
-            index = c * (2**num_vars_next_i * 2**num_vars_i) + b * 2**num_vars_i + a
-            add_i_evals.append((index, 1))
+    def _selector_evaluations(self, i, eq_r, eq_b, eq_c):
+        """
+        Evaluate add_i(r, b, c) and mul_i(r, b, c) gate by gate,
+        as sums of eq(r, a) * eq(b, in1) * eq(c, in2) read from eq tables
+        """
+        return tuple(
+            sum(eq_r[a] * eq_b[in1] * eq_c[in2] for a, in1, in2 in gates) % self.order
+            for gates in self.wiring[i]
+        )
 
-        for a, b, c in self._mul_i(i):
-            index = c * (2**num_vars_next_i * 2**num_vars_i) + b * 2**num_vars_i + a
-            mul_i_evals.append((index, 1))
+    def _phase_polynomial(self, w, h_1, h_2):
+        """Build `W * h_1 + h_2` as a virtual polynomial, with `W` as its first table"""
+        n = w.num_vars
+        h_1 = DenseMultilinearPolynomial(n, [x % self.order for x in h_1], self.order)
+        h_2 = DenseMultilinearPolynomial(n, [x % self.order for x in h_2], self.order)
 
-        add_ext_i = MultilinearPolynomial(selector_num_vars, add_i_evals, self.order)
-        add_ext_i = add_ext_i.partial_evaluate(r)
+        poly = VirtualPolynomial(n, self.order)
+        poly.add_product([w, h_1], 1)
+        poly.add_product([h_2], 1)
 
-        mul_ext_i = MultilinearPolynomial(selector_num_vars, mul_i_evals, self.order)
-        mul_ext_i = mul_ext_i.partial_evaluate(r)
+        return poly
 
-        return add_ext_i, mul_ext_i
+    def _phase_one(self, i, w, eq_r):
+        """
+        Polynomial summed over `b` in the first phase of layer `i`:
+        `W(b) * h_1(b) + h_2(b)` where `h_1(b) = sum_c add(r, b, c) + mul(r, b, c) * W(c)`
+        and `h_2(b) = sum_c add(r, b, c) * W(c)` are accumulated gate by gate
+        """
+        values = w.to_evaluations()
+        h_1 = [0] * len(values)
+        h_2 = [0] * len(values)
 
-    def _sumcheck_polynomial(self, evaluation_layers, i, r):
+        add_gates, mul_gates = self.wiring[i]
+        for a, b, c in add_gates:
+            h_1[b] += eq_r[a]
+            h_2[b] += eq_r[a] * values[c]
+        for a, b, c in mul_gates:
+            h_1[b] += eq_r[a] * values[c]
 
-        w_evals = []
-        num_vars_next_i = len(self.wire_labels[i + 1])
+        return self._phase_polynomial(w, h_1, h_2)
 
-        for index, k in enumerate(self.wire_labels[i + 1]):
-            w_evals.append((index, evaluation_layers[i + 1][k]))
+    def _phase_two(self, i, w, eq_r, eq_u, w_u):
+        """
+        Polynomial summed over `c` in the second phase of layer `i`, once `b` is fixed to `u`:
+        `W(c) * g_1(c) + g_2(c)` where `g_1(c) = add(r, u, c) + mul(r, u, c) * W(u)`
+        and `g_2(c) = add(r, u, c) * W(u)` are accumulated gate by gate
+        """
+        g_1 = [0] * 2**w.num_vars
+        g_2 = [0] * 2**w.num_vars
 
-        add_ext_i, mul_ext_i = self._selector_polynomial(i, r)
-        w_i = MultilinearPolynomial(num_vars_next_i, w_evals, self.order)
+        add_gates, mul_gates = self.wiring[i]
+        for a, b, c in add_gates:
+            e = eq_r[a] * eq_u[b] % self.order
+            g_1[c] += e
+            g_2[c] += e * w_u
+        for a, b, c in mul_gates:
+            g_1[c] += eq_r[a] * eq_u[b] * w_u
 
-        return GkrPolynomial(
-            add_ext_i.num_vars, self.order, add_ext_i, mul_ext_i, w_i, w_i
-        )
+        return self._phase_polynomial(w, g_1, g_2)
 
     def _init_transcript(self, input_map, outputs, transcript=None):
         transcript = transcript or FiatShamirTranscript(b"gkr", field=self.order)
@@ -230,40 +167,46 @@ class GKR:
         outputs = []
         for i, (_, v) in enumerate(evaluation_layers[0].items()):
             outputs.append((i, v))
-        n = len(outputs)
-        w_0 = MultilinearPolynomial(max(1, n), outputs, self.order)
+        w_0 = self._wire_values(evaluation_layers[0], 0)
 
         # V sends random r0 and computes m0 = w(r0)
         transcript = self._init_transcript(input_map, outputs, transcript)
-        r = [transcript.get_challenge_scalar() for _ in range(n)]
+        r = [transcript.get_challenge_scalar() for _ in range(self.num_vars[0])]
         m = w_0.evaluate(r)
 
         for i in range(self.depth):
-            f = self._sumcheck_polynomial(evaluation_layers, i, r)
-            n_next = f.n // 2
-
-            # P and V apply sumcheck on the relation between W_0 and W_1
-            sumcheck = Sumcheck(f.n, self.order)
-            sum_claim, proof, challenges = sumcheck.prove_arbitrary(f, transcript)
+            w_i = self._wire_values(evaluation_layers[i + 1], i + 1)
+            sumcheck = Sumcheck(w_i.num_vars * 2, self.order)
+            eq_r = eq_table(r, self.order).to_evaluations()
+
+            # P and V apply sumcheck on the relation between W_i and W_{i+1},
+            # over the variables of b then over those of c
+            prover = self._phase_one(i, w_i, eq_r).sumcheck_prover()
+            sum_claim = prover.claimed_sum()
             assert sum_claim == m, "Wiring pattern of the circuit might be incorrect"
 
-            b = challenges[:n_next]
-            c = challenges[n_next:]
+            transcript.append(sum_claim)
+            proof, b = sumcheck.prove_rounds(prover, transcript)
+            z1 = prover.final_evaluations()[0]
+
+            eq_b = eq_table(b, self.order).to_evaluations()
+            prover = self._phase_two(i, w_i, eq_r, eq_b, z1).sumcheck_prover()
+            proof_c, c = sumcheck.prove_rounds(prover, transcript)
+            z2 = prover.final_evaluations()[0]
+            proof += proof_c
 
             l = [
                 Polynomial([b_val, (c_val - b_val) % self.order], self.order)
                 for b_val, c_val in zip(b, c)
             ]
-            q = self._restrict_to_line(f.w_b, b[::-1], c[::-1])
-            z1 = q(0)
-            z2 = q(1)
+            q = self._restrict_to_line(w_i, b[::-1], c[::-1])
+            assert q(0) == z1 and q(1) == z2
 
-            w_eval = (
-                f.add_i.evaluate(challenges) * (z1 + z2)
-                + f.mul_i.evaluate(challenges) * (z1 * z2)
-            ) % self.order
+            eq_c = eq_table(c, self.order).to_evaluations()
+            add_eval, mul_eval = self._selector_evaluations(i, eq_r, eq_b, eq_c)
+            w_eval = (add_eval * (z1 + z2) + mul_eval * (z1 * z2)) % self.order
 
-            assert w_eval == proof[-1](challenges[-1])
+            assert w_eval == proof[-1](c[-1])
 
             _ = [transcript.append(p.coeffs()) for p in proof]
             transcript.append(q.coeffs())
@@ -273,8 +216,8 @@ class GKR:
             sumcheck_proofs.append(proof)
 
             r = transcript.get_challenge_scalar()
-            l_r = [p(r) for p in l]
-            assert f.w_b.evaluate(l_r) == q(r)
+            l_r = evaluate_polynomials(l, r, self.order)
+            assert w_i.evaluate(l_r) == q(r)
 
             m = q(r)
             r = l_r
@@ -291,22 +234,25 @@ class GKR:
         If used as subprotocol, `transcript` must be supplied to ensure that the challenges are
         generated using previous protocol components.
         """
+        if len(output_map) != len(self.wire_labels[0]):
+            return False
+
         outputs = []
         for i, v in enumerate(output_map.values()):
             outputs.append((i, v))
-        n = len(outputs)
-        w = MultilinearPolynomial(max(1, n), outputs, self.order)
+        w = DenseMultilinearPolynomial(
+            self.num_vars[0], [v for _, v in outputs], self.order
+        )
 
         # V sends random r0 and computes m0 = w(r0)
         transcript = self._init_transcript(input_map, outputs, transcript)
-        r = [transcript.get_challenge_scalar() for _ in range(n)]
+        r = [transcript.get_challenge_scalar() for _ in range(self.num_vars[0])]
         m = w.evaluate(r)
 
         for i in range(self.depth):
-            add_ext_i, mul_ext_i = self._selector_polynomial(i, r)
-            n_next = add_ext_i.num_vars // 2
+            n_next = self.num_vars[i + 1]
 
-            sumcheck = Sumcheck(add_ext_i.num_vars, self.order)
+            sumcheck = Sumcheck(n_next * 2, self.order)
 
             round_proof = proofs[i]
             challenges = sumcheck.verify(m, round_proof[:-1], 2, transcript)
@@ -327,10 +273,11 @@ class GKR:
                 return False
 
             last_proof = round_proof[-2]
-            w_eval = (
-                add_ext_i.evaluate(challenges) * (z1 + z2)
-                + mul_ext_i.evaluate(challenges) * (z1 * z2)
-            ) % self.order
+            eq_r, eq_b, eq_c = [
+                eq_table(point, self.order).to_evaluations() for point in (r, b, c)
+            ]
+            add_eval, mul_eval = self._selector_evaluations(i, eq_r, eq_b, eq_c)
+            w_eval = (add_eval * (z1 + z2) + mul_eval * (z1 * z2)) % self.order
             if w_eval != last_proof(challenges[-1]):
                 return False
 
@@ -339,16 +286,13 @@ class GKR:
             transcript.append([z1, z2])
 
             r = transcript.get_challenge_scalar()
-            l_r = [p(r) for p in l]
+            l_r = evaluate_polynomials(l, r, self.order)
 
             m = q(r)
             r = l_r
 
-        inputs = []
-        for i, v in enumerate(input_map.values()):
-            inputs.append((i, v))
-
-        w_d = MultilinearPolynomial(len(inputs), inputs, self.order)
+        inputs = [input_map[label] for label in self.wire_labels[-1]]
+        w_d = DenseMultilinearPolynomial(self.num_vars[-1], inputs, self.order)
         if w_d.evaluate(r) != m:
             return False
 
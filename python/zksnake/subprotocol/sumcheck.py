@@ -1,11 +1,7 @@
 from typing import List
 
 from ..transcript import FiatShamirTranscript
-from ..polynomial import (
-    Polynomial,
-    get_all_evaluation_points,
-    ifft,
-)
+from ..polynomial import Polynomial, VirtualPolynomial
 
 
 class SumcheckPolynomial:
@@ -46,53 +42,73 @@ class Sumcheck:
         self.n = n
         self.order = order
 
-    def _to_univariate(self, mlpoly):
-        evals = []
-        roots = get_all_evaluation_points(3, self.order)
-        for i in roots:
-            s = sum(mlpoly.partial_evaluate([i]).to_evaluations()) % self.order
-            evals.append(s)
-
-        coeffs = ifft(evals, self.order)
-
-        return Polynomial(coeffs, self.order)
-
     def prove(self, mlpoly, transcript=None):
         """
         Prove sumcheck protocol from given simple multilinear polynomial `mlpoly`.
 
+        `mlpoly` can be either sparse or dense. The rounds run natively over
+        a dense evaluation table that is halved at every round, for a total cost of O(2^n).
+
         If used as subprotocol, `transcript` must be supplied to ensure that the challenges are
         generated using previous protocol components.
         """
 
         assert mlpoly.num_vars == self.n
 
-        sum_claim = sum(mlpoly.to_evaluations()) % self.order
+        poly = VirtualPolynomial(self.n, self.order)
+        poly.add_product([mlpoly], 1)
+
+        return self._prove_rounds(poly.sumcheck_prover(), transcript)
+
+    def prove_virtual(self, poly, transcript=None):
+        """
+        Prove sumcheck protocol from given `poly` instantiated by `VirtualPolynomial`,
+        a sum of products of multilinear polynomials.
+
+        Each round polynomial of degree `poly.degree` is evaluated natively
+        from the halved evaluation tables, so `poly.degree` is the degree bound
+        the verifier must use.
+
+        If used as subprotocol, `transcript` must be supplied to ensure that the challenges are
+        generated using previous protocol components.
+        """
+        assert poly.num_vars == self.n
+
+        return self._prove_rounds(poly.sumcheck_prover(), transcript)
+
+    def prove_rounds(self, prover, transcript):
+        """
+        Run every round of the native `prover` obtained from `VirtualPolynomial.sumcheck_prover`,
+        appending each round polynomial to `transcript` and fixing its variable
+        to the next challenge, without sending the sum claim.
+
+        A sumcheck over several groups of variables can then be proven one group
+        after the other, each with its own virtual polynomial, as long as the sum claim
+        is appended before the first group.
+        Return the round polynomials and the challenges.
+        """
         proof = []
         r_evals = []
 
-        transcript = transcript or FiatShamirTranscript(b"sumcheck", field=self.order)
-        transcript.append(sum_claim)
+        for _ in range(prover.num_vars):
+            uni_poly = Polynomial(prover.round_polynomial(), self.order)
 
-        for n_round in range(1, self.n + 1):
+            transcript.append(uni_poly.coeffs())
+            proof.append(uni_poly)
 
-            if n_round == 1:
-                uni_poly = self._to_univariate(mlpoly)
-            else:
-                r = transcript.get_challenge_scalar()
-                r_evals += [r]
+            r = transcript.get_challenge_scalar()
+            r_evals += [r]
+            prover.fix_variable(r)
 
-                poly = mlpoly.partial_evaluate(r_evals)
-                uni_poly = self._to_univariate(poly)
+        return proof, r_evals
 
-                assert proof[-1](r) == (uni_poly(0) + uni_poly(1)) % self.order
+    def _prove_rounds(self, prover, transcript):
+        sum_claim = prover.claimed_sum()
 
-            coeffs = uni_poly.coeffs()
-            transcript.append(coeffs)
-            proof.append(uni_poly)
+        transcript = transcript or FiatShamirTranscript(b"sumcheck", field=self.order)
+        transcript.append(sum_claim)
 
-        r = transcript.get_challenge_scalar()
-        r_evals += [r]
+        proof, r_evals = self.prove_rounds(prover, transcript)
 
         return sum_claim, proof, r_evals
 
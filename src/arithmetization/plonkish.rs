@@ -2,6 +2,40 @@ use super::symbolic::{ConstraintSystem, Equation, Node};
 use ark_ff::{One, Zero};
 use num_bigint::BigUint;
 use rayon::prelude::*;
+use std::collections::HashMap;
+
+/// Custom gates enabled on top of the vanilla `qL*a + qR*b + qO*c + qM*a*b + qC` gate
+struct CustomGates {
+    /// `qP * a^5`, a single row S-box
+    pow5: bool,
+    /// `qD * d` on a fourth wire, so that a row can add three variables
+    add4: bool,
+}
+
+impl CustomGates {
+    fn new(gates: &[String]) -> Self {
+        let mut custom_gates = CustomGates {
+            pow5: false,
+            add4: false,
+        };
+        for gate in gates {
+            match gate.as_str() {
+                "pow5" => custom_gates.pow5 = true,
+                "add4" => custom_gates.add4 = true,
+                _ => panic!("Unknown custom gate: {}", gate),
+            }
+        }
+        custom_gates
+    }
+
+    fn width(&self) -> usize {
+        if self.add4 {
+            4
+        } else {
+            3
+        }
+    }
+}
 
 fn transform(
     eq: &Node,
@@ -51,17 +85,82 @@ fn transform(
     }
 }
 
+/// Flatten a linear expression into `(variable, coefficient)` terms,
+/// return false if the expression is not linear
+fn linear_terms(
+    eq: &Node,
+    coeff: &BigUint,
+    terms: &mut Vec<(String, BigUint)>,
+    q_constant: &mut BigUint,
+    modulus: &BigUint,
+) -> bool {
+    match &eq.gate {
+        super::symbolic::Gate::Input(name) => {
+            terms.push((name.to_string(), coeff % modulus));
+            true
+        }
+        super::symbolic::Gate::Add(left, right) => {
+            linear_terms(left, coeff, terms, q_constant, modulus)
+                && linear_terms(right, coeff, terms, q_constant, modulus)
+        }
+        super::symbolic::Gate::Sub(left, right) => {
+            let neg_coeff = modulus - (coeff % modulus);
+            linear_terms(left, coeff, terms, q_constant, modulus)
+                && linear_terms(right, &neg_coeff, terms, q_constant, modulus)
+        }
+        super::symbolic::Gate::Mul(left, right) => match (&left.gate, &right.gate) {
+            (_, super::symbolic::Gate::Const(value)) => {
+                linear_terms(left, &(coeff * value), terms, q_constant, modulus)
+            }
+            (super::symbolic::Gate::Const(value), _) => {
+                linear_terms(right, &(coeff * value), terms, q_constant, modulus)
+            }
+            _ => false,
+        },
+        super::symbolic::Gate::Neg(left) => {
+            let neg_coeff = modulus - (coeff % modulus);
+            linear_terms(left, &neg_coeff, terms, q_constant, modulus)
+        }
+        super::symbolic::Gate::Const(val) => {
+            *q_constant = (q_constant.clone() + coeff * val) % modulus;
+            true
+        }
+        _ => false,
+    }
+}
+
+/// Lay a linear combination of three variables over the (a, b, d) wires
+fn consume_add4(
+    rhs: &Node,
+    lhs_constant: &BigUint,
+    modulus: &BigUint,
+) -> Option<([BigUint; 3], BigUint, [String; 3])> {
+    let mut terms = vec![];
+    let mut q_constant = lhs_constant.clone();
+    if !linear_terms(rhs, &BigUint::one(), &mut terms, &mut q_constant, modulus) || terms.len() != 3
+    {
+        return None;
+    }
+
+    let coeffs = [terms[0].1.clone(), terms[1].1.clone(), terms[2].1.clone()];
+    let wires = [terms[0].0.clone(), terms[1].0.clone(), terms[2].0.clone()];
+
+    Some((coeffs, q_constant, wires))
+}
+
 fn consume_constraint(
     constraint: &Equation,
-    public_input: &Vec<String>,
     modulus: &BigUint,
-) -> (BigUint, BigUint, BigUint, BigUint, BigUint, [String; 3]) {
+    custom_gates: &CustomGates,
+) -> (HashMap<String, BigUint>, Vec<String>) {
     let mut ql = BigUint::zero();
     let mut qr = BigUint::zero();
     let mut qo = BigUint::zero();
     let mut qm = BigUint::zero();
     let mut qc = BigUint::zero();
-    let mut w: [String; 3] = Default::default();
+    let mut qd = BigUint::zero();
+    let mut qp = BigUint::zero();
+    let mut w: [String; 4] = Default::default();
 
     let lhs = constraint.lhs.clone();
     let rhs = constraint.rhs.clone();
@@ -69,9 +168,7 @@ fn consume_constraint(
     if let super::symbolic::Gate::Const(left) = lhs.gate {
         qc = modulus - left;
     } else if let super::symbolic::Gate::Input(var) = lhs.gate {
-        if !public_input.contains(&var) {
-            qo = modulus - BigUint::one();
-        }
+        qo = modulus - BigUint::one();
         w[2] = var.to_string();
     } else {
         panic!(
@@ -80,6 +177,8 @@ fn consume_constraint(
         );
     }
 
+    let lhs_constant = qc.clone();
+
     match &rhs.gate {
         super::symbolic::Gate::Const(val) => {
             qc += val;
@@ -127,6 +226,19 @@ fn consume_constraint(
 
                 w[0] = touched_var[0].to_string();
                 w[1] = touched_var[1].to_string();
+            } else if let Some(([q_a, q_b, q_d], q_const, [w_a, w_b, w_d])) = custom_gates
+                .add4
+                .then(|| consume_add4(&rhs, &lhs_constant, modulus))
+                .flatten()
+            {
+                ql = q_a;
+                qr = q_b;
+                qd = q_d;
+                qc = q_const;
+
+                w[0] = w_a;
+                w[1] = w_b;
+                w[3] = w_d;
             } else {
                 panic!(
                     "More than two variables in single gate: {}",
@@ -167,14 +279,23 @@ fn consume_constraint(
                 qr = BigUint::zero();
             } else if var_mul == 2 {
                 ql %= modulus;
-                if public_input.contains(&touched_var[1]) {
-                    qr = BigUint::zero();
-                } else {
-                    qr = modulus - (qr % modulus);
-                }
+                qr = modulus - (qr % modulus);
 
                 w[0] = touched_var[0].to_string();
                 w[1] = touched_var[1].to_string();
+            } else if let Some(([q_a, q_b, q_d], q_const, [w_a, w_b, w_d])) = custom_gates
+                .add4
+                .then(|| consume_add4(&rhs, &lhs_constant, modulus))
+                .flatten()
+            {
+                ql = q_a;
+                qr = q_b;
+                qd = q_d;
+                qc = q_const;
+
+                w[0] = w_a;
+                w[1] = w_b;
+                w[3] = w_d;
             } else {
                 panic!(
                     "More than two variables in single gate: {}",
@@ -207,6 +328,13 @@ fn consume_constraint(
                 w[1] = touched_var[1].to_string();
 
                 qm = q_var % modulus;
+            } else if var_mul == 5
+                && custom_gates.pow5
+                && touched_var.iter().all(|var| var == &touched_var[0])
+            {
+                w[0] = touched_var[0].to_string();
+
+                qp = q_var % modulus;
             } else {
                 panic!(
                     "More than two variables in single gate: {}",
@@ -234,11 +362,7 @@ fn consume_constraint(
             if var_mul == 0 {
                 ql = BigUint::zero();
             } else {
-                if !public_input.contains(&touched_var[0]) {
-                    ql = modulus - (ql % modulus);
-                } else {
-                    ql = BigUint::zero();
-                }
+                ql = modulus - (ql % modulus);
 
                 w[0] = touched_var[0].to_string();
             }
@@ -249,58 +373,195 @@ fn consume_constraint(
         w.swap(1, 0);
     }
 
-    (ql, qr, qo, qm, qc, w)
-}
-
-fn copy_constraint(num_constraint: usize, witness: Vec<&String>) -> Vec<usize> {
-    let size = witness.len();
-    let padded_size = num_constraint.next_power_of_two() * 3;
+    let mut selectors = HashMap::from([
+        ("L".to_string(), ql),
+        ("R".to_string(), qr),
+        ("O".to_string(), qo),
+        ("M".to_string(), qm),
+        ("C".to_string(), qc),
+    ]);
+    if custom_gates.add4 {
+        selectors.insert("D".to_string(), qd);
+    }
+    if custom_gates.pow5 {
+        selectors.insert("P".to_string(), qp);
+    }
 
-    let mut padded_witness: Vec<String> = witness.into_iter().map(|s| s.to_string()).collect();
-    padded_witness.resize_with(padded_size, Default::default);
+    (selectors, w[..custom_gates.width()].to_vec())
+}
 
-    let w: Vec<&String> = (0..3)
-        .flat_map(|i| padded_witness.iter().skip(i).step_by(3))
-        .collect();
+/// Build the copy constraint permutation over the column-major positions of the padded rows,
+/// linking every position of a variable (by its interned id) into a single cycle
+fn copy_constraint(num_rows: usize, layout: &[usize], width: usize, num_vars: usize) -> Vec<usize> {
+    let n = num_rows.next_power_of_two();
+    let mut permutation: Vec<usize> = (0..n * width).collect();
 
-    let mut permutation: Vec<usize> = (0..padded_size).collect();
+    let mut first = vec![usize::MAX; num_vars + 1];
+    let mut last = vec![usize::MAX; num_vars + 1];
+    for col in 0..width {
+        for (row, &id) in layout.iter().skip(col).step_by(width).enumerate() {
+            if id == 0 {
+                continue;
+            }
 
-    let swaps: Vec<(usize, usize)> = (0..size)
-        .into_par_iter()
-        .filter_map(|i| {
-            if w[i].is_empty() {
-                return None;
+            let position = col * n + row;
+            if first[id] == usize::MAX {
+                first[id] = position;
+            } else {
+                permutation[last[id]] = position;
             }
-            (i + 1..size).find(|&j| w[i] == w[j]).map(|j| (i, j))
-        })
-        .collect();
+            last[id] = position;
+        }
+    }
 
-    for (i, j) in swaps {
-        permutation.swap(i, j);
+    // close the cycles
+    for id in 1..=num_vars {
+        if last[id] != usize::MAX {
+            permutation[last[id]] = first[id];
+        }
     }
 
     permutation
 }
 
-pub fn compile(
-    cs: &ConstraintSystem,
-) -> (
-    Vec<(BigUint, BigUint, BigUint, BigUint, BigUint, [String; 3])>,
+fn selector_names(custom_gates: &CustomGates, lookup: bool) -> Vec<&'static str> {
+    let mut names = vec!["L", "R", "O", "M", "C"];
+    if custom_gates.add4 {
+        names.push("D");
+    }
+    if custom_gates.pow5 {
+        names.push("P");
+    }
+    if lookup {
+        names.push("K");
+    }
+    names
+}
+
+/// Public input rows place the public variable on wire a with `qL = 1`,
+/// so that `a + PI = 0` binds it to the public input polynomial `PI = -value`
+/// while the wire stays in the copy cycle of every other occurrence of the variable
+fn consume_public(
+    var: &String,
+    custom_gates: &CustomGates,
+) -> (HashMap<String, BigUint>, Vec<String>) {
+    let selectors = HashMap::from([("L".to_string(), BigUint::one())]);
+
+    let mut w = vec![String::new(); custom_gates.width()];
+    w[0] = var.to_string();
+
+    (selectors, w)
+}
+
+/// Lookup rows place the looked up variable on wire a,
+/// the `K` selector holds the (1-based) id of the table
+fn consume_lookup(
+    var: &String,
+    table: usize,
+    custom_gates: &CustomGates,
+) -> (HashMap<String, BigUint>, Vec<String>) {
+    let selectors = HashMap::from([("K".to_string(), BigUint::from(table + 1))]);
+
+    let mut w = vec![String::new(); custom_gates.width()];
+    w[0] = var.to_string();
+
+    (selectors, w)
+}
+
+/// Compiled Plonkish constraints:
+/// - selector columns by name (with the `V` and `I` lookup table columns),
+/// - row-major witness layout, `width` interned variable ids per row (0 for an unused wire),
+/// - variable name of every id (starting from 1),
+/// - `(row, id)` of the public input rows, one per public variable at the top of the layout,
+/// - copy constraint permutation
+pub type CompiledPlonkish = (
+    HashMap<String, Vec<BigUint>>,
     Vec<usize>,
-) {
-    let mut witness = vec![];
-    let result: Vec<_> = cs
-        .constraints
-        .clone()
-        .into_par_iter()
+    Vec<String>,
+    Vec<(usize, usize)>,
+    Vec<usize>,
+);
+
+pub fn compile(cs: &ConstraintSystem, custom_gates: &[String]) -> CompiledPlonkish {
+    let custom_gates = CustomGates::new(custom_gates);
+    let width = custom_gates.width();
+    let lookup = !cs.lookup_tables.is_empty();
+
+    let mut result: Vec<_> = cs
+        .public_vars
+        .iter()
+        .map(|var| consume_public(var, &custom_gates))
+        .collect();
+    result.par_extend(
+        cs.constraints
+            .clone()
+            .into_par_iter()
+            .map(|constraint| consume_constraint(&constraint, &cs.modulus, &custom_gates)),
+    );
+
+    if lookup {
+        result.extend(
+            cs.lookups
+                .iter()
+                .map(|(var, index)| consume_lookup(var, *index, &custom_gates)),
+        );
+    }
+
+    // intern the variables in a single pass over the wires
+    let mut ids: HashMap<&str, usize> = HashMap::new();
+    let mut variables: Vec<String> = vec![];
+    let mut layout: Vec<usize> = Vec::with_capacity(result.len() * width);
+    for (_, wires) in result.iter() {
+        for wire in wires {
+            if wire.is_empty() {
+                layout.push(0);
+                continue;
+            }
+
+            let id = *ids.entry(wire.as_str()).or_insert_with(|| {
+                variables.push(wire.to_string());
+                variables.len()
+            });
+            layout.push(id);
+        }
+    }
+
+    let public_rows: Vec<(usize, usize)> = cs
+        .public_vars
+        .iter()
         .enumerate()
-        .map(|(_, constraint)| consume_constraint(&constraint, &cs.public_vars, &cs.modulus))
+        .map(|(row, var)| (row, ids[var.as_str()]))
         .collect();
-    result
+
+    // every table entry is tagged with the (1-based) id of its table
+    let (table_values, table_ids): (Vec<BigUint>, Vec<BigUint>) = cs
+        .lookup_tables
         .iter()
-        .for_each(|(_, _, _, _, _, w)| witness.extend(w));
+        .enumerate()
+        .flat_map(|(i, (_, values))| {
+            values
+                .iter()
+                .map(move |v| (v.clone(), BigUint::from(i + 1)))
+        })
+        .unzip();
+
+    let rows = result.len().max(table_values.len());
+    let permutation = copy_constraint(rows, &layout, width, variables.len());
 
-    let permutation = copy_constraint(cs.num_constraints(), witness);
+    let mut columns: HashMap<String, Vec<BigUint>> = selector_names(&custom_gates, lookup)
+        .into_iter()
+        .map(|name| {
+            let column = result
+                .iter_mut()
+                .map(|(selectors, _)| selectors.remove(name).unwrap_or_default())
+                .collect();
+            (name.to_string(), column)
+        })
+        .collect();
+    if lookup {
+        columns.insert("V".to_string(), table_values);
+        columns.insert("I".to_string(), table_ids);
+    }
 
-    (result, permutation)
+    (columns, layout, variables, public_rows, permutation)
 }
@@ -462,6 +462,8 @@ pub struct ConstraintSystem {
     assigned: HashSet<String>,
     pub inputs: Vec<String>,
     pub outputs: Vec<String>,
+    pub lookup_tables: Vec<(String, Vec<BigUint>)>,
+    pub lookups: Vec<(String, usize)>,
 }
 
 impl Default for ConstraintSystem {
@@ -475,6 +477,8 @@ impl Default for ConstraintSystem {
             assigned: HashSet::new(),
             inputs: vec![],
             outputs: vec![],
+            lookup_tables: vec![],
+            lookups: vec![],
         }
     }
 }
@@ -534,6 +538,8 @@ impl ConstraintSystem {
             assigned,
             inputs,
             outputs,
+            lookup_tables: vec![],
+            lookups: vec![],
         }
     }
 
@@ -555,6 +561,52 @@ impl ConstraintSystem {
         self.public_vars.clone()
     }
 
+    #[getter]
+    pub fn lookup_tables(&self) -> Vec<(String, Vec<BigUint>)> {
+        self.lookup_tables.clone()
+    }
+
+    pub fn num_lookups(&self) -> usize {
+        self.lookups.len()
+    }
+
+    pub fn add_lookup_table(&mut self, name: String, values: Vec<BigUint>) -> PyResult<()> {
+        if self.lookup_tables.iter().any(|(table, _)| table == &name) {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                "Lookup table {} already exists",
+                name
+            )));
+        }
+
+        let values = values.iter().map(|v| v % &self.modulus).collect();
+        self.lookup_tables.push((name, values));
+        Ok(())
+    }
+
+    pub fn add_lookup(&mut self, var: PyRef<Field>, table: String) -> PyResult<()> {
+        let index = self
+            .lookup_tables
+            .iter()
+            .position(|(name, _)| name == &table)
+            .ok_or_else(|| {
+                PyErr::new::<pyo3::exceptions::PyValueError, _>(format!(
+                    "Lookup table {} does not exist",
+                    table
+                ))
+            })?;
+
+        match &var.inner.gate {
+            Gate::Input(name) => {
+                self.add_var(&var.inner);
+                self.lookups.push((name.to_string(), index));
+                Ok(())
+            }
+            _ => Err(PyErr::new::<pyo3::exceptions::PyTypeError, _>(
+                "Invalid expression",
+            )),
+        }
+    }
+
     pub fn add_variable(&mut self, var: PyRef<Field>) {
         self.add_var(&var.inner);
     }
@@ -818,15 +870,19 @@ impl ConstraintSystem {
             Vec<(usize, usize, BigUint)>,
         )>,
     > {
+        if !self.lookups.is_empty() {
+            return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+                "Lookup constraints are not supported in R1CS",
+            ));
+        }
         Ok(compile(self))
     }
 
+    #[pyo3(signature = (custom_gates=Vec::new()))]
     pub fn compile_to_plonkish(
         &mut self,
-    ) -> PyResult<(
-        Vec<(BigUint, BigUint, BigUint, BigUint, BigUint, [String; 3])>,
-        Vec<usize>,
-    )> {
-        Ok(plonkish::compile(self))
+        custom_gates: Vec<String>,
+    ) -> PyResult<plonkish::CompiledPlonkish> {
+        Ok(plonkish::compile(self, &custom_gates))
     }
 }
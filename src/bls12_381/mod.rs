@@ -1,3 +1,4 @@
 pub mod curve;
 pub mod polynomial;
 pub mod mle;
+pub mod sumcheck;
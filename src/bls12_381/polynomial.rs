@@ -1,5 +1,5 @@
 use ark_bls12_381::Fr;
-use ark_ff::Zero;
+use ark_ff::{batch_inversion, Field, One, Zero};
 use ark_poly::{
     multivariate::{SparsePolynomial, SparseTerm, Term},
     polynomial::univariate::DensePolynomial,
@@ -488,6 +488,70 @@ impl Polynomial {
         }
     }
 
+    pub fn divide_by_linear(&self, z: BigUint) -> PyResult<(Polynomial, BigUint)> {
+        match &self.poly {
+            PolynomialKind::Univariate(poly) => {
+                let (quotient, evaluation) = ruffini(&poly.coeffs, Fr::from(z));
+                Ok((
+                    Polynomial {
+                        poly: PolynomialKind::Univariate(DensePolynomial::from_coefficients_vec(
+                            quotient,
+                        )),
+                        domain: self.domain,
+                    },
+                    evaluation.into(),
+                ))
+            }
+            PolynomialKind::Multivariate(_) => Err(pyo3::exceptions::PyTypeError::new_err(
+                format!("Can only divide univariate polynomial"),
+            )),
+        }
+    }
+
+    pub fn divide_by_vanishing_set(&self, points: Vec<BigUint>) -> PyResult<[Polynomial; 2]> {
+        match &self.poly {
+            PolynomialKind::Univariate(poly) => {
+                let points: Vec<Fr> = points.into_iter().map(Fr::from).collect();
+                let (quotient, remainder) = if poly.coeffs.len() <= points.len() {
+                    (vec![], poly.coeffs.clone())
+                } else {
+                    ruffini_many(poly.coeffs.clone(), &points)
+                };
+
+                Ok((
+                    Polynomial {
+                        poly: PolynomialKind::Univariate(DensePolynomial::from_coefficients_vec(
+                            quotient,
+                        )),
+                        domain: self.domain,
+                    },
+                    Polynomial {
+                        poly: PolynomialKind::Univariate(DensePolynomial::from_coefficients_vec(
+                            remainder,
+                        )),
+                        domain: self.domain,
+                    },
+                )
+                    .into())
+            }
+            PolynomialKind::Multivariate(_) => Err(pyo3::exceptions::PyTypeError::new_err(
+                format!("Can only divide univariate polynomial"),
+            )),
+        }
+    }
+
+    pub fn evaluate_many(&self, points: Vec<BigUint>) -> PyResult<Vec<BigUint>> {
+        match &self.poly {
+            PolynomialKind::Univariate(poly) => Ok(points
+                .into_par_iter()
+                .map(|point| DensePolynomial::evaluate(poly, &Fr::from(point)).into())
+                .collect()),
+            PolynomialKind::Multivariate(_) => Err(pyo3::exceptions::PyTypeError::new_err(
+                format!("Can only evaluate univariate polynomial at many points"),
+            )),
+        }
+    }
+
     pub fn __call__<'py>(&self, point: &Bound<'py, PyAny>) -> PyResult<BigUint> {
         match &self.poly {
             PolynomialKind::Univariate(poly) => {
@@ -515,6 +579,77 @@ impl Polynomial {
     }
 }
 
+/// Divide `coeffs` by `(X - z)` with Ruffini's rule,
+/// returning the quotient and the remainder, i.e. the evaluation at `z`.
+fn ruffini(coeffs: &[Fr], z: Fr) -> (Vec<Fr>, Fr) {
+    let mut quotient = vec![Fr::zero(); coeffs.len().saturating_sub(1)];
+    let mut acc = Fr::zero();
+    for i in (0..coeffs.len()).rev() {
+        acc = acc * z + coeffs[i];
+        if i > 0 {
+            quotient[i - 1] = acc;
+        }
+    }
+    (quotient, acc)
+}
+
+/// Divide `coeffs` by `(X - points[0]) * ... * (X - points[k-1])` in place,
+/// one Ruffini pass per point. Requires more coefficients than points.
+///
+/// After the `j`-th pass, `coeffs[j]` holds the remainder of that division and
+/// `coeffs[j + 1..]` the running quotient, so the remainder of the whole division is
+/// `r_0 + (X - z_0) * (r_1 + (X - z_1) * (r_2 + ...))`, expanded at the end in O(k^2).
+fn ruffini_many(mut coeffs: Vec<Fr>, points: &[Fr]) -> (Vec<Fr>, Vec<Fr>) {
+    let n = coeffs.len();
+    for (j, z) in points.iter().enumerate() {
+        for i in (j..n - 1).rev() {
+            let carry = coeffs[i + 1] * z;
+            coeffs[i] += carry;
+        }
+    }
+
+    let k = points.len();
+    let quotient = coeffs.split_off(k);
+
+    let mut remainder: Vec<Fr> = vec![];
+    for j in (0..k).rev() {
+        // remainder = remainder * (X - z_j) + r_j
+        let mut next = vec![Fr::zero(); remainder.len() + 1];
+        for (i, c) in remainder.iter().enumerate() {
+            next[i + 1] += c;
+            next[i] -= *c * points[j];
+        }
+        next[0] += coeffs[j];
+        remainder = next;
+    }
+
+    (quotient, remainder)
+}
+
+#[pyfunction]
+pub fn evaluate_polynomials<'py>(
+    polys: Vec<PyRef<'py, Polynomial>>,
+    point: BigUint,
+) -> PyResult<Vec<BigUint>> {
+    let mut univariates: Vec<&DensePolynomial<Fr>> = Vec::with_capacity(polys.len());
+    for p in polys.iter() {
+        match &p.poly {
+            PolynomialKind::Univariate(poly) => univariates.push(poly),
+            PolynomialKind::Multivariate(_) => {
+                return Err(pyo3::exceptions::PyTypeError::new_err(format!(
+                    "Can only evaluate univariate polynomials at one point"
+                )))
+            }
+        }
+    }
+
+    let point = Fr::from(point);
+    Ok(univariates
+        .par_iter()
+        .map(|poly| DensePolynomial::evaluate(poly, &point).into())
+        .collect())
+}
+
 #[pyfunction]
 pub fn get_evaluation_point(domain: usize, i: usize) -> PyResult<BigUint> {
     let domain: GeneralEvaluationDomain<Fr> = EvaluationDomain::new(domain).unwrap();
@@ -633,6 +768,87 @@ pub fn mul_over_evaluation_domain(
     Ok(result.into_iter().map(Into::into).collect())
 }
 
+/// Powers vectors are filled in chunks of this size, each chunk starting from
+/// one exponentiation and continuing by repeated multiplication.
+const POWERS_CHUNK_SIZE: usize = 1024;
+
+#[pyfunction]
+pub fn powers(base: BigUint, n: usize) -> PyResult<Vec<BigUint>> {
+    let base = Fr::from(base);
+    let mut result = vec![Fr::zero(); n];
+    result
+        .par_chunks_mut(POWERS_CHUNK_SIZE)
+        .enumerate()
+        .for_each(|(i, chunk)| {
+            let mut acc = base.pow([(i * POWERS_CHUNK_SIZE) as u64]);
+            for x in chunk.iter_mut() {
+                *x = acc;
+                acc *= base;
+            }
+        });
+
+    Ok(result.par_iter().map(|x| x.to_owned().into()).collect())
+}
+
+#[pyfunction]
+pub fn scaled_add(a: Vec<BigUint>, b: Vec<BigUint>, x: BigUint) -> PyResult<Vec<BigUint>> {
+    if a.len() != b.len() {
+        return Err(PyValueError::new_err("Vectors must have the same length"));
+    }
+
+    let x = Fr::from(x);
+    Ok(a.into_par_iter()
+        .zip(b)
+        .map(|(a, b)| (Fr::from(a) + x * Fr::from(b)).into())
+        .collect())
+}
+
+/// Weighted sum of the challenge vectors of IPA openings, `sum(w_k * s_k)`, where
+/// `s_k[i] = prod(u_j^bit)` holds the coefficients of `prod(1 + u_j * X^(2^(m-1-j)))`
+/// for the round challenges `u_j` of the k-th opening
+#[pyfunction]
+pub fn combine_challenge_vectors(
+    weights: Vec<BigUint>,
+    challenges: Vec<Vec<BigUint>>,
+) -> PyResult<Vec<BigUint>> {
+    if weights.len() != challenges.len() {
+        return Err(PyValueError::new_err("Vectors must have the same length"));
+    }
+
+    let rounds = challenges.first().map_or(0, |u| u.len());
+    if challenges.iter().any(|u| u.len() != rounds) {
+        return Err(PyValueError::new_err(
+            "Openings must have the same number of rounds",
+        ));
+    }
+
+    let n = 1 << rounds;
+    let result = weights
+        .into_par_iter()
+        .zip(challenges)
+        .map(|(weight, u)| {
+            // doubling from the last challenge puts it on the lowest bit of the index
+            let mut s = Vec::with_capacity(n);
+            s.push(Fr::from(weight));
+            for u in u.into_iter().rev() {
+                let u = Fr::from(u);
+                let size = s.len();
+                s.extend_from_within(..size);
+                s[size..].par_iter_mut().for_each(|x| *x *= u);
+            }
+            s
+        })
+        .reduce(
+            || vec![Fr::zero(); n],
+            |mut acc, s| {
+                acc.par_iter_mut().zip(s).for_each(|(a, s)| *a += s);
+                acc
+            },
+        );
+
+    Ok(result.into_par_iter().map(|x| x.into()).collect())
+}
+
 #[pyfunction]
 pub fn evaluate_vanishing_polynomial(n: usize, tau: BigUint) -> PyResult<BigUint> {
     let domain: GeneralEvaluationDomain<Fr> = EvaluationDomain::new(n)
@@ -650,3 +866,238 @@ pub fn evaluate_lagrange_coefficients(n: usize, tau: BigUint) -> PyResult<Vec<Bi
     let coeffs = EvaluationDomain::evaluate_all_lagrange_coefficients(&domain, Fr::from(tau));
     Ok(coeffs.par_iter().map(|x| x.to_owned().into()).collect())
 }
+
+/// Point sets up to this size are handled by direct O(n^2) Lagrange interpolation
+/// and Horner evaluation instead of a subproduct tree.
+const SMALL_POINT_SET: usize = 32;
+
+#[pyclass]
+#[derive(Clone, Debug)]
+pub struct SubproductTree {
+    points: Vec<Fr>,
+    levels: Vec<Vec<DensePolynomial<Fr>>>,
+}
+
+#[pymethods]
+impl SubproductTree {
+    #[new]
+    pub fn new(points: Vec<BigUint>) -> PyResult<Self> {
+        let points: Vec<Fr> = points.into_iter().map(Fr::from).collect();
+        let levels = if points.len() > SMALL_POINT_SET {
+            subproduct_levels(&points)
+        } else {
+            vec![]
+        };
+
+        Ok(SubproductTree { points, levels })
+    }
+
+    pub fn __len__(&self) -> usize {
+        self.points.len()
+    }
+
+    pub fn vanishing_poly(&self) -> Polynomial {
+        match self.levels.last() {
+            Some(root) => univariate(root[0].clone()),
+            None => univariate(DensePolynomial::from_coefficients_vec(vanishing_coeffs(
+                &self.points,
+            ))),
+        }
+    }
+
+    pub fn interpolate(&self, values: Vec<BigUint>) -> PyResult<Polynomial> {
+        if values.len() != self.points.len() {
+            return Err(PyValueError::new_err(
+                "Number of values must match number of points",
+            ));
+        }
+
+        let values: Vec<Fr> = values.into_iter().map(Fr::from).collect();
+        let poly = match self.points.len() {
+            0 => DensePolynomial::zero(),
+            1 => DensePolynomial::from_coefficients_vec(values),
+            _ if self.levels.is_empty() => direct_interpolate(&self.points, &values)?,
+            _ => tree_interpolate(&self.levels, &values)?,
+        };
+
+        Ok(univariate(poly))
+    }
+
+    pub fn evaluate(&self, polynomial: &Polynomial) -> PyResult<Vec<BigUint>> {
+        match &polynomial.poly {
+            PolynomialKind::Univariate(poly) => {
+                let evals: Vec<Fr> =
+                    if self.levels.is_empty() || poly.coeffs.len() <= SMALL_POINT_SET {
+                        self.points
+                            .par_iter()
+                            .map(|x| DensePolynomial::evaluate(poly, x))
+                            .collect()
+                    } else {
+                        remainder_tree_evaluate(&self.levels, poly)
+                    };
+
+                Ok(evals.into_iter().map(|e| e.into()).collect())
+            }
+            PolynomialKind::Multivariate(_) => Err(pyo3::exceptions::PyTypeError::new_err(
+                format!("Can only evaluate univariate polynomial"),
+            )),
+        }
+    }
+}
+
+fn univariate(poly: DensePolynomial<Fr>) -> Polynomial {
+    let size = poly.coeffs.len().max(1);
+    Polynomial {
+        poly: PolynomialKind::Univariate(poly),
+        domain: EvaluationDomain::new(size).unwrap(),
+    }
+}
+
+/// Coefficients of `(X - points[0]) * ... * (X - points[n-1])`
+fn vanishing_coeffs(points: &[Fr]) -> Vec<Fr> {
+    let mut coeffs = vec![Fr::one()];
+    for x in points {
+        let mut next = vec![Fr::zero(); coeffs.len() + 1];
+        for (i, c) in coeffs.iter().enumerate() {
+            next[i + 1] += c;
+            next[i] -= *c * x;
+        }
+        coeffs = next;
+    }
+    coeffs
+}
+
+/// Level 0 holds the linear factors `(X - x_i)` and every next level the pairwise
+/// products of the level below (an odd node is carried up as is), up to the root
+/// `prod(X - x_i)`. Node `j` of a level has nodes `2j` and `2j + 1` below it.
+fn subproduct_levels(points: &[Fr]) -> Vec<Vec<DensePolynomial<Fr>>> {
+    let leaves: Vec<DensePolynomial<Fr>> = points
+        .iter()
+        .map(|x| DensePolynomial::from_coefficients_vec(vec![-*x, Fr::one()]))
+        .collect();
+
+    let mut levels = vec![leaves];
+    while levels.last().unwrap().len() > 1 {
+        let below = levels.last().unwrap();
+        let next: Vec<DensePolynomial<Fr>> = below
+            .par_chunks(2)
+            .map(|pair| match pair {
+                [left, right] => left * right,
+                _ => pair[0].clone(),
+            })
+            .collect();
+        levels.push(next);
+    }
+    levels
+}
+
+fn poly_mod(poly: &DensePolynomial<Fr>, divisor: &DensePolynomial<Fr>) -> DensePolynomial<Fr> {
+    if poly.coeffs.len() < divisor.coeffs.len() {
+        return poly.clone();
+    }
+
+    let (_, remainder) =
+        univariate::DenseOrSparsePolynomial::divide_with_q_and_r(&poly.into(), &divisor.into())
+            .unwrap();
+    remainder
+}
+
+/// Evaluate `poly` at every leaf of the tree by reducing it modulo each node, top-down
+fn remainder_tree_evaluate(
+    levels: &[Vec<DensePolynomial<Fr>>],
+    poly: &DensePolynomial<Fr>,
+) -> Vec<Fr> {
+    let top = levels.len() - 1;
+    let mut remainders = vec![poly_mod(poly, &levels[top][0])];
+    for level in levels[..top].iter().rev() {
+        remainders = (0..level.len())
+            .into_par_iter()
+            .map(|i| poly_mod(&remainders[i / 2], &level[i]))
+            .collect();
+    }
+
+    remainders
+        .into_iter()
+        .map(|r| r.coeffs.first().copied().unwrap_or(Fr::zero()))
+        .collect()
+}
+
+fn inverse_weights(mut weights: Vec<Fr>) -> PyResult<Vec<Fr>> {
+    if weights.iter().any(|w| w.is_zero()) {
+        return Err(PyValueError::new_err(
+            "Interpolation points must be distinct",
+        ));
+    }
+    batch_inversion(&mut weights);
+    Ok(weights)
+}
+
+/// Lagrange interpolation with the barycentric weights `1 / prod_{j != i}(x_i - x_j)`
+/// inverted in one batch and every basis polynomial `prod(X - x_j) / (X - x_i)`
+/// obtained by synthetic division of the vanishing polynomial.
+fn direct_interpolate(points: &[Fr], values: &[Fr]) -> PyResult<DensePolynomial<Fr>> {
+    let n = points.len();
+    let weights: Vec<Fr> = (0..n)
+        .map(|i| {
+            (0..n)
+                .filter(|&j| j != i)
+                .fold(Fr::one(), |acc, j| acc * (points[i] - points[j]))
+        })
+        .collect();
+    let weights = inverse_weights(weights)?;
+
+    let vanishing = vanishing_coeffs(points);
+    let mut coeffs = vec![Fr::zero(); n];
+    for i in 0..n {
+        let (basis, _) = ruffini(&vanishing, points[i]);
+        let scale = weights[i] * values[i];
+        for (c, b) in coeffs.iter_mut().zip(basis.iter()) {
+            *c += scale * b;
+        }
+    }
+
+    Ok(DensePolynomial::from_coefficients_vec(coeffs))
+}
+
+/// Interpolation over the subproduct tree: the barycentric weights are
+/// `1 / m'(x_i)` for the root `m`, evaluated with the remainder tree and inverted in
+/// one batch, then `sum(c_i * m / (X - x_i))` is assembled bottom-up as
+/// `P_left * node_right + P_right * node_left`.
+fn tree_interpolate(
+    levels: &[Vec<DensePolynomial<Fr>>],
+    values: &[Fr],
+) -> PyResult<DensePolynomial<Fr>> {
+    let top = levels.len() - 1;
+    let root = &levels[top][0];
+    let derivative = DensePolynomial::from_coefficients_vec(
+        root.coeffs
+            .iter()
+            .enumerate()
+            .skip(1)
+            .map(|(i, c)| *c * Fr::from(i as u64))
+            .collect(),
+    );
+    let weights = inverse_weights(remainder_tree_evaluate(levels, &derivative))?;
+
+    let mut polys: Vec<DensePolynomial<Fr>> = weights
+        .iter()
+        .zip(values.iter())
+        .map(|(w, y)| DensePolynomial::from_coefficients_vec(vec![*w * y]))
+        .collect();
+
+    for nodes in levels[..top].iter() {
+        polys = (0..(polys.len() + 1) / 2)
+            .into_par_iter()
+            .map(|j| {
+                let (left, right) = (2 * j, 2 * j + 1);
+                if right < polys.len() {
+                    &(&polys[left] * &nodes[right]) + &(&polys[right] * &nodes[left])
+                } else {
+                    polys[left].clone()
+                }
+            })
+            .collect();
+    }
+
+    Ok(polys.pop().unwrap())
+}
@@ -7,13 +7,16 @@ use ark_ec::{
 };
 use ark_ff::{
     field_hashers::{DefaultFieldHasher, HashToField},
-    QuadExtField, Zero,
+    Field, QuadExtField, Zero,
 };
 use ark_serialize::{CanonicalDeserialize, CanonicalSerialize};
 use bn254_hash2curve::hash2g1::HashToG1;
 use num_bigint::BigUint;
 use pyo3::{exceptions::PyValueError, prelude::*, types::PyType};
-use rayon::iter::{IntoParallelIterator, ParallelIterator};
+use rayon::iter::{
+    IndexedParallelIterator, IntoParallelIterator, IntoParallelRefIterator,
+    IntoParallelRefMutIterator, ParallelIterator,
+};
 use sha2::Sha256;
 
 #[pyclass]
@@ -164,6 +167,28 @@ impl PointG1 {
         })
     }
 
+    #[classmethod]
+    pub fn hash_to_curve_indexed<'py>(
+        _cls: &Bound<'py, PyType>,
+        dst: Vec<u8>,
+        seed: Vec<u8>,
+        start: usize,
+        count: usize,
+    ) -> PyResult<Vec<Self>> {
+        let points = (start..start + count)
+            .into_par_iter()
+            .map(|i| {
+                let mut data = seed.clone();
+                data.extend_from_slice(&(i as u64).to_le_bytes());
+                PointG1 {
+                    point: HashToG1(&data, &dst).into(),
+                }
+            })
+            .collect();
+
+        Ok(points)
+    }
+
     #[classmethod]
     pub fn from_x<'py>(_cls: &Bound<'py, PyType>, x: BigUint) -> PyResult<Self> {
         match G1Affine::get_point_from_x_unchecked(x.into(), true) {
@@ -412,6 +437,192 @@ impl PointG12 {
     pub fn __eq__(&self, other: Self) -> bool {
         self.point == other.point
     }
+
+    pub fn is_identity(&self) -> PyResult<bool> {
+        Ok(self.point.is_zero())
+    }
+}
+
+fn inner_product(a: &[Fr], b: &[Fr]) -> Fr {
+    a.par_iter()
+        .zip(b.par_iter())
+        .map(|(x, y)| *x * y)
+        .reduce(Fr::zero, |x, y| x + y)
+}
+
+/// Run the folding rounds of an inner product argument over G1.
+///
+/// Every round halves `generators`, `a` and `b` in place and commits to the
+/// cross terms `L = <G_lo, a_hi> + <a_hi, b_lo> * u` and `R = <G_hi, a_lo> + <a_lo, b_hi> * u`.
+/// `challenge(L, R)` is called once per round to obtain the round challenge `x`
+/// from the caller's transcript, and the vectors are folded as
+/// `a' = a_lo + x^-1 * a_hi`, `b' = b_lo + x * b_hi` and `G' = G_lo + x * G_hi`.
+///
+/// Returns the `L` and `R` of every round and the final folded `a`.
+#[pyfunction]
+pub fn ipa_fold_g1<'py>(
+    generators: Vec<PointG1>,
+    a: Vec<BigUint>,
+    b: Vec<BigUint>,
+    u: PointG1,
+    challenge: &Bound<'py, PyAny>,
+) -> PyResult<(Vec<PointG1>, Vec<PointG1>, BigUint)> {
+    let n = generators.len();
+    if a.len() != n || b.len() != n {
+        return Err(PyValueError::new_err(
+            "Generators and vectors must have the same length",
+        ));
+    }
+    if !n.is_power_of_two() {
+        return Err(PyValueError::new_err(
+            "Vector length must be a power of two",
+        ));
+    }
+
+    let projective: Vec<G1Projective> = generators.iter().map(|g| g.point).collect();
+    let mut g = G1Projective::normalize_batch(&projective);
+    let mut a: Vec<Fr> = a.into_par_iter().map(Fr::from).collect();
+    let mut b: Vec<Fr> = b.into_par_iter().map(Fr::from).collect();
+
+    let mut l_list = vec![];
+    let mut r_list = vec![];
+    while a.len() > 1 {
+        let half = a.len() / 2;
+
+        let (a_lo, a_hi) = a.split_at(half);
+        let (b_lo, b_hi) = b.split_at(half);
+        let (g_lo, g_hi) = g.split_at(half);
+
+        let l = G1Projective::msm_unchecked(g_lo, a_hi) + u.point * inner_product(a_hi, b_lo);
+        let r = G1Projective::msm_unchecked(g_hi, a_lo) + u.point * inner_product(a_lo, b_hi);
+
+        let x: BigUint = challenge
+            .call1((PointG1 { point: l }, PointG1 { point: r }))?
+            .extract()?;
+        let x = Fr::from(x);
+        let x_inv = x
+            .inverse()
+            .ok_or_else(|| PyValueError::new_err("Challenge must be non-zero"))?;
+
+        let folded: Vec<G1Projective> = g_lo
+            .par_iter()
+            .zip(g_hi.par_iter())
+            .map(|(lo, hi)| G1Projective::from(*lo) + *hi * x)
+            .collect();
+        g = G1Projective::normalize_batch(&folded);
+
+        let (a_lo, a_hi) = a.split_at_mut(half);
+        a_lo.par_iter_mut()
+            .zip(a_hi.par_iter())
+            .for_each(|(lo, hi)| *lo += *hi * x_inv);
+        a.truncate(half);
+
+        let (b_lo, b_hi) = b.split_at_mut(half);
+        b_lo.par_iter_mut()
+            .zip(b_hi.par_iter())
+            .for_each(|(lo, hi)| *lo += *hi * x);
+        b.truncate(half);
+
+        l_list.push(PointG1 { point: l });
+        r_list.push(PointG1 { point: r });
+    }
+
+    Ok((l_list, r_list, a[0].into()))
+}
+
+fn fold_points(points: &[G1Affine], lo_scale: Fr, hi_scale: Fr) -> Vec<G1Affine> {
+    let (lo, hi) = points.split_at(points.len() / 2);
+    let folded: Vec<G1Projective> = lo
+        .par_iter()
+        .zip(hi.par_iter())
+        .map(|(lo, hi)| *lo * lo_scale + *hi * hi_scale)
+        .collect();
+    G1Projective::normalize_batch(&folded)
+}
+
+fn fold_scalars(v: &mut Vec<Fr>, lo_scale: Fr, hi_scale: Fr) {
+    let half = v.len() / 2;
+    let (lo, hi) = v.split_at_mut(half);
+    lo.par_iter_mut()
+        .zip(hi.par_iter())
+        .for_each(|(lo, hi)| *lo = *lo * lo_scale + *hi * hi_scale);
+    v.truncate(half);
+}
+
+/// Run the folding rounds of a Bulletproofs inner product argument over G1.
+///
+/// Every round halves `g`, `h`, `a` and `b` in place and commits to the cross terms
+/// `L = <G_hi, a_lo> + <H_lo, b_hi> + <a_lo, b_hi> * q` and
+/// `R = <G_lo, a_hi> + <H_hi, b_lo> + <a_hi, b_lo> * q`.
+/// `challenge(L, R)` is called once per round to obtain the round challenge `u`
+/// from the caller's transcript, and the vectors are folded as
+/// `a' = u * a_lo + u^-1 * a_hi`, `b' = u^-1 * b_lo + u * b_hi`,
+/// `G' = u^-1 * G_lo + u * G_hi` and `H' = u * H_lo + u^-1 * H_hi`.
+///
+/// Returns the `L` and `R` of every round and the final folded `a` and `b`.
+#[pyfunction]
+pub fn bulletproofs_fold_g1<'py>(
+    g: Vec<PointG1>,
+    h: Vec<PointG1>,
+    a: Vec<BigUint>,
+    b: Vec<BigUint>,
+    q: PointG1,
+    challenge: &Bound<'py, PyAny>,
+) -> PyResult<(Vec<PointG1>, Vec<PointG1>, BigUint, BigUint)> {
+    let n = g.len();
+    if h.len() != n || a.len() != n || b.len() != n {
+        return Err(PyValueError::new_err(
+            "Generators and vectors must have the same length",
+        ));
+    }
+    if !n.is_power_of_two() {
+        return Err(PyValueError::new_err(
+            "Vector length must be a power of two",
+        ));
+    }
+
+    let projective: Vec<G1Projective> = g.iter().map(|p| p.point).collect();
+    let mut g = G1Projective::normalize_batch(&projective);
+    let projective: Vec<G1Projective> = h.iter().map(|p| p.point).collect();
+    let mut h = G1Projective::normalize_batch(&projective);
+    let mut a: Vec<Fr> = a.into_par_iter().map(Fr::from).collect();
+    let mut b: Vec<Fr> = b.into_par_iter().map(Fr::from).collect();
+
+    let mut l_list = vec![];
+    let mut r_list = vec![];
+    while a.len() > 1 {
+        let half = a.len() / 2;
+
+        let (a_lo, a_hi) = a.split_at(half);
+        let (b_lo, b_hi) = b.split_at(half);
+        let (g_lo, g_hi) = g.split_at(half);
+        let (h_lo, h_hi) = h.split_at(half);
+
+        let l = G1Projective::msm_unchecked(g_hi, a_lo)
+            + G1Projective::msm_unchecked(h_lo, b_hi)
+            + q.point * inner_product(a_lo, b_hi);
+        let r = G1Projective::msm_unchecked(g_lo, a_hi)
+            + G1Projective::msm_unchecked(h_hi, b_lo)
+            + q.point * inner_product(a_hi, b_lo);
+
+        let u: BigUint = challenge
+            .call1((PointG1 { point: l }, PointG1 { point: r }))?
+            .extract()?;
+        let u = Fr::from(u);
+        let u_inv = u
+            .inverse()
+            .ok_or_else(|| PyValueError::new_err("Challenge must be non-zero"))?;
+
+        g = fold_points(&g, u_inv, u);
+        h = fold_points(&h, u, u_inv);
+        fold_scalars(&mut a, u, u_inv);
+        fold_scalars(&mut b, u_inv, u);
+
+        l_list.push(PointG1 { point: l });
+        r_list.push(PointG1 { point: r });
+    }
+
+    Ok((l_list, r_list, a[0].into(), b[0].into()))
 }
 
 #[pyfunction]
@@ -1,9 +1,12 @@
 use ark_bn254::Fr;
-use ark_ff::Zero;
+use ark_ff::{One, Zero};
 use ark_poly::{MultilinearExtension, SparseMultilinearExtension};
 
 use num_bigint::BigUint;
-use pyo3::{prelude::*, types::PyType};
+use pyo3::{exceptions::PyValueError, prelude::*, types::PyType};
+use rayon::prelude::*;
+
+use super::sumcheck::{bit_reversed_table, fix_lowest_variable, AnyMultilinearPolynomial};
 
 // https://crypto.stackexchange.com/questions/84398/multilinear-extension-polynomial-compute-the-coefficients-of-the-expanded-polyn
 fn ext(a: Vec<Fr>) -> Vec<Fr> {
@@ -22,12 +25,103 @@ fn ext(a: Vec<Fr>) -> Vec<Fr> {
     l_result
 }
 
+/// Evaluations of eq(x, r) over boolean hypercube in natural order, `r[0]` being
+/// the lowest variable, built by doubling the table in parallel once per variable
+pub(crate) fn eq_evaluations(r: &[Fr]) -> Vec<Fr> {
+    let mut table = Vec::with_capacity(1 << r.len());
+    table.push(Fr::one());
+
+    for r_i in r {
+        let size = table.len();
+        table.resize(2 * size, Fr::zero());
+        let (lo, hi) = table.split_at_mut(size);
+        lo.par_iter_mut()
+            .zip(hi.par_iter_mut())
+            .for_each(|(lo, hi)| {
+                *hi = *lo * r_i;
+                *lo -= *hi;
+            });
+    }
+
+    table
+}
+
+fn dot_product(a: &[Fr], b: &[Fr]) -> Fr {
+    a.par_iter().zip(b.par_iter()).map(|(a, b)| *a * b).sum()
+}
+
+/// eq(x, r) as a dense multilinear polynomial, in O(2^n)
+#[pyfunction]
+pub fn eq_table(r: Vec<BigUint>) -> DenseMultilinearPolynomial {
+    // doubling over the variables in reverse order lays the table out in bit-reversed order
+    let r: Vec<Fr> = r.into_iter().rev().map(Fr::from).collect();
+    DenseMultilinearPolynomial {
+        num_vars: r.len(),
+        table: eq_evaluations(&r),
+    }
+}
+
+/// Evaluate every multilinear polynomial of `mles` at the same `point`,
+/// as dot products against a single eq(x, point) table
+#[pyfunction]
+pub fn evaluate_multilinear_polynomials<'py>(
+    mles: Vec<AnyMultilinearPolynomial<'py>>,
+    point: Vec<BigUint>,
+) -> PyResult<Vec<BigUint>> {
+    if mles.iter().any(|mle| mle.num_vars() != point.len()) {
+        return Err(PyValueError::new_err(
+            "Evaluation requires points to be in the same size as the number of variables",
+        ));
+    }
+
+    let point: Vec<Fr> = point.into_iter().map(Fr::from).collect();
+
+    // sparse evaluations are indexed in natural order, dense tables in bit-reversed order
+    let natural = mles
+        .iter()
+        .any(|mle| matches!(mle, AnyMultilinearPolynomial::Sparse(_)))
+        .then(|| eq_evaluations(&point));
+    let reversed = mles
+        .iter()
+        .any(|mle| matches!(mle, AnyMultilinearPolynomial::Dense(_)))
+        .then(|| {
+            let point: Vec<Fr> = point.iter().rev().copied().collect();
+            eq_evaluations(&point)
+        });
+
+    Ok(mles
+        .iter()
+        .map(|mle| match mle {
+            AnyMultilinearPolynomial::Sparse(mle) => {
+                let eq = natural.as_ref().unwrap();
+                mle.borrow()
+                    .mle
+                    .evaluations
+                    .par_iter()
+                    .map(|(i, e)| eq[*i] * e)
+                    .sum::<Fr>()
+                    .into()
+            }
+            AnyMultilinearPolynomial::Dense(mle) => {
+                dot_product(mle.borrow().table(), reversed.as_ref().unwrap()).into()
+            }
+        })
+        .collect())
+}
+
 #[pyclass]
 #[derive(Clone, Debug, PartialEq)]
 pub struct MultilinearPolynomial {
     mle: SparseMultilinearExtension<Fr>,
 }
 
+impl MultilinearPolynomial {
+    /// Evaluations over the whole boolean hypercube, in natural order
+    pub(crate) fn dense_evaluations(&self) -> Vec<Fr> {
+        SparseMultilinearExtension::to_evaluations(&self.mle)
+    }
+}
+
 #[pymethods]
 impl MultilinearPolynomial {
     #[new]
@@ -100,6 +194,15 @@ impl MultilinearPolynomial {
         ext(evals).into_iter().map(Into::into).collect()
     }
 
+    /// Sum of the evaluations over boolean hypercube
+    pub fn sum(&self) -> BigUint {
+        self.mle.evaluations.values().sum::<Fr>().into()
+    }
+
+    pub fn to_dense(&self) -> DenseMultilinearPolynomial {
+        DenseMultilinearPolynomial::from_evaluations(self.mle.num_vars, &self.dense_evaluations())
+    }
+
     pub fn swap(&self, a: usize, b: usize, k: usize) -> PyResult<Self> {
         Ok(MultilinearPolynomial {
             mle: SparseMultilinearExtension::relabel(&self.mle, a, b, k),
@@ -141,3 +244,172 @@ impl MultilinearPolynomial {
         })
     }
 }
+
+/// Multilinear polynomial given by its dense evaluations over boolean hypercube.
+///
+/// The evaluations are stored contiguously in bit-reversed order, so that fixing
+/// the lowest variable folds the upper half of the table into its lower half in place.
+#[pyclass]
+#[derive(Clone, Debug, PartialEq)]
+pub struct DenseMultilinearPolynomial {
+    num_vars: usize,
+    table: Vec<Fr>,
+}
+
+impl DenseMultilinearPolynomial {
+    pub(crate) fn from_evaluations(num_vars: usize, evaluations: &[Fr]) -> Self {
+        DenseMultilinearPolynomial {
+            num_vars,
+            table: bit_reversed_table(evaluations, num_vars),
+        }
+    }
+
+    /// Bit-reversed evaluation table
+    pub(crate) fn table(&self) -> &[Fr] {
+        &self.table
+    }
+
+    /// Evaluations over the whole boolean hypercube, in natural order
+    pub(crate) fn dense_evaluations(&self) -> Vec<Fr> {
+        bit_reversed_table(&self.table, self.num_vars)
+    }
+
+    fn check_same_size(&self, other: &Self) -> PyResult<()> {
+        if self.num_vars != other.num_vars {
+            return Err(PyValueError::new_err(
+                "Multilinear polynomials must have the same number of variables",
+            ));
+        }
+        Ok(())
+    }
+}
+
+#[pymethods]
+impl DenseMultilinearPolynomial {
+    /// Construct from `evaluations` over boolean hypercube in natural order,
+    /// padded with zeroes up to `2^num_vars`
+    #[new]
+    pub fn new(num_vars: usize, evaluations: Vec<BigUint>) -> PyResult<Self> {
+        if evaluations.len() > 1 << num_vars {
+            return Err(PyValueError::new_err(
+                "Number of evaluations exceeds the size of boolean hypercube",
+            ));
+        }
+
+        let mut evaluations: Vec<Fr> = evaluations.into_par_iter().map(Fr::from).collect();
+        evaluations.resize(1 << num_vars, Fr::zero());
+
+        Ok(DenseMultilinearPolynomial::from_evaluations(
+            num_vars,
+            &evaluations,
+        ))
+    }
+
+    #[getter]
+    pub fn num_vars(&self) -> usize {
+        self.num_vars
+    }
+
+    pub fn evaluate(&self, points: Vec<BigUint>) -> PyResult<BigUint> {
+        if points.len() != self.num_vars {
+            return Err(PyValueError::new_err(
+                "Evaluation requires points to be in the same size as the number of variables",
+            ));
+        }
+
+        let points: Vec<Fr> = points.into_iter().rev().map(Fr::from).collect();
+        Ok(dot_product(&self.table, &eq_evaluations(&points)).into())
+    }
+
+    /// Fix the lowest variables to `points` in place
+    pub fn fix_variables(&mut self, points: Vec<BigUint>) -> PyResult<()> {
+        if points.len() > self.num_vars {
+            return Err(PyValueError::new_err(
+                "Number of points exceeds the number of variables",
+            ));
+        }
+
+        for r in points {
+            fix_lowest_variable(&mut self.table, Fr::from(r));
+        }
+        self.num_vars = self.table.len().trailing_zeros() as usize;
+        Ok(())
+    }
+
+    pub fn partial_evaluate(&self, points: Vec<BigUint>) -> PyResult<Self> {
+        let mut result = self.clone();
+        result.fix_variables(points)?;
+        Ok(result)
+    }
+
+    /// Sum of the evaluations over boolean hypercube
+    pub fn sum(&self) -> BigUint {
+        self.table.par_iter().sum::<Fr>().into()
+    }
+
+    pub fn to_evaluations(&self) -> Vec<BigUint> {
+        self.dense_evaluations()
+            .into_par_iter()
+            .map(Into::into)
+            .collect()
+    }
+
+    pub fn to_coefficients(&self) -> Vec<BigUint> {
+        ext(self.dense_evaluations())
+            .into_iter()
+            .map(Into::into)
+            .collect()
+    }
+
+    pub fn to_sparse(&self) -> MultilinearPolynomial {
+        let evals: Vec<(usize, Fr)> = self
+            .dense_evaluations()
+            .into_iter()
+            .enumerate()
+            .filter(|(_, e)| !e.is_zero())
+            .collect();
+        MultilinearPolynomial {
+            mle: SparseMultilinearExtension::from_evaluations(self.num_vars, &evals),
+        }
+    }
+
+    pub fn __str__(&self) -> String {
+        format!(
+            "DenseMLPolynomial(num_vars={:?}, evaluations={:?})",
+            &self.num_vars,
+            &self.to_evaluations()
+        )
+    }
+
+    pub fn __repr__(&self) -> String {
+        self.__str__()
+    }
+
+    pub fn __add__(&self, other: Self) -> PyResult<Self> {
+        self.check_same_size(&other)?;
+        let table = self
+            .table
+            .par_iter()
+            .zip(other.table.par_iter())
+            .map(|(a, b)| *a + b)
+            .collect();
+        Ok(DenseMultilinearPolynomial {
+            num_vars: self.num_vars,
+            table,
+        })
+    }
+
+    pub fn __sub__(&self, other: Self) -> PyResult<Self> {
+        self.check_same_size(&other)?;
+        let table = self
+            .table
+            .par_iter()
+            .zip(other.table.par_iter())
+            .map(|(a, b)| *a - b)
+            .collect();
+        Ok(DenseMultilinearPolynomial {
+            num_vars: self.num_vars,
+            table,
+        })
+    }
+}
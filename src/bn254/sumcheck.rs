@@ -0,0 +1,381 @@
+use ark_bn254::Fr;
+use ark_ff::{Field, One, Zero};
+use num_bigint::BigUint;
+use pyo3::{exceptions::PyValueError, prelude::*};
+use rayon::prelude::*;
+
+use super::mle::{DenseMultilinearPolynomial, MultilinearPolynomial};
+
+/// Position of the hypercube index `i` in a table of `num_vars` variables
+/// stored in bit-reversed order.
+pub fn bit_reverse(i: usize, num_vars: usize) -> usize {
+    if num_vars == 0 {
+        return 0;
+    }
+    i.reverse_bits() >> (usize::BITS as usize - num_vars)
+}
+
+/// Reorder evaluations over the boolean hypercube into bit-reversed order,
+/// so that the lowest variable selects the lower or upper half of the table.
+pub fn bit_reversed_table(evaluations: &[Fr], num_vars: usize) -> Vec<Fr> {
+    (0..evaluations.len())
+        .into_par_iter()
+        .map(|i| evaluations[bit_reverse(i, num_vars)])
+        .collect()
+}
+
+/// Fix the lowest variable of a bit-reversed table to `r`, halving it in place.
+pub fn fix_lowest_variable(table: &mut Vec<Fr>, r: Fr) {
+    let half = table.len() / 2;
+    let (lo, hi) = table.split_at_mut(half);
+    lo.par_iter_mut()
+        .zip(hi.par_iter())
+        .for_each(|(lo, hi)| *lo += r * (*hi - *lo));
+    table.truncate(half);
+}
+
+/// Coefficients of the polynomial of degree `evals.len() - 1`
+/// taking the value `evals[t]` at every `t = 0, 1, ..., evals.len() - 1`
+fn interpolate_consecutive(evals: &[Fr]) -> Vec<Fr> {
+    let n = evals.len();
+    let mut coeffs = vec![Fr::zero(); n];
+    for i in 0..n {
+        // prod_{j != i} (X - j) / (i - j)
+        let mut basis = vec![Fr::one()];
+        let mut denominator = Fr::one();
+        for j in (0..n).filter(|j| *j != i) {
+            let j = Fr::from(j as u64);
+            let mut next = vec![Fr::zero(); basis.len() + 1];
+            for (k, c) in basis.iter().enumerate() {
+                next[k + 1] += c;
+                next[k] -= *c * j;
+            }
+            basis = next;
+            denominator *= Fr::from(i as u64) - j;
+        }
+
+        let scale = evals[i] * denominator.inverse().unwrap();
+        for (c, b) in coeffs.iter_mut().zip(basis) {
+            *c += scale * b;
+        }
+    }
+
+    coeffs
+}
+
+/// `sum(coeff * prod(values[j] for j in indices))` over every product
+fn combine(products: &[(Fr, Vec<usize>)], values: &[Fr]) -> Fr {
+    products
+        .iter()
+        .map(|(coeff, indices)| indices.iter().fold(*coeff, |acc, j| acc * values[*j]))
+        .sum()
+}
+
+/// Sparse or dense multilinear polynomial
+#[derive(FromPyObject)]
+pub enum AnyMultilinearPolynomial<'py> {
+    Sparse(Bound<'py, MultilinearPolynomial>),
+    Dense(Bound<'py, DenseMultilinearPolynomial>),
+}
+
+impl<'py> AnyMultilinearPolynomial<'py> {
+    fn as_any(&self) -> &Bound<'py, PyAny> {
+        match self {
+            AnyMultilinearPolynomial::Sparse(mle) => mle.as_any(),
+            AnyMultilinearPolynomial::Dense(mle) => mle.as_any(),
+        }
+    }
+
+    pub(crate) fn num_vars(&self) -> usize {
+        match self {
+            AnyMultilinearPolynomial::Sparse(mle) => mle.borrow().num_vars(),
+            AnyMultilinearPolynomial::Dense(mle) => mle.borrow().num_vars(),
+        }
+    }
+
+    /// Evaluations over boolean hypercube in bit-reversed order
+    fn table(&self) -> Vec<Fr> {
+        match self {
+            AnyMultilinearPolynomial::Sparse(mle) => {
+                bit_reversed_table(&mle.borrow().dense_evaluations(), self.num_vars())
+            }
+            AnyMultilinearPolynomial::Dense(mle) => mle.borrow().table().to_vec(),
+        }
+    }
+}
+
+/// Sum of products of multilinear polynomials, `sum(c_k * prod(f_j for j in S_k))`.
+///
+/// Every multilinear polynomial is stored once as a dense bit-reversed table,
+/// and products refer to them by index.
+#[pyclass]
+#[derive(Debug)]
+pub struct VirtualPolynomial {
+    num_vars: usize,
+    tables: Vec<Vec<Fr>>,
+    sources: Vec<PyObject>,
+    products: Vec<(Fr, Vec<usize>)>,
+}
+
+#[pymethods]
+impl VirtualPolynomial {
+    #[new]
+    pub fn new(num_vars: usize) -> Self {
+        VirtualPolynomial {
+            num_vars,
+            tables: vec![],
+            sources: vec![],
+            products: vec![],
+        }
+    }
+
+    #[getter]
+    pub fn num_vars(&self) -> usize {
+        self.num_vars
+    }
+
+    /// Highest number of multilinear polynomials in a single product
+    #[getter]
+    pub fn degree(&self) -> usize {
+        self.products
+            .iter()
+            .map(|(_, indices)| indices.len())
+            .max()
+            .unwrap_or(0)
+    }
+
+    /// Add the product `coeff * mles[0] * mles[1] * ...`.
+    /// A multilinear polynomial already used by another product is shared with it,
+    /// unless it is a dense polynomial whose table has changed since, e.g. with
+    /// `fix_variables`.
+    pub fn add_product<'py>(
+        &mut self,
+        mles: Vec<AnyMultilinearPolynomial<'py>>,
+        coeff: BigUint,
+    ) -> PyResult<()> {
+        let mut indices = Vec::with_capacity(mles.len());
+        for mle in mles {
+            if mle.num_vars() != self.num_vars {
+                return Err(PyValueError::new_err(
+                    "Multilinear polynomials must have the same number of variables",
+                ));
+            }
+
+            // sparse polynomials are immutable, dense ones can be fixed in place
+            let source = mle.as_any();
+            let shared = self
+                .sources
+                .iter()
+                .zip(&self.tables)
+                .position(|(s, table)| {
+                    s.as_ptr() == source.as_ptr()
+                        && match &mle {
+                            AnyMultilinearPolynomial::Sparse(_) => true,
+                            AnyMultilinearPolynomial::Dense(mle) => {
+                                mle.borrow().table() == table.as_slice()
+                            }
+                        }
+                });
+            if let Some(i) = shared {
+                indices.push(i);
+                continue;
+            }
+
+            self.tables.push(mle.table());
+            self.sources.push(source.clone().unbind());
+            indices.push(self.tables.len() - 1);
+        }
+
+        self.products.push((Fr::from(coeff), indices));
+        Ok(())
+    }
+
+    pub fn evaluate(&self, point: Vec<BigUint>) -> PyResult<BigUint> {
+        if point.len() != self.num_vars {
+            return Err(PyValueError::new_err(
+                "Evaluation requires points to be in the same size as the number of variables",
+            ));
+        }
+
+        let point: Vec<Fr> = point.into_iter().map(Fr::from).collect();
+        let values: Vec<Fr> = self
+            .tables
+            .par_iter()
+            .map(|table| {
+                let mut table = table.clone();
+                for r in &point {
+                    fix_lowest_variable(&mut table, *r);
+                }
+                table[0]
+            })
+            .collect();
+
+        Ok(combine(&self.products, &values).into())
+    }
+
+    /// Native sumcheck prover of this polynomial
+    pub fn sumcheck_prover(&self) -> SumcheckProver {
+        SumcheckProver {
+            num_vars: self.num_vars,
+            degree: self.degree().max(1),
+            tables: self.tables.clone(),
+            products: self.products.clone(),
+        }
+    }
+}
+
+/// Linear-time sumcheck prover of a sum of products of multilinear polynomials.
+///
+/// Every multilinear polynomial is kept in a dense bit-reversed table. Each round
+/// evaluates the round polynomial of degree `d` at `0, 1, ..., d` in parallel
+/// directly from the two halves of the tables, and fixing the lowest variable
+/// folds the upper half of every table into its lower half in place,
+/// so the whole protocol costs O(d * 2^n) field operations per product.
+#[pyclass]
+#[derive(Clone, Debug)]
+pub struct SumcheckProver {
+    num_vars: usize,
+    degree: usize,
+    tables: Vec<Vec<Fr>>,
+    products: Vec<(Fr, Vec<usize>)>,
+}
+
+#[pymethods]
+impl SumcheckProver {
+    /// Sumcheck prover of a single multilinear polynomial
+    /// given by its dense `evaluations` over boolean hypercube
+    #[new]
+    pub fn new(evaluations: Vec<BigUint>) -> PyResult<Self> {
+        if !evaluations.len().is_power_of_two() {
+            return Err(PyValueError::new_err(
+                "Number of evaluations must be a power of two",
+            ));
+        }
+
+        let num_vars = evaluations.len().trailing_zeros() as usize;
+        let evaluations: Vec<Fr> = evaluations.into_par_iter().map(Fr::from).collect();
+
+        Ok(SumcheckProver {
+            num_vars,
+            degree: 1,
+            tables: vec![bit_reversed_table(&evaluations, num_vars)],
+            products: vec![(Fr::one(), vec![0])],
+        })
+    }
+
+    /// Number of variables not fixed yet
+    #[getter]
+    pub fn num_vars(&self) -> usize {
+        self.num_vars
+    }
+
+    /// Degree of the round polynomials
+    #[getter]
+    pub fn degree(&self) -> usize {
+        self.degree
+    }
+
+    /// Sum of the polynomial over the remaining boolean hypercube
+    pub fn claimed_sum(&self) -> BigUint {
+        let size = 1 << self.num_vars;
+        let tables = &self.tables;
+        let products = &self.products;
+
+        let sum: Fr = (0..size)
+            .into_par_iter()
+            .map_init(
+                || vec![Fr::zero(); tables.len()],
+                |values, i| {
+                    for (value, table) in values.iter_mut().zip(tables) {
+                        *value = table[i];
+                    }
+                    combine(products, values)
+                },
+            )
+            .reduce(Fr::zero, |a, b| a + b);
+
+        sum.into()
+    }
+
+    /// Coefficients of the round polynomial in the lowest remaining variable
+    pub fn round_polynomial(&self) -> PyResult<Vec<BigUint>> {
+        if self.num_vars == 0 {
+            return Err(PyValueError::new_err("Every variable is already fixed"));
+        }
+
+        let half = 1 << (self.num_vars - 1);
+        let points = self.degree + 1;
+        let tables = &self.tables;
+        let products = &self.products;
+
+        let evals = (0..half)
+            .into_par_iter()
+            .fold(
+                || (vec![Fr::zero(); points], vec![Fr::zero(); tables.len()]),
+                |(mut evals, mut values), i| {
+                    // values[j] walks table j along lo + t * (hi - lo) for t = 0, 1, ..., d
+                    for (value, table) in values.iter_mut().zip(tables) {
+                        *value = table[i];
+                    }
+                    for t in 0..points {
+                        if t > 0 {
+                            for (value, table) in values.iter_mut().zip(tables) {
+                                *value += table[i + half] - table[i];
+                            }
+                        }
+                        evals[t] += combine(products, &values);
+                    }
+                    (evals, values)
+                },
+            )
+            .map(|(evals, _)| evals)
+            .reduce(
+                || vec![Fr::zero(); points],
+                |mut a, b| {
+                    a.iter_mut().zip(b).for_each(|(x, y)| *x += y);
+                    a
+                },
+            );
+
+        Ok(interpolate_consecutive(&evals)
+            .into_iter()
+            .map(Into::into)
+            .collect())
+    }
+
+    /// Fix the lowest remaining variable to the round challenge `r`
+    pub fn fix_variable(&mut self, r: BigUint) -> PyResult<()> {
+        if self.num_vars == 0 {
+            return Err(PyValueError::new_err("Every variable is already fixed"));
+        }
+
+        let r = Fr::from(r);
+        self.tables
+            .par_iter_mut()
+            .for_each(|table| fix_lowest_variable(table, r));
+        self.num_vars -= 1;
+        Ok(())
+    }
+
+    /// Evaluation of the polynomial at the fixed challenges
+    pub fn final_evaluation(&self) -> PyResult<BigUint> {
+        let values = self.final_values()?;
+        Ok(combine(&self.products, &values).into())
+    }
+
+    /// Evaluation of every multilinear polynomial at the fixed challenges,
+    /// in the order they were first added
+    pub fn final_evaluations(&self) -> PyResult<Vec<BigUint>> {
+        Ok(self.final_values()?.into_iter().map(Into::into).collect())
+    }
+}
+
+impl SumcheckProver {
+    fn final_values(&self) -> PyResult<Vec<Fr>> {
+        if self.num_vars != 0 {
+            return Err(PyValueError::new_err("Not every variable is fixed yet"));
+        }
+
+        Ok(self.tables.iter().map(|table| table[0]).collect())
+    }
+}
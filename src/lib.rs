@@ -26,6 +26,11 @@ fn register_bn254_module<'py>(py: Python, parent_module: &Bound<'py, PyModule>)
         &ecc_module
     )?)?;
     ecc_module.add_function(wrap_pyfunction!(bn254::curve::pairing, &ecc_module)?)?;
+    ecc_module.add_function(wrap_pyfunction!(bn254::curve::ipa_fold_g1, &ecc_module)?)?;
+    ecc_module.add_function(wrap_pyfunction!(
+        bn254::curve::bulletproofs_fold_g1,
+        &ecc_module
+    )?)?;
     ecc_module.add_function(wrap_pyfunction!(bn254::curve::multi_pairing, &ecc_module)?)?;
     parent_module.add_submodule(&ecc_module)?;
 
@@ -58,6 +63,14 @@ fn register_bls12_381_module<'py>(
         &ecc_module
     )?)?;
     ecc_module.add_function(wrap_pyfunction!(bls12_381::curve::pairing, &ecc_module)?)?;
+    ecc_module.add_function(wrap_pyfunction!(
+        bls12_381::curve::ipa_fold_g1,
+        &ecc_module
+    )?)?;
+    ecc_module.add_function(wrap_pyfunction!(
+        bls12_381::curve::bulletproofs_fold_g1,
+        &ecc_module
+    )?)?;
     ecc_module.add_function(wrap_pyfunction!(
         bls12_381::curve::multi_pairing,
         &ecc_module
@@ -73,7 +86,23 @@ fn register_polynomial_module<'py>(
 ) -> PyResult<()> {
     let poly_bn254_module = PyModule::new(py, "polynomial_bn254")?;
     poly_bn254_module.add_class::<bn254::polynomial::Polynomial>()?;
+    poly_bn254_module.add_class::<bn254::polynomial::SubproductTree>()?;
     poly_bn254_module.add_class::<bn254::mle::MultilinearPolynomial>()?;
+    poly_bn254_module.add_class::<bn254::mle::DenseMultilinearPolynomial>()?;
+    poly_bn254_module.add_class::<bn254::sumcheck::SumcheckProver>()?;
+    poly_bn254_module.add_class::<bn254::sumcheck::VirtualPolynomial>()?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::polynomial::evaluate_polynomials,
+        &poly_bn254_module
+    )?)?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::mle::eq_table,
+        &poly_bn254_module
+    )?)?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::mle::evaluate_multilinear_polynomials,
+        &poly_bn254_module
+    )?)?;
     poly_bn254_module.add_function(wrap_pyfunction!(
         bn254::polynomial::get_evaluation_point,
         &poly_bn254_module
@@ -114,10 +143,38 @@ fn register_polynomial_module<'py>(
         bn254::polynomial::mul_over_evaluation_domain,
         &poly_bn254_module
     )?)?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::polynomial::powers,
+        &poly_bn254_module
+    )?)?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::polynomial::scaled_add,
+        &poly_bn254_module
+    )?)?;
+    poly_bn254_module.add_function(wrap_pyfunction!(
+        bn254::polynomial::combine_challenge_vectors,
+        &poly_bn254_module
+    )?)?;
 
     let poly_bls12_381_module = PyModule::new(py, "polynomial_bls12_381")?;
     poly_bls12_381_module.add_class::<bls12_381::polynomial::Polynomial>()?;
+    poly_bls12_381_module.add_class::<bls12_381::polynomial::SubproductTree>()?;
     poly_bls12_381_module.add_class::<bls12_381::mle::MultilinearPolynomial>()?;
+    poly_bls12_381_module.add_class::<bls12_381::mle::DenseMultilinearPolynomial>()?;
+    poly_bls12_381_module.add_class::<bls12_381::sumcheck::SumcheckProver>()?;
+    poly_bls12_381_module.add_class::<bls12_381::sumcheck::VirtualPolynomial>()?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::polynomial::evaluate_polynomials,
+        &poly_bls12_381_module
+    )?)?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::mle::eq_table,
+        &poly_bls12_381_module
+    )?)?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::mle::evaluate_multilinear_polynomials,
+        &poly_bls12_381_module
+    )?)?;
     poly_bls12_381_module.add_function(wrap_pyfunction!(
         bls12_381::polynomial::get_evaluation_point,
         &poly_bls12_381_module
@@ -150,6 +207,18 @@ fn register_polynomial_module<'py>(
         bls12_381::polynomial::mul_over_evaluation_domain,
         &poly_bls12_381_module
     )?)?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::polynomial::powers,
+        &poly_bls12_381_module
+    )?)?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::polynomial::scaled_add,
+        &poly_bls12_381_module
+    )?)?;
+    poly_bls12_381_module.add_function(wrap_pyfunction!(
+        bls12_381::polynomial::combine_challenge_vectors,
+        &poly_bls12_381_module
+    )?)?;
     poly_bls12_381_module.add_function(wrap_pyfunction!(
         bls12_381::polynomial::evaluate_vanishing_polynomial,
         &poly_bls12_381_module
@@ -1,6 +1,22 @@
 import pytest
 from zksnake.constant import BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD
-from zksnake.polynomial import Polynomial
+from zksnake.polynomial import (
+    DenseMultilinearPolynomial,
+    MultilinearPolynomial,
+    Polynomial,
+    SubproductTree,
+    barycentric_eval_batch,
+    combine_challenge_vectors,
+    eq_table,
+    evaluate_multilinear_polynomials,
+    evaluate_polynomials,
+    hadamard_product,
+    ifft,
+    lagrange_interpolation,
+    multipoint_evaluation,
+    powers,
+    scaled_add,
+)
 
 
 def test_univariate_polynomial():
@@ -44,3 +60,196 @@ def test_multivariate_polynomial():
 
         assert a([5, 10]) == (3 * 5 + 2 * 10) % p
         assert b([5, 10]) == (5 * 5 + 7 * 10) % p
+
+
+def test_barycentric_eval_batch():
+
+    for p in (BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD):
+        n = 8
+        sparse_a = {0: 1}
+        sparse_b = {1: 5, 3: 7, 6: 11}
+
+        x = 1337
+        eval_a, eval_b = barycentric_eval_batch(n, [sparse_a, sparse_b], x, p)
+
+        poly_a = Polynomial(ifft([sparse_a.get(i, 0) for i in range(n)], p), p)
+        poly_b = Polynomial(ifft([sparse_b.get(i, 0) for i in range(n)], p), p)
+
+        assert eval_a == poly_a(x)
+        assert eval_b == poly_b(x)
+
+
+def test_synthetic_division():
+
+    for p in (BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD):
+        a = Polynomial([5, 0, 3, 1, 7, 2], p)
+
+        quotient, evaluation = a.divide_by_linear(11)
+        assert evaluation == a(11)
+        assert quotient * Polynomial([p - 11, 1], p) + evaluation == a
+
+        points = [3, 1337, p - 2]
+        quotient, remainder = a.divide_by_vanishing_set(points)
+
+        divisor = Polynomial([1], p)
+        for point in points:
+            divisor *= Polynomial([-point % p, 1], p)
+
+        assert (quotient, remainder) == tuple(a / divisor)
+        assert remainder.degree() < len(points)
+
+        quotient, remainder = Polynomial([4, 2], p).divide_by_vanishing_set(points)
+        assert quotient.is_zero()
+        assert remainder == Polynomial([4, 2], p)
+
+
+@pytest.mark.parametrize("num_points", [1, 5, 33, 70])
+def test_subproduct_tree(num_points):
+
+    for p in (BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD):
+        xs = [(7 * i + 3) ** 2 % p for i in range(num_points)]
+        ys = [(i * i + 11) % p for i in range(num_points)]
+
+        poly = lagrange_interpolation(xs, ys, p)
+        assert poly.degree() < num_points
+        assert [poly(x) for x in xs] == ys
+
+        tree = SubproductTree(xs, p)
+        assert tree.interpolate(ys) == poly
+
+        other = Polynomial(list(range(1, 2 * num_points + 2)), p)
+        assert tree.evaluate(other) == [other(x) for x in xs]
+        assert multipoint_evaluation(other, xs, p) == [other(x) for x in xs]
+
+        vanishing = tree.vanishing_poly()
+        assert vanishing.degree() == num_points
+        assert all(vanishing(x) == 0 for x in xs)
+
+    with pytest.raises(ValueError):
+        lagrange_interpolation([1, 2, 1], [1, 2, 3], BN254_SCALAR_FIELD)
+
+
+def test_batched_evaluation():
+
+    for p in (BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD):
+        a = Polynomial([1, 2, 3], p)
+        b = Polynomial([2, 3, 4, 5], p)
+        c = Polynomial([0], p)
+
+        points = [0, 1, 1337, p - 1]
+        assert a.evaluate_many(points) == [a(x) for x in points]
+        assert a.evaluate_many([]) == []
+
+        assert evaluate_polynomials([a, b, c], 1337, p) == [a(1337), b(1337), 0]
+        assert evaluate_polynomials([a, b], -1, p) == [a(p - 1), b(p - 1)]
+        assert evaluate_polynomials([], 5, p) == []
+
+
+def test_vector_operations():
+
+    for p in (BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD):
+        y = 1337
+        y_inv = pow(y, -1, p)
+
+        assert powers(y, 3000, p) == [pow(y, i, p) for i in range(3000)]
+        assert powers(y, 0, p) == []
+        assert hadamard_product(powers(y, 50, p), powers(y_inv, 50, p), p) == [1] * 50
+
+        a = [1, 2, 3, p - 1]
+        b = [4, 5, 6, 7]
+        assert scaled_add(a, b, -1, p) == [(u - v) % p for u, v in zip(a, b)]
+
+        with pytest.raises(ValueError):
+            scaled_add(a, b[:2], 1, p)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_combine_challenge_vectors(p):
+
+    u_lists = [[3, 5, 7], [11, 13, 17]]
+    weights = [2, p - 1]
+    s = combine_challenge_vectors(weights, u_lists, p)
+    assert len(s) == 8
+
+    # s holds the coefficients of sum(w_k * prod(1 + u_j * X^(2^(m-1-j))))
+    x = 1337
+    expected = 0
+    for weight, u_list in zip(weights, u_lists):
+        g = weight
+        for j, u in enumerate(u_list):
+            g = g * (1 + u * pow(x, 2 ** (len(u_list) - 1 - j), p)) % p
+        expected += g
+    assert Polynomial(s, p)(x) == expected % p
+
+    with pytest.raises(ValueError):
+        combine_challenge_vectors(weights, [[3, 5, 7], [11, 13]], p)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_dense_multilinear_polynomial(p):
+
+    evals = [3, 0, 7, p - 1, 0, 0, 11, 5]
+    sparse = MultilinearPolynomial(3, [(i, e) for i, e in enumerate(evals) if e], p)
+    dense = DenseMultilinearPolynomial(3, evals, p)
+
+    assert dense.num_vars == 3
+    assert dense.to_evaluations() == sparse.to_evaluations()
+    assert dense.to_coefficients() == sparse.to_coefficients()
+    assert dense.sum() == sparse.sum() == sum(evals) % p
+    assert sparse.to_dense().to_evaluations() == evals
+    assert dense.to_sparse().to_evaluations() == evals
+
+    point = [12345, 678, 9]
+    assert dense.evaluate(point) == sparse.evaluate(point)
+    assert (
+        dense.partial_evaluate(point[:2]).to_evaluations()
+        == sparse.partial_evaluate(point[:2]).to_evaluations()
+    )
+
+    dense.fix_variables(point[:1])
+    assert dense.num_vars == 2
+    dense.fix_variables(point[1:])
+    assert dense.num_vars == 0
+    assert dense.to_evaluations() == [sparse.evaluate(point)]
+
+    other = DenseMultilinearPolynomial(3, [1] * 8, p)
+    assert (sparse.to_dense() - other + other).to_evaluations() == evals
+
+    # zero padding up to the hypercube size
+    assert DenseMultilinearPolynomial(2, [1, 2], p).to_evaluations() == [1, 2, 0, 0]
+
+    with pytest.raises(ValueError):
+        DenseMultilinearPolynomial(1, [1, 2, 3], p)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_eq_table(p):
+
+    r = [3, 141, 59, 2653]
+    eq = eq_table(r, p)
+    assert eq.num_vars == 4
+
+    table = eq.to_evaluations()
+    for x, value in enumerate(table):
+        expected = 1
+        for j, r_j in enumerate(r):
+            expected = expected * (r_j if (x >> j) & 1 else 1 - r_j) % p
+        assert value == expected
+
+    # eq(x, r) is one-hot at boolean r
+    assert eq_table([1, 0, 1], p).to_evaluations() == [0] * 5 + [1, 0, 0]
+
+    evals = [(i, (i * 7919 + 1) % 13) for i in range(16)]
+    sparse = MultilinearPolynomial(4, evals, p)
+    dense = DenseMultilinearPolynomial(4, [e for _, e in evals], p)
+
+    expected = sum(t * e for t, (_, e) in zip(table, evals)) % p
+    assert sparse.evaluate(r) == expected
+    assert evaluate_multilinear_polynomials([sparse, dense, eq], r, p) == [
+        expected,
+        expected,
+        sum(t * t for t in table) % p,
+    ]
+
+    with pytest.raises(ValueError):
+        evaluate_multilinear_polynomials([sparse], r[:3], p)
@@ -1,10 +1,33 @@
 import pytest
+from zksnake.constant import BLS12_381_SCALAR_FIELD, BN254_SCALAR_FIELD
+from zksnake.arithmetization import Var, ConstraintSystem, R1CS
 from zksnake.subprotocol.bulletproofs import (
     RangeProof,
     InnerProductArgument,
     InnerProductProof,
+    AggregatedRangeProofObject,
+    R1CSProof,
+    R1CSProofObject,
 )
+from zksnake.subprotocol.bulletproofs.ipa import generators_digest
 from zksnake.subprotocol.bulletproofs.range_proof import RangeProofObject
+from zksnake.transcript import FiatShamirTranscript
+
+
+@pytest.fixture
+def no_batch_mul(monkeypatch):
+    """
+    Make `E.batch_mul` of a curve fail. The verifiers bind `H' = y^-i * H`
+    through a digest of the generators and `y`, so they must never scale `H`
+    """
+
+    def disable(E):
+        def batch_mul(*_):
+            raise AssertionError("unexpected batch_mul")
+
+        monkeypatch.setattr(E, "batch_mul", batch_mul)
+
+    return disable
 
 
 def test_ipa_bn254():
@@ -74,3 +97,155 @@ def test_range_proof_serialization():
     proof = proof.to_bytes()
 
     assert rp.verify(RangeProofObject.from_bytes(proof, "BLS12_381"))
+
+
+@pytest.mark.parametrize("crv", ["BN254", "BLS12_381"])
+def test_aggregated_range_proof(crv):
+
+    rp = RangeProof(16, crv)
+    values = [1337, 0, 65535, 42]
+    proof = rp.prove_aggregated(values)
+
+    assert len(proof.ipa_proof.L) == 6
+    assert rp.verify_aggregated(proof)
+
+    proof = AggregatedRangeProofObject.from_bytes(proof.to_bytes(), crv)
+    assert rp.verify_aggregated(proof)
+
+    proof.V[0], proof.V[1] = proof.V[1], proof.V[0]
+    assert not rp.verify_aggregated(proof)
+
+    proof = rp.prove_aggregated([1, 2**16])
+    assert not rp.verify_aggregated(proof)
+
+    with pytest.raises(AssertionError):
+        rp.prove_aggregated([])
+
+    # a proof of no values is rejected, alone or in a batch
+    proof.V = []
+    assert not rp.verify_aggregated(proof)
+    assert not rp.verify_batch([proof])
+
+
+def test_range_proof_batch_verification(no_batch_mul):
+
+    rp = RangeProof(16, "BN254")
+    proofs = [rp.prove(v) for v in [0, 1, 1337, 65535]]
+    proofs += [rp.prove_aggregated([3, 5]), rp.prove_aggregated([7, 11, 13, 17])]
+    out_of_range = rp.prove(2**16)
+
+    no_batch_mul(rp.E)
+    assert rp.verify_batch(proofs)
+    assert all(rp.verify(proof) for proof in proofs[:4])
+
+    proofs.append(out_of_range)
+    assert not rp.verify_batch(proofs)
+
+
+@pytest.mark.parametrize("crv", ["BN254", "BLS12_381"])
+def test_ipa_tampered(crv):
+
+    a = list(range(1, 17))
+    b = list(range(17, 33))
+
+    ipa = InnerProductArgument(16, crv)
+    proof, comm, z = ipa.prove(a, b)
+
+    assert len(proof.L) == 4
+    assert ipa.verify(proof, comm, z)
+    assert not ipa.verify(proof, comm, z + 1)
+
+    proof.L[0], proof.R[0] = proof.R[0], proof.L[0]
+    assert not ipa.verify(proof, comm, z)
+
+    proof.L = proof.L[1:]
+    proof.R = proof.R[1:]
+    assert not ipa.verify(proof, comm, z)
+
+
+@pytest.mark.parametrize("crv", ["BN254", "BLS12_381"])
+def test_ipa_caller_bound_generators(crv):
+
+    a = list(range(1, 9))
+    b = list(range(9, 17))
+
+    ipa = InnerProductArgument(8, crv)
+    ipa.Q = 7 * ipa.G[0]
+
+    def transcript():
+        # the caller binds the generators with their digest
+        t = FiatShamirTranscript(b"caller", field=ipa.E.order)
+        t.append(generators_digest(ipa.G, ipa.H))
+        return t
+
+    proof, comm, z = ipa.prove(a, b, transcript(), bind_generators=False)
+
+    assert ipa.verify(proof, comm, z, transcript(), bind_generators=False)
+    assert not ipa.verify(proof, comm, z, transcript())
+    assert not ipa.verify(proof, comm, z + 1, transcript(), bind_generators=False)
+
+    ipa.Q = 11 * ipa.G[0]
+    assert not ipa.verify(proof, comm, z, transcript(), bind_generators=False)
+
+
+def _r1cs(curve, p):
+    x = Var("x")
+    y = Var("y")
+    v1 = Var("v1")
+    v2 = Var("v2")
+
+    cs = ConstraintSystem(["x"], ["y"], p)
+    cs.add_constraint(v1 == x * x)
+    cs.add_constraint(v2 == v1 * x)
+    cs.add_constraint(y - 5 - x == v2 * x)
+    cs.set_public(y)
+
+    r1cs = R1CS(cs, curve)
+    r1cs.compile()
+
+    return r1cs
+
+
+@pytest.mark.parametrize(
+    "crv, p", [("BN254", BN254_SCALAR_FIELD), ("BLS12_381", BLS12_381_SCALAR_FIELD)]
+)
+def test_r1cs_proof(crv, p):
+
+    r1cs = _r1cs(crv, p)
+    pub, priv = r1cs.generate_witness(r1cs.solve({"x": 3}))
+
+    bp = R1CSProof(r1cs, crv)
+    proof = bp.prove(pub, priv)
+
+    assert bp.verify(proof, pub)
+    assert bp.verify(R1CSProofObject.from_bytes(proof.to_bytes(), crv), pub)
+
+    wrong_pub = pub[:-1] + [pub[-1] + 1]
+    assert not bp.verify(proof, wrong_pub)
+
+    wrong_priv = [(v + 1) % p for v in priv]
+    assert not bp.verify(bp.prove(pub, wrong_priv), pub)
+
+    for bad_length in (priv[:-1], priv + [0]):
+        with pytest.raises(AssertionError, match="private witness length"):
+            bp.prove(pub, bad_length)
+
+
+def test_r1cs_proof_batch_verification(no_batch_mul):
+
+    r1cs = _r1cs("BN254", BN254_SCALAR_FIELD)
+    bp = R1CSProof(r1cs)
+
+    proofs = []
+    publics = []
+    for x in range(1, 5):
+        pub, priv = r1cs.generate_witness(r1cs.solve({"x": x}))
+        proofs.append(bp.prove(pub, priv))
+        publics.append(pub)
+
+    no_batch_mul(bp.E)
+    assert bp.verify_batch(proofs, publics)
+    assert bp.verify(proofs[0], publics[0])
+
+    publics[2] = publics[3]
+    assert not bp.verify_batch(proofs, publics)
@@ -1,6 +1,8 @@
+import pathlib
 import pytest
 import random
-from zksnake.commitment.polynomial import KZG, IPA, MultiOpeningQuery
+from zksnake.commitment.polynomial import KZG, IPA, IPAAccumulator, MultiOpeningQuery
+from zksnake.generators import GeneratorCache
 from zksnake.polynomial import Polynomial
 
 
@@ -47,6 +49,14 @@ def test_multi_kzg():
 
     assert kzg.multi_verify(verifier_query, proof)
 
+    # repeating a claim is a no-op, a conflicting one is rejected
+    commitment = verifier_query.commitments[0]
+    evaluation = verifier_query.get_evaluation(commitment, x)
+    verifier_query.verifier_query(commitment, x, evaluation)
+    with pytest.raises(ValueError):
+        verifier_query.verifier_query(commitment, x, (evaluation + 1) % kzg.order)
+    assert kzg.multi_verify(verifier_query, proof)
+
 
 def test_ipa_pcs():
 
@@ -63,6 +73,7 @@ def test_ipa_pcs():
     proof, evaluation = ipa.open(poly, point, commitment, blinding)
 
     assert ipa.verify(commitment, proof, point, evaluation)
+    assert not ipa.verify(commitment, proof, point, (evaluation + 1) % ipa.order)
 
 
 def test_multi_ipa_pcs():
@@ -96,3 +107,172 @@ def test_multi_ipa_pcs():
     proof, verifier_query = ipa.multi_open(query)
 
     assert ipa.multi_verify(verifier_query, proof)
+
+
+@pytest.mark.parametrize("curve", ["BN254", "BLS12_381"])
+def test_batch_kzg(curve):
+
+    kzg = KZG(8, curve)
+    kzg.setup()
+
+    polys = [
+        Polynomial([1, 3, 3, 7], kzg.order),
+        Polynomial([1, 2, 3, 4, 5, 6], kzg.order),
+        Polynomial([42], kzg.order),
+    ]
+    commitments = [kzg.commit(poly) for poly in polys]
+
+    point = random.randint(1, kzg.order)
+    challenge = random.randint(1, kzg.order)
+
+    proof, evaluations = kzg.batch_open(polys, point, challenge)
+
+    assert evaluations == [poly(point) for poly in polys]
+    assert kzg.batch_verify(commitments, proof, point, evaluations, challenge)
+
+    evaluations[1] = (evaluations[1] + 1) % kzg.order
+    assert not kzg.batch_verify(commitments, proof, point, evaluations, challenge)
+
+
+def test_batch_multi_kzg():
+
+    kzg = KZG(8, "BN254")
+    kzg.setup()
+
+    queries = []
+    for seed in range(3):
+        polys = [
+            Polynomial([seed + i + 1 for i in range(degree)], kzg.order)
+            for degree in (4, 6, 3)
+        ]
+
+        query = MultiOpeningQuery()
+        for poly in polys:
+            query.add_polynomial(poly, kzg.commit(poly))
+
+        query.prover_query(polys[0], 123 + seed)
+        query.prover_query(polys[1], 123 + seed)
+        query.prover_query(polys[1], 1234)
+        query.prover_query(polys[2], 1234)
+        query.prover_query(polys[2], 5)
+
+        proof, verifier_query = kzg.multi_open(query)
+        queries.append((verifier_query, proof))
+
+    assert kzg.batch_multi_verify(queries)
+
+    verifier_query, proof = queries[1]
+    tampered = proof[:1] + [(proof[1] + 1) % kzg.order] + proof[2:]
+    queries[1] = (verifier_query, tampered)
+
+    assert not kzg.batch_multi_verify(queries)
+
+
+def test_multi_opening_query():
+
+    kzg = KZG(4, "BN254")
+    kzg.setup()
+
+    polys = [
+        Polynomial([1, 3, 3, 7], kzg.order),
+        Polynomial([1, 2, 3, 4], kzg.order),
+        Polynomial([1, 2, 3, 0], kzg.order),
+    ]
+    commitments = [kzg.commit(poly) for poly in polys]
+
+    query = MultiOpeningQuery()
+    query.add_polynomials(polys, commitments)
+    query.add_polynomial(polys[0], commitments[0])
+
+    assert len(query.polynomials) == 3
+    assert query.to_commitment(polys[1]) == commitments[1]
+    assert query.to_polynomial(commitments[2]) == polys[2]
+
+    query.batch_prover_query(polys, 123)
+    query.batch_prover_query(polys[1:], 1234)
+    query.prover_query(polys[1], 123)
+
+    assert query.opening_points == {123: [0, 1, 2], 1234: [1, 2]}
+    assert query.get_evaluation(commitments[2], 1234) == polys[2](1234)
+    assert query.get_point_sets() == [([123], [0]), ([123, 1234], [1, 2])]
+
+    proof, verifier_query = kzg.multi_open(query)
+
+    assert verifier_query.get_point_sets() == query.get_point_sets()
+    assert kzg.multi_verify(verifier_query, proof)
+
+
+def test_ipa_accumulation():
+
+    ipa = IPA(8, "BN254")
+    ipa.setup()
+
+    accumulator = IPAAccumulator()
+    for i in range(4):
+        poly = Polynomial([i + 1, 2, 22, 7, i], ipa.order)
+        blinding = random.randint(1, ipa.order)
+        commitment = ipa.commit(poly, blinding)
+        point = random.randint(1, ipa.order)
+
+        proof, evaluation = ipa.open(poly, point, commitment, blinding)
+        assert ipa.accumulate(accumulator, commitment, proof, point, evaluation)
+
+    assert len(accumulator) == 4
+    assert ipa.settle(accumulator)
+
+    bad = IPAAccumulator()
+    assert ipa.accumulate(bad, commitment, proof, point, (evaluation + 1) % ipa.order)
+
+    bad.merge(accumulator)
+    assert len(bad) == 5
+    assert not ipa.settle(bad)
+
+
+def test_generator_cache(tmp_path):
+
+    cache = GeneratorCache(str(tmp_path))
+
+    small = cache.get(b"seed", b"G", "BN254", 4)
+    large = cache.get(b"seed", b"G", "BN254", 16)
+
+    assert len(small) == 4 and len(large) == 16
+    assert large[:4] == small
+    assert len(set(large)) == 16
+    assert cache.get(b"seed", b"H", "BN254", 4) != small
+
+    reloaded = GeneratorCache(str(tmp_path))
+    assert reloaded.get(b"seed", b"G", "BN254", 8) == large[:8]
+    assert GeneratorCache().get(b"seed", b"G", "BN254", 16) == large
+
+
+def test_generator_cache_rejects_bad_files(tmp_path):
+
+    cache = GeneratorCache(str(tmp_path))
+    points = cache.get(b"seed", b"G", "BN254", 8)
+    other = cache.get(b"seed", b"H", "BN254", 1)[0]
+
+    key = ("BN254", b"seed", b"G")
+    path = pathlib.Path(cache._path(key))
+    data = path.read_bytes()
+    header = 4 + 32
+    size = len(data[header:]) // 8
+
+    def reload(content):
+        path.write_bytes(content)
+        return GeneratorCache(str(tmp_path)).get(b"seed", b"G", "BN254", 8)
+
+    # a corrupted point fails the digest
+    corrupted = bytearray(data)
+    corrupted[-1] ^= 1
+    assert reload(bytes(corrupted)) == points
+
+    # a last point that does not match its derivation is caught even with a
+    # matching digest, as the last point is always derived again
+    body = data[header:-size] + bytes(other.to_bytes())
+    forged = data[:4] + cache._digest(key, body) + body
+    assert reload(forged) == points
+    assert path.read_bytes() == data
+
+    # a set persisted by another derivation version is ignored
+    assert reload((2).to_bytes(4, "little") + data[4:]) == points
+    assert path.read_bytes() == data
@@ -1,7 +1,11 @@
 import pytest, random
 
 from zksnake.constant import BLS12_381_SCALAR_FIELD, BN254_SCALAR_FIELD
-from zksnake.polynomial import MultilinearPolynomial
+from zksnake.polynomial import (
+    DenseMultilinearPolynomial,
+    MultilinearPolynomial,
+    VirtualPolynomial,
+)
 from zksnake.arithmetization import LayeredCircuit
 from zksnake.subprotocol.gkr import GKR
 from zksnake.subprotocol.sumcheck import Sumcheck
@@ -40,7 +44,16 @@ def circuit_data():
     circuit3.add_gate("MUL", "b1", "b2", "c1")
     circuit3.add_gate("MUL", "b3", "b4", "c2")
 
-    return [circuit1, circuit2, circuit3]
+    # wires consumed out of gate order, a dangling output and inputs used out of order
+    circuit4 = LayeredCircuit(["x", "y", "u"])
+    circuit4.add_gate("MUL", "y", "u", "p")
+    circuit4.add_gate("ADD", "u", "x", "q")
+    circuit4.add_gate("MUL", "x", "x", "s")
+    circuit4.add_layer()
+    circuit4.add_gate("ADD", "q", "p", "t")
+    circuit4.add_gate("MUL", "p", "q", "v")
+
+    return [circuit1, circuit2, circuit3, circuit4]
 
 
 def test_e2e_gkr_bn254(circuit_data):
@@ -73,6 +86,26 @@ def test_e2e_gkr_bls12_381(circuit_data):
         assert gkr.verify(inp, output, proof)
 
 
+def test_gkr_wrong_output(circuit_data):
+
+    random.seed("gkr")
+    for circuit in circuit_data:
+
+        gkr = GKR(circuit)
+        inp = {key: random.randrange(1, 1000) for key in circuit.inputs}
+
+        output, proof = gkr.prove(inp)
+
+        key = next(iter(output))
+        wrong_output = dict(output)
+        wrong_output[key] = (output[key] + 1) % BN254_SCALAR_FIELD
+        assert not gkr.verify(inp, wrong_output, proof)
+
+        wrong_input = dict(inp)
+        wrong_input[circuit.inputs[-1]] += 1
+        assert not gkr.verify(wrong_input, output, proof)
+
+
 def test_sumcheck():
 
     g = MultilinearPolynomial(4, [(5, 1), (6, 1), (7, 1)], BN254_SCALAR_FIELD)
@@ -82,3 +115,77 @@ def test_sumcheck():
     sum_claim, proof, _ = sumcheck.prove(g)
 
     assert sumcheck.verify(sum_claim, proof, 1, mlpoly=g)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_sumcheck_dense(p):
+
+    random.seed("sumcheck")
+    n = 6
+    evals = [(i, random.randrange(p)) for i in range(2**n)]
+    g = MultilinearPolynomial(n, evals, p)
+
+    sumcheck = Sumcheck(n, p)
+    sum_claim, proof, r = sumcheck.prove(g)
+
+    assert sum_claim == sum(v for _, v in evals) % p
+    assert sumcheck.verify(sum_claim, proof, 1, mlpoly=g) == r
+    assert not sumcheck.verify((sum_claim + 1) % p, proof, 1, mlpoly=g)
+
+    dense = DenseMultilinearPolynomial(n, [v for _, v in evals], p)
+    assert sumcheck.prove(dense) == (sum_claim, proof, r)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_sumcheck_virtual(p):
+
+    random.seed("virtual")
+    n = 5
+    g1, g2, g3 = [
+        MultilinearPolynomial(n, [(i, random.randrange(p)) for i in range(2**n)], p)
+        for _ in range(3)
+    ]
+
+    # f = 3 * g1 * g2 * g3 + 5 * g1 + g2^2
+    f = VirtualPolynomial(n, p)
+    f.add_product([g1, g2, g3], 3)
+    f.add_product([g1], 5)
+    f.add_product([g2, g2], 1)
+    assert f.degree == 3
+
+    e1, e2, e3 = g1.to_evaluations(), g2.to_evaluations(), g3.to_evaluations()
+    expected = sum(3 * a * b * c + 5 * a + b * b for a, b, c in zip(e1, e2, e3)) % p
+
+    sumcheck = Sumcheck(n, p)
+    sum_claim, proof, r = sumcheck.prove_virtual(f)
+
+    assert sum_claim == expected
+    assert all(poly.degree() == 3 for poly in proof)
+    assert sumcheck.verify(sum_claim, proof, f.degree, mlpoly=f) == r
+    assert not sumcheck.verify(sum_claim, proof, 2, mlpoly=f)
+    assert not sumcheck.verify((sum_claim + 1) % p, proof, f.degree, mlpoly=f)
+
+
+@pytest.mark.parametrize("p", [BN254_SCALAR_FIELD, BLS12_381_SCALAR_FIELD])
+def test_virtual_polynomial_fixed_dense(p):
+
+    random.seed("fixed")
+    n = 4
+    evals = [random.randrange(p) for _ in range(2**n)]
+    d = DenseMultilinearPolynomial(n, evals, p)
+    point = [random.randrange(p) for _ in range(n)]
+    expected = d.evaluate(point)
+
+    f = VirtualPolynomial(n, p)
+    f.add_product([d, d], 1)
+
+    # fixing d in place neither changes the table shared by f nor lets d be reused
+    d.fix_variables(point[:1])
+    assert f.evaluate(point) == expected * expected % p
+    with pytest.raises(ValueError):
+        f.add_product([d], 1)
+
+    # a fixed d is a new polynomial over fewer variables
+    g = VirtualPolynomial(n - 1, p)
+    g.add_product([d], 1)
+    assert g.evaluate(point[1:]) == expected
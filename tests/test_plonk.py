@@ -1,3 +1,5 @@
+import copy
+
 import pytest
 
 from zksnake.arithmetization.plonkish import Plonkish
@@ -78,6 +80,44 @@ def plonkish_data_bls12_381():
     return plonkish, (pub, priv)
 
 
+def test_plonkish_copy_constraints(plonkish_data_bn254):
+
+    plonkish, (pub, priv) = plonkish_data_bn254
+    n = plonkish.length
+    width = plonkish.num_wires
+    layout = plonkish.witness_layout
+
+    def var_at(position):
+        col, row = divmod(position, n)
+        return layout[row * width + col] if row * width < len(layout) else 0
+
+    # every cycle of the permutation stays on a single variable
+    for src, dst in enumerate(plonkish.permutation):
+        assert var_at(src) == var_at(dst)
+
+    # rows 0 and 1 hold the public inputs y and z; v1 is the output of row 4
+    # and the left input of row 5, and z links its public row to row 2
+    assert layout[4 * width + 2] == layout[5 * width]
+    assert layout[width] == layout[2 * width + 2]
+    priv[5 * width] += 1
+    assert not plonkish.is_sat(pub, priv)
+
+
+def test_plonkish_serialization(plonkish_data_bn254):
+
+    plonkish, (pub, priv) = plonkish_data_bn254
+    data = plonkish.to_bytes()
+
+    loaded = Plonkish.from_bytes(data)
+    assert loaded.to_bytes() == data
+    assert loaded.generate_witness(plonkish.solve({"x": 3})) == (pub, priv)
+    assert loaded.is_sat(pub, priv)
+
+    plonk = Plonk(loaded)
+    plonk.setup()
+    assert plonk.verify(plonk.prove(pub, priv), pub)
+
+
 def test_plonk_bn254(plonkish_data_bn254):
 
     plonkish, witness = plonkish_data_bn254
@@ -91,6 +131,11 @@ def test_plonk_bn254(plonkish_data_bn254):
     proof_bytes = proof.to_bytes()
     assert plonk.verify(Proof.from_bytes(proof_bytes), pub)
 
+    # rows outside the public input rows of the key are not cached
+    roots = dict(plonk.verifying_key.roots)
+    assert not plonk.verify(proof, {**pub, plonkish.length - 1: 1})
+    assert plonk.verifying_key.roots == roots
+
 
 def test_plonk_bls12_381(plonkish_data_bls12_381):
 
@@ -138,3 +183,257 @@ def test_key_serialization_bls12_381(plonkish_data_bls12_381):
         VerifyingKey.from_bytes(vk, "BLS12_381").to_bytes()
         == plonk.verifying_key.to_bytes()
     )
+
+
+@pytest.mark.parametrize(
+    "curve,field",
+    [("BN254", BN254_SCALAR_FIELD), ("BLS12_381", BLS12_381_SCALAR_FIELD)],
+)
+def test_plonk_custom_gates(curve, field):
+
+    x = Var("x")
+    k = Var("k")
+    y = Var("y")
+    s0 = Var("s0")
+    s1 = Var("s1")
+    s2 = Var("s2")
+
+    cs = ConstraintSystem(["x", "k"], ["y"], field)
+    cs.add_constraint(s0 == x * x * x * x * x)
+    cs.add_constraint(s1 == 2 * s0 + 3 * x - k + 7)
+    cs.add_constraint(s2 == s1 * s1 * s1 * s1 * s1)
+    cs.add_constraint(y == s2 + s1 - s0)
+    cs.set_public(y)
+
+    plonkish = Plonkish(cs, curve, custom_gates=["pow5", "add4"])
+    plonkish.compile()
+    assert plonkish.num_wires == 4
+    # one public input row for y, then one row per constraint
+    assert plonkish.unpadded_length == 5
+
+    pub, priv = plonkish.generate_witness(plonkish.solve({"x": 3, "k": 5}))
+    assert plonkish.is_sat(pub, priv)
+
+    plonk = Plonk(plonkish, curve)
+    plonk.setup()
+
+    vk = plonk.verifying_key
+    assert VerifyingKey.from_bytes(vk.to_bytes(), curve).to_bytes() == vk.to_bytes()
+    assert (
+        ProvingKey.from_bytes(plonk.proving_key.to_bytes(), curve).to_bytes()
+        == plonk.proving_key.to_bytes()
+    )
+
+    proof = plonk.prove(pub, priv)
+    proof = Proof.from_bytes(proof.to_bytes(), curve, vk.num_wires, vk.num_quotient)
+    assert plonk.verify(proof, pub)
+
+    pub[0] = (pub[0] + 1) % field
+    assert not plonk.verify(proof, pub)
+
+
+@pytest.mark.parametrize(
+    "curve,field",
+    [("BN254", BN254_SCALAR_FIELD), ("BLS12_381", BLS12_381_SCALAR_FIELD)],
+)
+def test_plonk_public_reuse(curve, field):
+
+    x = Var("x")
+    y = Var("y")
+    z = Var("z")
+
+    # the public output y is also an input of the next constraint
+    cs = ConstraintSystem(["x"], ["y", "z"], field)
+    cs.add_constraint(y == x * x)
+    cs.add_constraint(z == y * x)
+    cs.set_public(y)
+
+    plonkish = Plonkish(cs, curve)
+    plonkish.compile()
+
+    pub, priv = plonkish.generate_witness(plonkish.solve({"x": 3}))
+    assert plonkish.is_sat(pub, priv)
+
+    plonk = Plonk(plonkish, curve)
+    plonk.setup()
+    proof = plonk.prove(pub, priv)
+    assert plonk.verify(proof, pub)
+
+    # y is public on row 0, the output of row 1 and the left input of row 2
+    width = plonkish.num_wires
+    layout = plonkish.witness_layout
+    assert layout[0] == layout[width + 2] == layout[2 * width]
+
+    # a different y in the second constraint must break the copy constraint
+    tampered = list(priv)
+    tampered[2 * width] = (tampered[2 * width] + 1) % field
+    tampered[2 * width + 2] = tampered[2 * width] * tampered[2 * width + 1] % field
+    assert not plonkish.is_sat(pub, tampered)
+    with pytest.raises(AssertionError, match="Copy constraints"):
+        plonk.prove(pub, tampered)
+
+    assert not plonk.verify(proof, {0: (pub[0] + 1) % field})
+
+
+def _poseidon_rounds(field, custom):
+    """
+    One full and one partial round of a width-3 Poseidon-like permutation:
+    x^5 S-boxes, then an MDS mix that also adds the next round constants.
+    Without custom gates, every S-box and every mix is decomposed into vanilla rows.
+    """
+    mds = [[2, 1, 1], [1, 2, 1], [1, 1, 3]]
+    constants = [[11, 12, 13], [21, 22, 23]]
+    outputs = [f"out{i}" for i in range(3)]
+
+    cs = ConstraintSystem([f"in{i}" for i in range(3)], outputs, field)
+
+    def sbox(v, name):
+        out = Var(name)
+        if custom:
+            cs.add_constraint(out == v * v * v * v * v)
+        else:
+            v2 = Var(name + "_2")
+            v4 = Var(name + "_4")
+            cs.add_constraint(v2 == v * v)
+            cs.add_constraint(v4 == v2 * v2)
+            cs.add_constraint(out == v4 * v)
+        return out
+
+    def mix(state, round_constants, names):
+        mixed = []
+        for row, c, name in zip(mds, round_constants, names):
+            out = Var(name)
+            if custom:
+                cs.add_constraint(
+                    out == row[0] * state[0] + row[1] * state[1] + row[2] * state[2] + c
+                )
+            else:
+                t = Var(name + "_t")
+                cs.add_constraint(t == row[0] * state[0] + row[1] * state[1])
+                cs.add_constraint(out == t + row[2] * state[2] + c)
+            mixed.append(out)
+        return mixed
+
+    state = [Var(f"in{i}") for i in range(3)]
+
+    # full round
+    state = [sbox(v, f"f{i}") for i, v in enumerate(state)]
+    state = mix(state, constants[0], [f"m{i}" for i in range(3)])
+
+    # partial round
+    state = [sbox(state[0], "p0")] + state[1:]
+    state = mix(state, constants[1], outputs)
+
+    for out in state:
+        cs.set_public(out)
+
+    return cs
+
+
+@pytest.mark.parametrize(
+    "curve,field",
+    [("BN254", BN254_SCALAR_FIELD), ("BLS12_381", BLS12_381_SCALAR_FIELD)],
+)
+def test_plonk_custom_gates_poseidon_rows(curve, field):
+
+    inputs = {"in0": 1, "in1": 2, "in2": 3}
+
+    vanilla = Plonkish(_poseidon_rounds(field, custom=False), curve)
+    vanilla.compile()
+
+    compact = Plonkish(
+        _poseidon_rounds(field, custom=True), curve, custom_gates=["pow5", "add4"]
+    )
+    compact.compile()
+
+    # full round: 3 S-boxes and 3 mixes, 3 * 3 + 3 * 2 rows -> 3 + 3 rows
+    # partial round: 1 S-box and 3 mixes, 3 + 3 * 2 rows -> 1 + 3 rows
+    # plus one public input row for each of the 3 outputs
+    assert vanilla.unpadded_length == 3 + 24
+    assert compact.unpadded_length == 3 + 10
+
+    vanilla_solution = vanilla.solve(inputs)
+    compact_solution = compact.solve(inputs)
+    for out in ("out0", "out1", "out2"):
+        assert vanilla_solution[out] == compact_solution[out]
+
+    pub, priv = compact.generate_witness(compact_solution)
+    assert compact.is_sat(pub, priv)
+
+    plonk = Plonk(compact, curve)
+    plonk.setup()
+    assert plonk.verify(plonk.prove(pub, priv), pub)
+
+
+@pytest.mark.parametrize(
+    "curve,field",
+    [("BN254", BN254_SCALAR_FIELD), ("BLS12_381", BLS12_381_SCALAR_FIELD)],
+)
+def test_plonk_lookup(curve, field):
+
+    def hint(i):
+        return lambda **k: (k["x"] >> (8 * i)) & 0xFF
+
+    x = Var("x")
+    y = Var("y")
+    limbs = [Var(f"x{i}") for i in range(8)]
+    acc = [Var(f"acc{i}") for i in range(7)]
+
+    # 64-bit range check of x with eight lookups into a 8-bit table
+    cs = ConstraintSystem(["x"], ["y"], field)
+    cs.add_lookup_table("u8", list(range(256)))
+    for i, limb in enumerate(limbs):
+        cs.unsafe_assign(limb, hint(i), ("x",))
+        cs.add_lookup(limb, "u8")
+
+    cs.add_constraint(acc[0] == limbs[0] + limbs[1] * 2**8)
+    for i in range(1, 7):
+        cs.add_constraint(acc[i] == acc[i - 1] + limbs[i + 1] * 2 ** (8 * (i + 1)))
+    cs.add_constraint(x == acc[6])
+    cs.add_constraint(y == x)
+    cs.set_public(y)
+
+    plonkish = Plonkish(cs, curve)
+    plonkish.compile()
+    assert plonkish.unpadded_length == 18
+
+    pub, priv = plonkish.generate_witness(plonkish.solve({"x": 0xDEADBEEFCAFEF00D}))
+    assert plonkish.is_sat(pub, priv)
+
+    plonk = Plonk(plonkish, curve)
+    plonk.setup()
+
+    vk = plonk.verifying_key
+    proof = plonk.prove(pub, priv)
+    proof = Proof.from_bytes(
+        proof.to_bytes(), curve, vk.num_wires, vk.num_quotient, vk.has_lookup
+    )
+    assert plonk.verify(proof, pub)
+
+    # the verifier rejects tampered multiplicities and running sums:
+    # commitments and evaluations of the lookup argument of another valid witness,
+    # or single tampered evaluations
+    other_pub, other_priv = plonkish.generate_witness(plonkish.solve({"x": 0x1234}))
+    other = plonk.prove(other_pub, other_priv).lookup
+
+    honest = proof.lookup
+    for name in ("tau_m", "tau_phi", "zeta_k", "zeta_t", "zeta_phi_omega"):
+        tampered = copy.copy(honest)
+        setattr(tampered, name, getattr(other, name))
+        proof.lookup = tampered
+        assert not plonk.verify(proof, pub)
+
+    for name in ("zeta_k", "zeta_t", "zeta_phi_omega"):
+        tampered = copy.copy(honest)
+        setattr(tampered, name, (getattr(honest, name) + 1) % field)
+        proof.lookup = tampered
+        assert not plonk.verify(proof, pub)
+
+    proof.lookup = honest
+    assert plonk.verify(proof, pub)
+
+    # a limb outside of the table
+    priv[3 * 17] += 256
+    assert not plonkish.is_sat(pub, priv)
+    with pytest.raises(AssertionError):
+        plonk.prove(pub, priv)
@@ -1,3 +1,5 @@
+import mmap
+
 import pytest
 
 from zksnake.arithmetization.r1cs import R1CS
@@ -107,3 +109,38 @@ def test_r1cs_loop_constraint():
     qap.from_r1cs(r1cs)
 
     qap.evaluate_witness(pub + priv)
+
+
+def test_r1cs_serialization(tmp_path):
+
+    x = Var("x")
+    y = Var("y")
+    v1 = Var("v1")
+
+    cs = ConstraintSystem(["x"], ["y"], BLS12_381_SCALAR_FIELD)
+    cs.add_constraint(v1 == x * x)
+    cs.add_constraint(y - 5 - x == v1 * x)
+    cs.set_public(y)
+
+    r1cs = R1CS(cs, "BLS12_381")
+    r1cs.compile()
+    data = r1cs.to_bytes()
+
+    path = tmp_path / "circuit.r1cs.bin"
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            loaded = R1CS.from_bytes(m, cs)
+
+    assert loaded.to_bytes() == data
+    assert loaded.A.triplets == r1cs.A.triplets
+    assert loaded.C.triplets_map == r1cs.C.triplets_map
+
+    pub, priv = loaded.generate_witness(loaded.solve({"x": 3}))
+    assert (pub, priv) == r1cs.generate_witness(cs.solve({"x": 3}))
+    assert loaded.is_sat(pub, priv)
+
+    tampered = bytearray(data)
+    tampered[-1] ^= 1
+    with pytest.raises(AssertionError):
+        R1CS.from_bytes(bytes(tampered))